@@ -0,0 +1,270 @@
+# backend/audio_cache.py
+
+# This module turns an audio classification dataset into a cached store of
+# Whisper-style log-mel features, so audio is decoded, resampled and
+# transformed once instead of on every epoch.
+#
+# Clips are decoded and resampled in worker processes, a chunk of clips per
+# task. Each chunk's log-mel features are computed at once: the STFT frames of
+# all its clips are stacked into one matrix for a single FFT and mel
+# projection. Features are appended, unpadded, to one memory-mapped
+# (frames, n_mels) array with per-clip frame offsets (clip i is
+# features[offsets[i]:offsets[i + 1]]). The store is keyed by the feature
+# parameters and a hash of the dataset, so later runs read features directly.
+#
+# Features follow Whisper's feature extractor: 16 kHz audio, 25 ms Hann
+# windows every 10 ms, Slaney mel filters, log10, a floor 8 below each
+# clip's peak, then (x + 4) / 4. Batches are padded to the full window
+# (30 s = 3000 frames by default), which is what Whisper's encoder expects;
+# the padding gets the value Whisper gives silence.
+#
+# WAV files are decoded with the standard library; other formats need the
+# `soundfile` package. Expected layout: one sub-folder per class, e.g.
+#     my_dataset/yes/001.wav
+#     my_dataset/no/002.flac
+
+import concurrent.futures
+import functools
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import wave
+
+import numpy as np
+
+from backend import manifest, ragged_store
+
+CACHE_DIR = os.path.join(os.getcwd(), "datasets", ".cache", "audio")
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".mp3")
+
+DEFAULT_CONFIG = {
+    "sample_rate": 16000,   # Hz every clip is resampled to
+    "n_fft": 400,           # STFT window (25 ms at 16 kHz)
+    "hop_length": 160,      # STFT hop (10 ms at 16 kHz)
+    "n_mels": 80,           # mel bins; 80 for Whisper base, 128 for large-v3
+    "max_seconds": 30.0,    # clips are cut to this length, and batches padded to it
+    "dtype": "float16",     # storage type of the features
+    "workers": None,        # decoding processes; None uses every core
+    "chunk_size": 32,       # clips per decoding task
+}
+
+# Options that change the stored features, and so the cache key
+FEATURE_KEYS = ("sample_rate", "n_fft", "hop_length", "n_mels", "max_seconds", "dtype")
+
+
+def _read_wav(path):
+    """Decodes a PCM WAV file with the standard library; returns (float32 array (samples, channels), rate)."""
+    with wave.open(path, "rb") as f:
+        channels, width, rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+        data = f.readframes(f.getnframes())
+    if width == 1:
+        audio = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        audio = np.frombuffer(data, dtype="<i2").astype(np.float32) / 2 ** 15
+    elif width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        audio = (raw[:, 0].astype(np.int32) | raw[:, 1].astype(np.int32) << 8 | raw[:, 2].astype(np.int8).astype(np.int32) << 16)
+        audio = audio.astype(np.float32) / 2 ** 23
+    elif width == 4:
+        audio = np.frombuffer(data, dtype="<i4").astype(np.float32) / 2 ** 31
+    else:
+        raise ValueError(f"Unsupported WAV sample width {width} bytes in {path}.")
+    return audio.reshape(-1, channels), rate
+
+
+def resample(audio, rate, target_rate):
+    """Resamples a 1-D signal by band-limited (FFT) interpolation."""
+    if rate == target_rate or not len(audio):
+        return audio
+    length = int(round(len(audio) * target_rate / rate))
+    return (np.fft.irfft(np.fft.rfft(audio), length) * (length / len(audio))).astype(np.float32)
+
+
+def decode(path, sample_rate, max_seconds=None):
+    """Decodes an audio file to a mono float32 signal at `sample_rate`, cut to `max_seconds`."""
+    try:
+        import soundfile
+    except ImportError:
+        soundfile = None
+    if soundfile is not None:
+        audio, rate = soundfile.read(path, dtype="float32", always_2d=True)
+    elif path.lower().endswith(".wav"):
+        audio, rate = _read_wav(path)
+    else:
+        raise ImportError(f"Decoding {os.path.splitext(path)[1]} files needs the soundfile package (pip install soundfile).")
+    audio = audio.mean(axis=1)
+    if max_seconds:
+        audio = audio[:int(max_seconds * rate)]
+    return resample(audio, rate, sample_rate)
+
+
+def _hz_to_mel(freqs):
+    # Slaney's scale: linear below 1 kHz, logarithmic above
+    freqs = np.asarray(freqs, dtype=np.float64)
+    mels = freqs * 3.0 / 200.0
+    log_region = freqs >= 1000.0
+    mels[log_region] = 15.0 + np.log(freqs[log_region] / 1000.0) * 27.0 / np.log(6.4)
+    return mels
+
+
+def _mel_to_hz(mels):
+    mels = np.asarray(mels, dtype=np.float64)
+    freqs = mels * 200.0 / 3.0
+    log_region = mels >= 15.0
+    freqs[log_region] = 1000.0 * np.exp((mels[log_region] - 15.0) * np.log(6.4) / 27.0)
+    return freqs
+
+
+@functools.lru_cache(maxsize=None)
+def mel_filters(sample_rate, n_fft, n_mels):
+    """Returns Slaney-normalized triangular mel filters, shape (n_mels, n_fft // 2 + 1)."""
+    fft_freqs = np.linspace(0.0, sample_rate / 2.0, n_fft // 2 + 1)
+    mel_freqs = _mel_to_hz(np.linspace(_hz_to_mel([0.0])[0], _hz_to_mel([sample_rate / 2.0])[0], n_mels + 2))
+    widths = np.diff(mel_freqs)
+    ramps = mel_freqs[:, None] - fft_freqs[None, :]
+    rising = -ramps[:-2] / widths[:-1, None]
+    falling = ramps[2:] / widths[1:, None]
+    filters = np.maximum(0.0, np.minimum(rising, falling))
+    filters *= (2.0 / (mel_freqs[2:] - mel_freqs[:-2]))[:, None]
+    return filters.astype(np.float32)
+
+
+def log_mel(waveforms, sample_rate=16000, n_fft=400, hop_length=160, n_mels=80):
+    """
+    Computes Whisper-style log-mel features for a batch of clips at once.
+
+    Returns:
+        tuple: (float32 array (total_frames, n_mels) with the clips' frames
+        one after another, int64 array with every clip's frame count)
+    """
+    window = np.hanning(n_fft + 1)[:-1].astype(np.float32)
+    pad = n_fft // 2
+    counts = np.array([len(audio) // hop_length for audio in waveforms], dtype=np.int64)
+    frames = []
+    for audio, count in zip(waveforms, counts):
+        if count:
+            # Centered frames, like torch.stft(center=True) without its last frame
+            padded = np.pad(audio, pad, mode="reflect" if len(audio) > pad else "constant")
+            frames.append(np.lib.stride_tricks.sliding_window_view(padded, n_fft)[::hop_length][:count])
+    if not frames:
+        return np.zeros((0, n_mels), dtype=np.float32), counts
+
+    spectrum = np.fft.rfft(np.concatenate(frames) * window, axis=1)
+    power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+    log_spec = np.log10(np.maximum(power @ mel_filters(sample_rate, n_fft, n_mels).T, 1e-10))
+
+    # Floor every clip at 8 below its own peak, then scale to roughly [-1, 1]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[counts > 0]
+    peaks = np.maximum.reduceat(log_spec.max(axis=1), starts)
+    floors = np.repeat(peaks - 8.0, counts[counts > 0])
+    return (np.maximum(log_spec, floors[:, None]) + 4.0) / 4.0, counts
+
+
+def pad_value(features):
+    """The value Whisper's features take on padded silence after a clip with these (normalized) features."""
+    return max(float(features.max()) - 2.0, -1.5) if len(features) else -1.5
+
+
+def _extract_chunk(paths, config):
+    """Decodes, resamples and transforms a chunk of clips; returns (features in the storage dtype, frame counts)."""
+    waveforms = [decode(path, config["sample_rate"], config["max_seconds"]) for path in paths]
+    features, counts = log_mel(waveforms, config["sample_rate"], config["n_fft"], config["hop_length"], config["n_mels"])
+    return features.astype(config["dtype"]), counts
+
+
+def build_cache(dataset_path, status_callback, config=None, cache_dir=None):
+    """
+    Extracts log-mel features for an audio dataset folder into a memory-mapped
+    feature store, unless a store with the same feature parameters is
+    already up to date.
+
+    Args:
+        dataset_path (str): The local path to the dataset (as returned by load_dataset).
+        status_callback (function): A function to send status updates back to the GUI.
+        config (dict): Options overriding DEFAULT_CONFIG.
+        cache_dir (str): Where stores are kept. Defaults to CACHE_DIR.
+
+    Returns:
+        str: The path to the store's index, to be opened with AudioFeatureDataset.
+    """
+    config = {**DEFAULT_CONFIG, **{k: v for k, v in (config or {}).items() if v is not None}}
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+
+    entries = manifest.update(dataset_path, status_callback, extensions=AUDIO_EXTENSIONS)
+    if not len(entries):
+        raise ValueError(f"No audio files found in class folders of {dataset_path}.")
+    feature_config = {key: config[key] for key in FEATURE_KEYS}
+    digest = hashlib.sha1(json.dumps(feature_config, sort_keys=True).encode("utf-8"))
+    for i, rel_path in enumerate(entries.paths):
+        digest.update(f"{rel_path}\0{entries.labels[i]}\0{entries.fingerprint(i)}\n".encode("utf-8"))
+    key = digest.hexdigest()
+    index_path = os.path.join(cache_dir, f"{key}.json")
+    if os.path.exists(index_path):
+        status_callback(f"[Audio Cache] Reusing log-mel features at {index_path}")
+        return index_path
+
+    paths = [os.path.join(dataset_path, rel_path) for rel_path in entries.paths]
+    chunk_size = config["chunk_size"]
+    chunks = [paths[start:start + chunk_size] for start in range(0, len(paths), chunk_size)]
+    workers = min(config["workers"] or os.cpu_count() or 1, len(chunks))
+    status_callback(f"[Audio Cache] Extracting {config['n_mels']}-bin log-mel features from {len(paths)} clips "
+                    f"in {workers} process(es)...")
+
+    features_path = os.path.join(cache_dir, f"{key}.features.bin")
+    if workers <= 1:
+        offsets = ragged_store.write_chunks(features_path, (_extract_chunk(chunk, feature_config) for chunk in chunks))
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+        try:
+            offsets = ragged_store.write_chunks(features_path, pool.map(_extract_chunk, chunks, itertools.repeat(feature_config)))
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    np.save(os.path.join(cache_dir, f"{key}.offsets.npy"), offsets)
+    np.save(os.path.join(cache_dir, f"{key}.labels.npy"), np.asarray(entries.labels, dtype=np.int64))
+    index = {
+        "dataset_path": os.path.abspath(dataset_path),
+        "config": feature_config,
+        "classes": entries.classes,
+        "num_samples": len(paths),
+        "num_frames": int(offsets[-1]),
+        "n_mels": config["n_mels"],
+        "window_frames": int(config["max_seconds"] * config["sample_rate"]) // config["hop_length"],
+        "dtype": config["dtype"],
+        "features": os.path.basename(features_path),
+        "offsets": f"{key}.offsets.npy",
+        "labels": f"{key}.labels.npy",
+    }
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+
+    seconds = index["num_frames"] * config["hop_length"] / config["sample_rate"]
+    status_callback(f"[Audio Cache] {seconds / 3600:.2f} h of audio cached as {index['num_frames']} feature frames at {index_path}")
+    return index_path
+
+
+class AudioFeatureDataset(ragged_store.RaggedDataset):
+    """
+    A map-style dataset over a feature store written by build_cache.
+
+    Samples are (features, label), the features being a read-only
+    (frames, n_mels) view into the memory-mapped store (see
+    ragged_store.RaggedDataset).
+    """
+    DATA_KEY = "features"
+
+    def __init__(self, index_path):
+        super().__init__(index_path)
+        self.window_frames = self.index["window_frames"]
+
+    def _layout(self):
+        return self.index["dtype"], (self.index["num_frames"], self.index["n_mels"])
+
+    @property
+    def features(self):
+        return self.data
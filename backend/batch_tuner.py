@@ -0,0 +1,225 @@
+# backend/batch_tuner.py
+
+# This module picks the training batch size automatically. It probes
+# increasing batch sizes with a few timed training steps on a copy of the
+# model, while a background thread samples the process's resident memory,
+# and keeps the batch size with the best throughput whose peak memory stays
+# within a RAM budget. Probing stops at the first batch size that would not
+# fit (judged from the memory growth per sample seen so far), fails, or
+# stops improving throughput.
+#
+# The requested batch size is kept as the effective batch size: the probed
+# sizes are its divisors, and gradient accumulation makes up the difference
+# (micro-batch size * accumulation steps = requested batch size). With
+# data-parallel training each process takes 1/world_size of the requested
+# batch size, so micro-batch size * accumulation steps * world_size stays
+# the requested batch size.
+
+import copy
+import os
+import threading
+import time
+
+from backend import telemetry
+
+DEFAULT_TUNER_CONFIG = {
+    "memory_budget_mb": None,   # peak RSS allowed per training process; None = current RSS + 80% of available RAM
+    "max_batch_size": 512,      # largest micro-batch probed
+    "probe_steps": 3,           # timed training steps per candidate, after one warm-up step
+    "patience": 2,              # stop after this many candidates without a throughput gain
+}
+
+
+def current_rss_mb():
+    """Returns the resident memory of this process in MB."""
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return telemetry.peak_rss_mb() or 0.0
+
+
+def available_memory_mb():
+    """Returns the memory available to new allocations in MB, or None if unknown."""
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (ValueError, AttributeError, OSError):
+        return None
+
+
+class MemoryWatcher:
+    """Samples the resident memory on a background thread and records the peak."""
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_mb = current_rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+
+def candidate_sizes(target, max_batch_size):
+    """
+    Returns the micro-batch sizes to probe, smallest first: divisors of
+    `target` growing roughly geometrically, or powers of two without a target.
+    """
+    if not target:
+        return [1 << i for i in range(max_batch_size.bit_length()) if 1 << i <= max_batch_size]
+    sizes = []
+    for size in range(1, min(target, max_batch_size) + 1):
+        if target % size == 0 and (not sizes or size >= sizes[-1] * 1.5):
+            sizes.append(size)
+    return sizes
+
+
+def _make_batch(dataset, batch_size, collate_fn, generator):
+    import torch
+
+    indices = torch.randint(0, len(dataset), (batch_size,), generator=generator).tolist()
+    return collate_fn([dataset[i] for i in indices])
+
+
+def probe(model, optimizer, batch, steps):
+    """
+    Times `steps` training steps on one batch, after a warm-up step.
+
+    Returns:
+        tuple: (samples per second, peak RSS in MB)
+    """
+    import torch.nn as nn
+
+    from backend import optizer
+
+    images, labels = batch
+    criterion = nn.CrossEntropyLoss()
+    with MemoryWatcher() as watcher:
+        for step in range(steps + 1):
+            if step == 1:
+                start = time.perf_counter()
+            optimizer.zero_grad()
+            criterion(optizer.forward(model, images), labels).backward()
+            optimizer.step()
+        elapsed = time.perf_counter() - start
+    return steps * len(labels) / elapsed, watcher.peak_mb
+
+
+def tune(model, dataset, status_callback=print, target_batch_size=32, fine_tune=True, optimizer_type="adam", lr=0.001, world_size=1, collate_fn=None, config=None):
+    """
+    Finds the throughput-optimal micro-batch size that fits the memory budget.
+
+    Args:
+        model (nn.Module): The model to train (left unchanged; a copy is probed).
+        dataset: The map-style training dataset.
+        status_callback (function): A function to send status updates back to the GUI.
+        target_batch_size (int): The effective batch size to keep across all
+            processes, or None to pick any batch size (no accumulation).
+        fine_tune (bool): Probe with the backbone frozen, as it will be trained.
+        optimizer_type (str): "adam" or "sgd"; its state counts towards memory.
+        lr (float): Learning rate for the probe steps.
+        world_size (int): Data-parallel processes sharing the budget and the
+            target batch size.
+        collate_fn (function): Turns a list of samples into a batch.
+        config (dict): Options overriding DEFAULT_TUNER_CONFIG.
+
+    Returns:
+        dict: "batch_size" (per process), "accumulation_steps",
+        "world_size", "effective_batch_size" (batch_size * accumulation_steps
+        * world_size), "samples_per_sec", "peak_rss_mb", "budget_mb" and the
+        "probes" made.
+    """
+    import torch
+    import torch.optim as optim
+
+    from backend import data_pipeline, optizer
+
+    config = {**DEFAULT_TUNER_CONFIG, **{k: v for k, v in (config or {}).items() if v is not None}}
+    collate_fn = collate_fn or data_pipeline.collate_batch
+    status_callback = telemetry.get(status_callback)
+
+    budget = config["memory_budget_mb"]
+    if budget is None:
+        available = available_memory_mb()
+        budget = current_rss_mb() + 0.8 * available / world_size if available else float("inf")
+    # Every process trains on its own micro-batches
+    if target_batch_size:
+        target_batch_size = max(1, target_batch_size // world_size)
+    sizes = candidate_sizes(target_batch_size, min(config["max_batch_size"], len(dataset)) or 1)
+    status_callback(f"[Batch Tuner] Probing batch sizes {sizes} within a {budget:.0f} MB memory budget...")
+
+    work_model = copy.deepcopy(model)
+    if fine_tune:
+        optizer.freeze_backbone(work_model)
+    work_model.train()
+    params = [p for p in work_model.parameters() if p.requires_grad]
+    generator = torch.Generator().manual_seed(0)
+
+    probes = []
+    best = None
+    since_best = 0
+    for size in sizes:
+        if len(probes) >= 2:
+            # Skip sizes that the memory growth per sample so far says will not fit
+            (size_a, peak_a), (size_b, peak_b) = [(p["batch_size"], p["peak_rss_mb"]) for p in probes[-2:]]
+            per_sample = max(0.0, (peak_b - peak_a) / (size_b - size_a))
+            if peak_b + per_sample * (size - size_b) > budget:
+                status_callback(f"[Batch Tuner] Batch size {size} is predicted to exceed the memory budget.")
+                break
+        optimizer = optim.SGD(params, lr=lr, momentum=0.9) if optimizer_type.lower() == "sgd" else optim.Adam(params, lr=lr)
+        try:
+            batch = _make_batch(dataset, size, collate_fn, generator)
+            samples_per_sec, peak = probe(work_model, optimizer, batch, config["probe_steps"])
+        except (RuntimeError, MemoryError) as e:
+            status_callback(f"[Batch Tuner] Batch size {size} failed ({str(e).splitlines()[0]}); stopping.")
+            break
+        finally:
+            del optimizer
+        fits = peak <= budget
+        probes.append({"batch_size": size, "samples_per_sec": samples_per_sec, "peak_rss_mb": peak, "fits": fits})
+        status_callback(f"[Batch Tuner] Batch size {size}: {samples_per_sec:.0f} samples/s, peak RSS {peak:.0f} MB"
+                        + ("" if fits else " (over budget)"))
+        if not fits:
+            break
+        if best is None or samples_per_sec > best["samples_per_sec"]:
+            best, since_best = probes[-1], 0
+        else:
+            since_best += 1
+            if since_best >= config["patience"]:
+                break
+
+    if best is None:
+        best = {"batch_size": sizes[0], "samples_per_sec": 0.0, "peak_rss_mb": None}
+        status_callback(f"[Batch Tuner] No batch size fit the budget; falling back to {sizes[0]}.")
+    accumulation_steps = target_batch_size // best["batch_size"] if target_batch_size else 1
+    result = {
+        "batch_size": best["batch_size"],
+        "accumulation_steps": accumulation_steps,
+        "world_size": world_size,
+        "effective_batch_size": best["batch_size"] * accumulation_steps * world_size,
+        "samples_per_sec": best["samples_per_sec"],
+        "peak_rss_mb": best["peak_rss_mb"],
+        "budget_mb": budget,
+        "probes": probes,
+    }
+    status_callback.emit("batch_tuning", **result)
+    return result
@@ -0,0 +1,188 @@
+# backend/checkpoint.py
+
+# This module writes periodic training checkpoints without stalling training.
+# The training loop takes a snapshot copy of the model and optimizer state
+# (a fast in-memory clone) and hands it to a background writer thread, which
+# serializes it to a temporary file and atomically renames it into place.
+# Only the most recent K checkpoints are kept. A run can later resume from
+# the latest checkpoint, including its epoch counter and RNG state.
+#
+# Every checkpoint also stores the run's training config, and a run only
+# resumes from a checkpoint written with the same config. Checkpoints hold
+# only tensors and plain Python values (the NumPy RNG state is stored as a
+# list), so they are loaded with weights_only=True and never run pickled code.
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+
+import torch
+
+CHECKPOINT_DIR = os.path.join(os.getcwd(), "checkpoints")
+
+_CHECKPOINT_NAME = re.compile(r"^checkpoint-epoch(\d+)(?:-batch(\d+))?\.pt$")
+
+
+# The params that tell runs apart. `epochs` is not one of them, so a finished
+# run can be resumed with more epochs.
+RUN_KEYS = ("model_choice", "model_revision", "dataset_info", "optimizer_type", "lr", "batch_size", "fine_tune")
+
+
+def run_checkpoint_dir(params):
+    """
+    Returns the default checkpoint directory for a run: one folder per model,
+    dataset and training config, so runs with different settings never share
+    (or prune) each other's checkpoints.
+    """
+    if params.get("checkpoint_dir"):
+        return params["checkpoint_dir"]
+    dataset_name = os.path.basename(os.path.normpath(str(params.get("dataset_info", "dataset")))) or "dataset"
+    run_key = hashlib.sha1(json.dumps({key: params.get(key) for key in RUN_KEYS}, sort_keys=True,
+                                      default=str).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(CHECKPOINT_DIR, f"{params.get('model_choice', 'model')}-{dataset_name.replace('/', '-')}-{run_key}")
+
+
+def snapshot(obj):
+    """Returns a copy of a (nested) state dict with every tensor cloned to CPU."""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {key: snapshot(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot(value) for value in obj)
+    return obj
+
+
+def rng_state(loader_generator=None):
+    """Captures the Python, NumPy, torch and (optionally) data loader RNG states."""
+    state = {"python": random.getstate(), "torch": torch.get_rng_state()}
+    try:
+        import numpy as np
+        kind, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+        state["numpy"] = (kind, keys.tolist(), pos, has_gauss, cached_gaussian)
+    except ImportError:
+        pass
+    if loader_generator is not None:
+        state["loader"] = loader_generator.get_state()
+    return state
+
+
+def restore_rng_state(state, loader_generator=None):
+    random.setstate(state["python"])
+    torch.set_rng_state(state["torch"])
+    if "numpy" in state:
+        import numpy as np
+        kind, keys, pos, has_gauss, cached_gaussian = state["numpy"]
+        np.random.set_state((kind, np.asarray(keys, dtype=np.uint32), pos, has_gauss, cached_gaussian))
+    if loader_generator is not None and "loader" in state:
+        loader_generator.set_state(state["loader"])
+
+
+def list_checkpoints(directory):
+    """
+    Returns ((epoch, batch), path) for every checkpoint in `directory`, oldest first.
+
+    `epoch` counts completed epochs and `batch` the batches trained since, so
+    an end-of-epoch checkpoint has batch 0.
+    """
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for name in os.listdir(directory):
+        match = _CHECKPOINT_NAME.match(name)
+        if match:
+            found.append(((int(match.group(1)), int(match.group(2) or 0)), os.path.join(directory, name)))
+    return sorted(found)
+
+
+def latest_checkpoint(directory):
+    """Returns the path of the newest checkpoint in `directory`, or None."""
+    checkpoints = list_checkpoints(directory)
+    return checkpoints[-1][1] if checkpoints else None
+
+
+def load_checkpoint(path):
+    return torch.load(path, map_location="cpu", weights_only=True)
+
+
+def clear_checkpoints(directory):
+    """Deletes every checkpoint in `directory`; returns how many were deleted."""
+    checkpoints = list_checkpoints(directory)
+    for _, path in checkpoints:
+        os.remove(path)
+    return len(checkpoints)
+
+
+def _describe(epoch, batch):
+    return f"epoch {epoch}" + (f" batch {batch}" if batch else "")
+
+
+class CheckpointWriter:
+    """
+    Writes checkpoints on a background thread.
+
+    `save` only clones the state and returns. If the writer is still busy
+    with an older checkpoint when a newer one arrives, the older pending
+    (not yet started) one is replaced, so training never waits on disk I/O.
+    """
+    def __init__(self, directory, keep_last=3, status_callback=None):
+        self.directory = directory
+        self.keep_last = keep_last
+        self.status_callback = status_callback or (lambda message: None)
+        os.makedirs(directory, exist_ok=True)
+        self._pending = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def save(self, epoch, state, batch=0):
+        """
+        Queues a checkpoint for `epoch`.
+
+        Args:
+            epoch (int): The number of completed epochs.
+            state (dict): Model/optimizer state dicts and anything else to store.
+            batch (int): Batches trained in the current epoch, for mid-epoch checkpoints.
+        """
+        copy = snapshot({**state, "epoch": epoch, "batch": batch})
+        with self._cond:
+            if self._pending is not None:
+                self.status_callback(f"[Checkpoint] Skipping {_describe(*self._pending[0])} checkpoint; "
+                                     f"superseded by {_describe(epoch, batch)}.")
+            self._pending = ((epoch, batch), copy)
+            self._cond.notify()
+
+    def close(self):
+        """Writes any pending checkpoint and stops the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                position, state = self._pending
+                self._pending = None
+            try:
+                self._write(*position, state)
+            except Exception as e:
+                self.status_callback(f"[Checkpoint] Failed to write checkpoint for {_describe(*position)}: {e}")
+
+    def _write(self, epoch, batch, state):
+        name = f"checkpoint-epoch{epoch:04d}" + (f"-batch{batch:07d}" if batch else "")
+        path = os.path.join(self.directory, f"{name}.pt")
+        tmp_path = path + ".tmp"
+        torch.save(state, tmp_path)
+        os.replace(tmp_path, path)
+        for _, old_path in list_checkpoints(self.directory)[:-self.keep_last]:
+            os.remove(old_path)
+        self.status_callback(f"[Checkpoint] Saved {path}")
@@ -0,0 +1,328 @@
+# backend/data_pipeline.py
+
+# This module turns a prepared dataset into PyTorch train/val DataLoaders.
+# Loading runs in a pool of worker processes that stay alive between epochs
+# and prefetch batches ahead of the training loop, and samples are collated
+# into a batch with a single stack instead of one tensor per sample.
+#
+# Tokenized text (backend/text_cache.py) is padded per batch to its longest
+# sample, and batches are drawn from pools of samples sorted by length, so
+# little compute is spent on padding tokens. Audio clips come as cached
+# log-mel features (backend/audio_cache.py) and are padded to the model's
+# input window.
+
+import functools
+import os
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Subset, WeightedRandomSampler
+
+DEFAULT_LOADER_CONFIG = {
+    "batch_size": 32,
+    "num_workers": None,         # None picks one worker per spare core, up to 16
+    "persistent_workers": True,  # keep workers alive across epochs
+    "prefetch_factor": 4,        # batches each worker loads ahead
+    "val_split": 0.1,
+    "shuffle": True,
+    "seed": 0,
+    "streaming": False,          # stream shards with a bounded shuffle buffer instead of random access
+    "shuffle_buffer": 2048,      # samples per worker held for shuffling when streaming
+    "stratify": False,           # keep class proportions equal in the train/val split
+    "balanced": False,           # sample training batches with every class equally likely
+    "bucketing": True,           # text: batch samples of similar length together
+    "bucket_size": 100,          # text: batches per pool of samples sorted by length
+}
+
+
+def default_num_workers():
+    return max(0, min((os.cpu_count() or 1) - 1, 16))
+
+
+def collate_batch(samples):
+    """
+    Collates (image, label) samples into one batch.
+
+    Images are HWC arrays (usually read-only memmap views); they are stacked
+    with a single copy and converted to a float NCHW tensor in [0, 1].
+    """
+    images = np.stack([image for image, _ in samples])
+    labels = torch.as_tensor([label for _, label in samples], dtype=torch.long)
+    images = torch.from_numpy(images).permute(0, 3, 1, 2)
+    if images.dtype == torch.uint8:
+        images = images.float().div_(255.0)
+    return images.contiguous(), labels
+
+
+def collate_tokens(samples, pad_token_id=0, pad_to=None):
+    """
+    Collates (token ids, label) samples into one batch, padded to the longest
+    sample (or to `pad_to` tokens).
+
+    Returns:
+        tuple: ({"input_ids", "attention_mask"} long tensors of shape (N, L), labels)
+    """
+    lengths = np.fromiter((len(ids) for ids, _ in samples), dtype=np.int64, count=len(samples))
+    width = pad_to or int(lengths.max(initial=0))
+    input_ids = np.full((len(samples), width), pad_token_id, dtype=np.int64)
+    for row, (ids, _) in zip(input_ids, samples):
+        row[:len(ids)] = ids
+    attention_mask = np.arange(width) < lengths[:, None]
+    labels = torch.as_tensor([label for _, label in samples], dtype=torch.long)
+    inputs = {"input_ids": torch.from_numpy(input_ids), "attention_mask": torch.from_numpy(attention_mask).long()}
+    return inputs, labels
+
+
+def collate_features(samples, pad_to=None):
+    """
+    Collates (log-mel features of shape (frames, n_mels), label) samples into
+    one batch, padded to the longest clip (or to `pad_to` frames) with the
+    value of silence.
+
+    Returns:
+        tuple: ({"input_features": float tensor of shape (N, n_mels, frames)}, labels)
+    """
+    from backend import audio_cache
+
+    width = pad_to or max(len(features) for features, _ in samples)
+    n_mels = samples[0][0].shape[1]
+    batch = np.empty((len(samples), width, n_mels), dtype=np.float32)
+    for row, (features, _) in zip(batch, samples):
+        count = min(len(features), width)
+        row[:count] = features[:count]
+        row[count:] = audio_cache.pad_value(features)
+    labels = torch.as_tensor([label for _, label in samples], dtype=torch.long)
+    return {"input_features": torch.from_numpy(batch).transpose(1, 2).contiguous()}, labels
+
+
+class BucketBatchSampler:
+    """
+    Yields batches of indices whose samples have similar lengths.
+
+    Indices are shuffled and cut into pools of `batch_size * bucket_size`
+    samples; each pool is sorted by length and split into batches, and the
+    batches are shuffled. Batches are random but padded far less than
+    batches of arbitrary samples. Without shuffling, the whole dataset is
+    sorted by length.
+
+    Args:
+        lengths (array): The length of every sample.
+        batch_size (int): Samples per batch.
+        shuffle (bool): Randomize the pools and the batch order, differently every epoch.
+        bucket_size (int): Batches per pool.
+        seed (int): Base seed of the shuffling.
+    """
+    def __init__(self, lengths, batch_size, shuffle=True, bucket_size=100, seed=0):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.bucket_size = bucket_size
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __len__(self):
+        return -(-len(self.lengths) // self.batch_size)
+
+    def batches(self):
+        """Returns this epoch's batches as index arrays, in order."""
+        rng = np.random.default_rng([self.seed, self.epoch])
+        if self.shuffle:
+            indices = rng.permutation(len(self.lengths))
+            pool_size = self.batch_size * self.bucket_size
+        else:
+            indices = np.arange(len(self.lengths))
+            pool_size = len(indices) or 1
+        batches = []
+        for start in range(0, len(indices), pool_size):
+            pool = indices[start:start + pool_size]
+            pool = pool[np.argsort(self.lengths[pool], kind="stable")]
+            batches.extend(pool[i:i + self.batch_size] for i in range(0, len(pool), self.batch_size))
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return batches
+
+    def __iter__(self):
+        for batch in self.batches():
+            yield batch.tolist()
+
+
+def padding_efficiency(lengths, batches):
+    """Returns the fraction of tokens in padded `batches` that are real tokens."""
+    lengths = np.asarray(lengths)
+    real = padded = 0
+    for batch in batches:
+        batch_lengths = lengths[batch]
+        real += int(batch_lengths.sum())
+        padded += int(batch_lengths.max(initial=0)) * len(batch)
+    return real / padded if padded else 1.0
+
+
+def split_dataset(dataset, val_split, seed, stratify=False):
+    """Randomly splits a map-style dataset into (train, val) subsets, optionally stratified by its labels."""
+    if stratify and hasattr(dataset, "labels"):
+        from backend import manifest
+        train_indices, val_indices = manifest.stratified_split(dataset.labels, val_split, seed)
+        return Subset(dataset, train_indices), Subset(dataset, val_indices)
+    generator = torch.Generator().manual_seed(seed)
+    indices = torch.randperm(len(dataset), generator=generator).tolist()
+    val_size = int(len(dataset) * val_split)
+    return Subset(dataset, indices[val_size:]), Subset(dataset, indices[:val_size])
+
+
+def make_loader(dataset, config, shuffle, collate_fn=collate_batch, sampler=None, batch_sampler=None):
+    """Builds a single DataLoader from a loader config."""
+    num_workers = config["num_workers"]
+    if num_workers is None:
+        num_workers = default_num_workers()
+    kwargs = {}
+    if num_workers > 0:
+        kwargs["persistent_workers"] = config["persistent_workers"]
+        kwargs["prefetch_factor"] = config["prefetch_factor"]
+    if batch_sampler is not None:
+        kwargs["batch_sampler"] = batch_sampler
+    else:
+        kwargs.update(batch_size=config["batch_size"], shuffle=shuffle and sampler is None, sampler=sampler)
+    return DataLoader(
+        dataset,
+        num_workers=num_workers,
+        collate_fn=collate_fn,
+        generator=torch.Generator().manual_seed(config["seed"]),
+        **kwargs,
+    )
+
+
+def balanced_sampler(dataset, train_set, config):
+    """Returns a sampler that draws the training subset with every class equally likely, or None without labels."""
+    if not hasattr(dataset, "labels"):
+        return None
+    from backend import manifest
+    labels = np.asarray(dataset.labels)[train_set.indices]
+    return WeightedRandomSampler(
+        manifest.balanced_weights(labels), num_samples=len(train_set),
+        generator=torch.Generator().manual_seed(config["seed"]),
+    )
+
+
+def build_streaming_loaders(index_path, status_callback, config=None):
+    """
+    Creates train and validation loaders that stream the shards of a dataset
+    cache with constant memory (see backend/streaming.py).
+
+    Whole shards are held out for validation. Workers are restarted every
+    epoch so that each one picks up the epoch set with `set_epoch`.
+
+    Returns:
+        tuple: (train_loader, val_loader)
+    """
+    from backend import streaming
+
+    config = {**DEFAULT_LOADER_CONFIG, **{k: v for k, v in (config or {}).items() if v is not None}}
+    train_shards, val_shards = streaming.split_shards(index_path, config["val_split"], config["seed"])
+    train_set = streaming.StreamingDataset(index_path, train_shards, shuffle=config["shuffle"],
+                                           shuffle_buffer=config["shuffle_buffer"], seed=config["seed"],
+                                           batch_size=config["batch_size"])
+    val_set = streaming.StreamingDataset(index_path, val_shards, shuffle=False, batch_size=config["batch_size"])
+    loader_config = {**config, "persistent_workers": False}
+    train_loader = make_loader(train_set, loader_config, shuffle=False)
+    val_loader = make_loader(val_set, loader_config, shuffle=False)
+    status_callback(
+        f"[Data Pipeline] Streaming {len(train_set)} train samples from {len(train_shards)} shards / "
+        f"{len(val_set)} val samples from {len(val_shards)} shards, batch size {config['batch_size']}, "
+        f"{train_loader.num_workers} workers, shuffle buffer {config['shuffle_buffer']}."
+    )
+    return train_loader, val_loader
+
+
+def build_loaders(dataset, status_callback, config=None):
+    """
+    Creates the train and validation loaders for a map-style dataset.
+
+    Args:
+        dataset: A map-style dataset yielding (image, label), e.g. ShardedDataset.
+        status_callback (function): A function to send status updates back to the GUI.
+        config (dict): Loader options overriding DEFAULT_LOADER_CONFIG.
+
+    Returns:
+        tuple: (train_loader, val_loader)
+    """
+    config = {**DEFAULT_LOADER_CONFIG, **{k: v for k, v in (config or {}).items() if v is not None}}
+    train_set, val_set = split_dataset(dataset, config["val_split"], config["seed"], stratify=config["stratify"])
+    sampler = balanced_sampler(dataset, train_set, config) if config["balanced"] else None
+    train_loader = make_loader(train_set, config, shuffle=config["shuffle"], sampler=sampler)
+    val_loader = make_loader(val_set, config, shuffle=False)
+    status_callback(
+        f"[Data Pipeline] {len(train_set)} train / {len(val_set)} val samples, "
+        f"batch size {config['batch_size']}, {train_loader.num_workers} workers, "
+        f"prefetch {config['prefetch_factor'] if train_loader.num_workers else 0}."
+    )
+    return train_loader, val_loader
+
+
+def build_text_loaders(dataset, status_callback, config=None):
+    """
+    Creates the train and validation loaders for a tokenized text dataset
+    (TokenizedDataset). Batches are padded to their longest sample and, with
+    `bucketing`, drawn from pools of samples sorted by length.
+
+    With `balanced`, training batches are sampled class-balanced instead,
+    without length bucketing.
+
+    Returns:
+        tuple: (train_loader, val_loader)
+    """
+    config = {**DEFAULT_LOADER_CONFIG, **{k: v for k, v in (config or {}).items() if v is not None}}
+    train_set, val_set = split_dataset(dataset, config["val_split"], config["seed"], stratify=config["stratify"])
+    collate_fn = functools.partial(collate_tokens, pad_token_id=dataset.pad_token_id)
+    lengths = np.asarray(dataset.lengths)
+    sampler = balanced_sampler(dataset, train_set, config) if config["balanced"] else None
+
+    def bucket_sampler(subset, shuffle):
+        return BucketBatchSampler(lengths[subset.indices], config["batch_size"], shuffle=shuffle,
+                                  bucket_size=config["bucket_size"], seed=config["seed"])
+
+    bucketed = config["bucketing"] and sampler is None
+    train_loader = make_loader(train_set, config, shuffle=config["shuffle"], collate_fn=collate_fn, sampler=sampler,
+                               batch_sampler=bucket_sampler(train_set, config["shuffle"]) if bucketed else None)
+    val_loader = make_loader(val_set, config, shuffle=False, collate_fn=collate_fn,
+                             batch_sampler=bucket_sampler(val_set, False) if config["bucketing"] else None)
+
+    # How much of each padded batch is real tokens, vs. padding every batch to the longest sample
+    train_lengths = lengths[train_set.indices]
+    if bucketed:
+        batches = train_loader.batch_sampler.batches()
+    else:
+        order = np.random.default_rng(config["seed"]).permutation(len(train_lengths))
+        batches = [order[i:i + config["batch_size"]] for i in range(0, len(order), config["batch_size"])]
+    efficiency = padding_efficiency(train_lengths, batches)
+    naive = train_lengths.mean() / train_lengths.max() if len(train_lengths) else 1.0
+    status_callback(
+        f"[Data Pipeline] {len(train_set)} train / {len(val_set)} val texts, batch size {config['batch_size']}, "
+        f"{train_loader.num_workers} workers, {'length-bucketed' if bucketed else 'random'} batches: "
+        f"{efficiency:.0%} of tokens are real (vs. {naive:.0%} padding every batch to the longest text)."
+    )
+    return train_loader, val_loader
+
+
+def build_audio_loaders(dataset, status_callback, config=None):
+    """
+    Creates the train and validation loaders for a log-mel feature store
+    (AudioFeatureDataset). Every batch is padded to the store's full window,
+    the fixed input length of Whisper's encoder.
+
+    Returns:
+        tuple: (train_loader, val_loader)
+    """
+    config = {**DEFAULT_LOADER_CONFIG, **{k: v for k, v in (config or {}).items() if v is not None}}
+    train_set, val_set = split_dataset(dataset, config["val_split"], config["seed"], stratify=config["stratify"])
+    collate_fn = functools.partial(collate_features, pad_to=dataset.window_frames)
+    sampler = balanced_sampler(dataset, train_set, config) if config["balanced"] else None
+    train_loader = make_loader(train_set, config, shuffle=config["shuffle"], collate_fn=collate_fn, sampler=sampler)
+    val_loader = make_loader(val_set, config, shuffle=False, collate_fn=collate_fn)
+    status_callback(
+        f"[Data Pipeline] {len(train_set)} train / {len(val_set)} val clips, batch size {config['batch_size']}, "
+        f"{train_loader.num_workers} workers, features padded to {dataset.window_frames} frames."
+    )
+    return train_loader, val_loader
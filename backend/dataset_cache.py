@@ -0,0 +1,223 @@
+# backend/dataset_cache.py
+
+# This module converts a dataset folder into memory-mapped NumPy shards plus
+# a label index, stored under `datasets/.cache`. Shards are keyed by a content
+# hash of their source files and the preprocessing config, so repeated runs
+# (and every epoch of a run) read already-decoded samples zero-copy through
+# `np.memmap`, and only shards whose files changed are decoded again. File
+# fingerprints come from the dataset's manifest (see backend/manifest.py), so
+# unchanged files are not read again either.
+#
+# Shard membership is stable: a shard never spans two classes, and within a
+# class a shard ends after every file whose path hashes to a boundary. Adding
+# or removing a file therefore only changes the shard it falls in, instead
+# of shifting every later shard.
+#
+# Expected folder layout: one sub-folder per class, e.g.
+#     my_dataset/cat/001.png
+#     my_dataset/dog/002.jpg
+
+import bisect
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from backend import manifest
+
+CACHE_DIR = os.path.join(os.getcwd(), "datasets", ".cache")
+
+DEFAULT_CONFIG = {
+    "image_size": [32, 32],  # [height, width] every image is resized to
+    "channels": 3,           # 3 for RGB, 1 for grayscale
+    "dtype": "uint8",
+    "shard_size": 1024,      # average samples per shard (at most twice that)
+}
+
+
+def hash_bytes(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def hash_config(config):
+    return hash_bytes(json.dumps(config, sort_keys=True).encode("utf-8"))
+
+
+def decode_image(path, config):
+    """Decodes an image file into an array of shape (H, W, C) as described by `config`."""
+    from PIL import Image
+
+    height, width = config["image_size"]
+    mode = "L" if config["channels"] == 1 else "RGB"
+    with Image.open(path) as img:
+        img = img.convert(mode).resize((width, height))
+        array = np.asarray(img, dtype=config["dtype"])
+    return array.reshape(height, width, config["channels"])
+
+
+def split_shards(samples, shard_size):
+    """
+    Splits (relative_path, label) samples, in order, into shards whose
+    membership depends only on the paths around each boundary.
+
+    Returns:
+        list: (start, stop) sample ranges, one per shard.
+    """
+    ranges = []
+    start = 0
+    for i, (rel_path, label) in enumerate(samples):
+        last = i + 1 == len(samples) or samples[i + 1][1] != label
+        boundary = int(hash_bytes(rel_path.encode("utf-8"))[:8], 16) % shard_size == 0
+        if last or boundary or i + 1 - start >= 2 * shard_size:
+            ranges.append((start, i + 1))
+            start = i + 1
+    return ranges
+
+
+def _write_shard(shard_path, paths, config):
+    height, width = config["image_size"]
+    shape = (len(paths), height, width, config["channels"])
+    tmp_path = shard_path + ".tmp"
+    shard = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=config["dtype"], shape=shape)
+    for i, path in enumerate(paths):
+        shard[i] = decode_image(path, config)
+    shard.flush()
+    del shard
+    os.replace(tmp_path, shard_path)
+
+
+def build_cache(dataset_path, status_callback, config=None, cache_dir=None):
+    """
+    Preprocesses a dataset folder into memory-mapped shards, reusing every
+    shard whose source files and config are unchanged.
+
+    Args:
+        dataset_path (str): The local path to the dataset (as returned by load_dataset).
+        status_callback (function): A function to send status updates back to the GUI.
+        config (dict): Preprocessing options overriding DEFAULT_CONFIG.
+        cache_dir (str): Where shards and indexes are stored. Defaults to CACHE_DIR.
+
+    Returns:
+        str: The path to the dataset index, to be opened with ShardedDataset.
+    """
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    cache_dir = cache_dir or CACHE_DIR
+    shard_dir = os.path.join(cache_dir, "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+
+    status_callback(f"[Dataset Cache] Scanning {dataset_path}...")
+    entries = manifest.update(dataset_path, status_callback)
+    samples, classes = entries.samples(), entries.classes
+    status_callback(f"[Dataset Cache] Found {len(samples)} samples in {len(classes)} classes.")
+    counts = ", ".join(f"{name}: {count}" for name, count in zip(classes, entries.class_counts()))
+    status_callback(f"[Dataset Cache] Classes: {counts}")
+
+    config_hash = hash_config(config)
+    shard_size = config["shard_size"]
+    shards = []
+    labels = []
+    rebuilt = 0
+    for start, stop in split_shards(samples, shard_size):
+        chunk = samples[start:stop]
+        paths = [os.path.join(dataset_path, rel_path) for rel_path, _ in chunk]
+        digest = hashlib.sha1(config_hash.encode("utf-8"))
+        for i, (rel_path, label) in enumerate(chunk, start=start):
+            digest.update(f"{rel_path}\0{label}\0{entries.fingerprint(i)}\n".encode("utf-8"))
+        shard_key = digest.hexdigest()
+        shard_path = os.path.join(shard_dir, f"{shard_key}.npy")
+        if not os.path.exists(shard_path):
+            _write_shard(shard_path, paths, config)
+            rebuilt += 1
+        shards.append({"key": shard_key, "count": len(chunk)})
+        labels.extend(label for _, label in chunk)
+
+    status_callback(f"[Dataset Cache] {rebuilt} of {len(shards)} shards rebuilt, {len(shards) - rebuilt} reused.")
+
+    dataset_key = hash_bytes("".join([config_hash] + [s["key"] for s in shards]).encode("utf-8"))
+    index_path = os.path.join(cache_dir, f"{dataset_key}.json")
+    labels_path = os.path.join(cache_dir, f"{dataset_key}.labels.npy")
+    np.save(labels_path, np.asarray(labels, dtype=np.int64))
+    index = {
+        "dataset_path": os.path.abspath(dataset_path),
+        "config": config,
+        "classes": classes,
+        "num_samples": len(samples),
+        "sample_shape": [*config["image_size"], config["channels"]],
+        "dtype": config["dtype"],
+        "shard_dir": shard_dir,
+        "shards": shards,
+        "labels": os.path.basename(labels_path),
+    }
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+
+    status_callback(f"[Dataset Cache] Dataset cache ready at: {index_path}")
+    return index_path
+
+
+class ShardedDataset:
+    """
+    A map-style dataset over the shards written by build_cache.
+
+    Samples are returned as read-only views into the memory-mapped shards, so
+    indexing never copies or decodes. Shards are opened lazily in each process,
+    which makes the dataset safe to hand to multi-process data loaders.
+    """
+    def __init__(self, index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.index_path = index_path
+        self.key = os.path.splitext(os.path.basename(index_path))[0]
+        self.classes = self.index["classes"]
+        self.offsets = []
+        total = 0
+        for shard in self.index["shards"]:
+            self.offsets.append(total)
+            total += shard["count"]
+        self._shards = {}
+        self._labels = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shards"] = {}
+        state["_labels"] = None
+        return state
+
+    def __len__(self):
+        return self.index["num_samples"]
+
+    @property
+    def labels(self):
+        if self._labels is None:
+            labels_path = os.path.join(os.path.dirname(self.index_path), self.index["labels"])
+            self._labels = np.load(labels_path, mmap_mode="r")
+        return self._labels
+
+    def shard(self, shard_id):
+        """Returns the memory-mapped array of one shard."""
+        array = self._shards.get(shard_id)
+        if array is None:
+            key = self.index["shards"][shard_id]["key"]
+            array = np.load(os.path.join(self.index["shard_dir"], f"{key}.npy"), mmap_mode="r")
+            self._shards[shard_id] = array
+        return array
+
+    def release(self, shard_id):
+        """Unmaps a shard opened by `shard`; it is reopened on next use."""
+        self._shards.pop(shard_id, None)
+
+    def locate(self, idx):
+        """Maps a global sample index to (shard_id, index_within_shard)."""
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"Sample index {idx} out of range for dataset of size {len(self)}.")
+        shard_id = bisect.bisect_right(self.offsets, idx) - 1
+        return shard_id, idx - self.offsets[shard_id]
+
+    def __getitem__(self, idx):
+        shard_id, local_idx = self.locate(idx)
+        return self.shard(shard_id)[local_idx], int(self.labels[idx])
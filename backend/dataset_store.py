@@ -0,0 +1,240 @@
+# backend/dataset_store.py
+
+# This module keeps downloaded Kaggle datasets in a content-addressed store,
+# so a dataset is downloaded and extracted once and then reused by every run.
+#
+# Layout under datasets/.store:
+#   downloads/<owner>__<name>/   the archive as downloaded by the kaggle CLI.
+#                                Kept until extraction finishes, so an
+#                                interrupted download or extraction resumes.
+#   trees/<sha256>/              the extracted archive, keyed by the SHA-256
+#                                of its zip, with a .complete manifest.
+#   refs/<owner>__<name>.json    which tree a dataset id currently points to.
+#
+# A dataset whose ref points to a complete tree is served straight from the
+# store and the kaggle CLI is not invoked at all. Pass refresh=True to ask
+# Kaggle for a newer version; if the archive is unchanged, its tree is reused.
+# Archives are extracted member by member on a thread pool, streaming each
+# member to disk in chunks instead of reading the archive into memory.
+#
+# Any `kaggle` executable on PATH that accepts
+# `kaggle datasets download -d <owner>/<name> -p <dir>` and writes a zip
+# into <dir> works, which is how the store is exercised without Kaggle.
+
+import concurrent.futures
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+import zipfile
+
+STORE_DIR = os.path.join(os.getcwd(), "datasets", ".store")
+COMPLETE_MARKER = ".complete"
+CHUNK_SIZE = 1 << 20
+
+
+def parse_dataset_id(dataset_id):
+    """
+    Splits a Kaggle dataset id into (owner, name).
+
+    Raises:
+        ValueError: If the id is not in 'username/dataset-name' format.
+    """
+    parts = dataset_id.strip().split("/")
+    if len(parts) != 2 or not all(parts):
+        raise ValueError("Invalid Kaggle dataset ID. Must be in 'username/dataset-name' format.")
+    return parts[0], parts[1]
+
+
+def hash_archive(path):
+    """Returns the SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_complete_zip(path):
+    """True if `path` is a zip archive whose central directory can be read."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            archive.infolist()
+        return True
+    except (OSError, zipfile.BadZipFile):
+        return False
+
+
+def _safe_target(root, member_name):
+    target = os.path.realpath(os.path.join(root, member_name))
+    if os.path.commonpath([target, os.path.realpath(root)]) != os.path.realpath(root):
+        raise ValueError(f"Archive member escapes the extraction directory: {member_name}")
+    return target
+
+
+def _extract_member(archive_path, member, root):
+    """Streams one archive member to disk. Members already extracted in full are skipped."""
+    target = _safe_target(root, member.filename)
+    if member.is_dir():
+        os.makedirs(target, exist_ok=True)
+        return False
+    if os.path.exists(target) and os.path.getsize(target) == member.file_size:
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = f"{target}.part"
+    with zipfile.ZipFile(archive_path) as archive, archive.open(member) as source, open(tmp_path, "wb") as dest:
+        shutil.copyfileobj(source, dest, CHUNK_SIZE)
+    os.replace(tmp_path, target)
+    return True
+
+
+def extract_archive(archive_path, root, status_callback=print, workers=None):
+    """
+    Extracts `archive_path` into `root` in parallel and writes the .complete manifest.
+
+    Returns:
+        int: The number of files written (files left over from an interrupted
+        extraction are not written again).
+    """
+    os.makedirs(root, exist_ok=True)
+    with zipfile.ZipFile(archive_path) as archive:
+        members = archive.infolist()
+    workers = workers or min(8, os.cpu_count() or 1)
+    written = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_extract_member, archive_path, member, root) for member in members]
+        for done, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+            written += future.result()
+            if done % 1000 == 0:
+                status_callback(f"[Dataset Store] Extracted {done}/{len(members)} archive members...")
+
+    manifest = {member.filename: member.file_size for member in members if not member.is_dir()}
+    with open(os.path.join(root, COMPLETE_MARKER), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    return written
+
+
+def content_root(tree):
+    """Returns the single top-level directory of an extracted archive, or the tree itself."""
+    entries = [entry for entry in os.listdir(tree) if entry != COMPLETE_MARKER and not entry.startswith(".")]
+    if len(entries) == 1 and os.path.isdir(os.path.join(tree, entries[0])):
+        return os.path.join(tree, entries[0])
+    return tree
+
+
+def is_complete_tree(root):
+    """True if `root` holds a finished extraction whose files all still have their recorded sizes."""
+    marker = os.path.join(root, COMPLETE_MARKER)
+    if not os.path.isfile(marker):
+        return False
+    try:
+        with open(marker, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return all(os.path.getsize(os.path.join(root, name)) == size for name, size in manifest.items())
+    except (OSError, ValueError):
+        return False
+
+
+class DatasetStore:
+    """The content-addressed store of downloaded datasets."""
+    def __init__(self, root=None, kaggle_command="kaggle"):
+        self.root = root or STORE_DIR
+        self.kaggle_command = kaggle_command
+
+    def _ref_path(self, owner, name):
+        return os.path.join(self.root, "refs", f"{owner}__{name}.json")
+
+    def tree_path(self, sha256):
+        return os.path.join(self.root, "trees", sha256)
+
+    def lookup(self, dataset_id):
+        """Returns the path of a complete cached tree for `dataset_id`, or None."""
+        ref_path = self._ref_path(*parse_dataset_id(dataset_id))
+        try:
+            with open(ref_path, "r", encoding="utf-8") as f:
+                ref = json.load(f)
+        except (OSError, ValueError):
+            return None
+        tree = self.tree_path(ref["sha256"])
+        return tree if is_complete_tree(tree) else None
+
+    def _download(self, dataset_id, download_dir, force, status_callback):
+        command = [self.kaggle_command, "datasets", "download", "-d", dataset_id, "-p", download_dir]
+        if force:
+            command.append("--force")
+        status_callback(f"[Dataset Store] Executing Kaggle command: {' '.join(command)}")
+        try:
+            subprocess.run(command, check=True, capture_output=True, text=True)
+        except FileNotFoundError:
+            raise FileNotFoundError("Kaggle API not found. Please ensure 'kaggle' is installed and in your system's PATH.")
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Kaggle API error: {e.stderr or e.stdout}")
+
+    def _find_archive(self, download_dir, name):
+        expected = os.path.join(download_dir, f"{name}.zip")
+        if os.path.exists(expected):
+            return expected
+        archives = sorted(
+            (os.path.join(download_dir, f) for f in os.listdir(download_dir) if f.endswith(".zip")),
+            key=os.path.getmtime,
+        ) if os.path.isdir(download_dir) else []
+        return archives[-1] if archives else None
+
+    def fetch(self, dataset_id, status_callback=print, refresh=False):
+        """
+        Returns the local path of `dataset_id`, downloading and extracting it only if needed.
+
+        If the archive wraps everything in one top-level folder, that folder is returned.
+
+        Args:
+            dataset_id (str): The Kaggle id, 'username/dataset-name'.
+            status_callback (function): A function to send status updates back to the GUI.
+            refresh (bool): Ask Kaggle for a newer version even if a cached one exists.
+        """
+        owner, name = parse_dataset_id(dataset_id)
+        if not refresh:
+            cached = self.lookup(dataset_id)
+            if cached:
+                status_callback(f"[Dataset Store] Using cached {dataset_id} from {cached}")
+                return content_root(cached)
+
+        download_dir = os.path.join(self.root, "downloads", f"{owner}__{name}")
+        os.makedirs(download_dir, exist_ok=True)
+        archive = self._find_archive(download_dir, name)
+        if archive and _is_complete_zip(archive) and not refresh:
+            status_callback(f"[Dataset Store] Resuming from the already downloaded {archive}")
+        else:
+            if archive and not refresh:
+                status_callback(f"[Dataset Store] Found a partial download of {dataset_id}; resuming it.")
+            # No --force: the CLI keeps (and resumes) what is already in the download directory
+            self._download(dataset_id, download_dir, force=False, status_callback=status_callback)
+            archive = self._find_archive(download_dir, name)
+            if archive is None or not _is_complete_zip(archive):
+                status_callback("[Dataset Store] Downloaded archive is incomplete; downloading it again.")
+                if archive:
+                    os.remove(archive)
+                self._download(dataset_id, download_dir, force=True, status_callback=status_callback)
+                archive = self._find_archive(download_dir, name)
+                if archive is None or not _is_complete_zip(archive):
+                    raise RuntimeError(f"Kaggle download of {dataset_id} did not produce a valid zip archive.")
+
+        sha256 = hash_archive(archive)
+        tree = self.tree_path(sha256)
+        if is_complete_tree(tree):
+            status_callback(f"[Dataset Store] Archive unchanged ({sha256[:12]}); reusing {tree}")
+        else:
+            start = time.time()
+            status_callback(f"[Dataset Store] Extracting {os.path.basename(archive)} into {tree}...")
+            written = extract_archive(archive, tree, status_callback)
+            status_callback(f"[Dataset Store] Extracted {written} file(s) in {time.time() - start:.1f}s.")
+
+        ref_path = self._ref_path(owner, name)
+        os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+        tmp_path = ref_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dataset": dataset_id, "sha256": sha256, "fetched": time.time()}, f)
+        os.replace(tmp_path, ref_path)
+        shutil.rmtree(download_dir, ignore_errors=True)
+        return content_root(tree)
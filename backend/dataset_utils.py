@@ -3,12 +3,12 @@
 # This module handles all dataset-related tasks: downloading from sources
 # like Kaggle, locating built-in datasets, and preparing custom datasets.
 
-import subprocess
 import os
-import zipfile
 import time
 
-def load_dataset(source, dataset_info, status_callback):
+from backend import dataset_store
+
+def load_dataset(source, dataset_info, status_callback, refresh=False):
     """
     Loads or downloads a dataset based on the specified source.
 
@@ -16,6 +16,7 @@ def load_dataset(source, dataset_info, status_callback):
         source (str): The source of the dataset ("Built-in", "Kaggle", "Custom").
         dataset_info (str): The name, ID, or path of the dataset.
         status_callback (function): A function to send status updates back to the GUI.
+        refresh (bool): For Kaggle, check for a newer version even if the dataset is cached.
 
     Returns:
         str: The local path to the prepared dataset.
@@ -37,41 +38,17 @@ def load_dataset(source, dataset_info, status_callback):
 
     elif source == "Kaggle":
         status_callback(f"[Dataset Utils] Preparing to download from Kaggle: {dataset_info}")
-        
-        # Kaggle API requires the dataset ID in the format "username/dataset-name"
-        if len(dataset_info.split('/')) != 2:
-            raise ValueError("Invalid Kaggle dataset ID. Must be in 'username/dataset-name' format.")
-            
-        dataset_name = dataset_info.split('/')[1]
-        dataset_path = os.path.join(base_path, dataset_name)
-        zip_path = f"{dataset_path}.zip"
-        
-        # Command to download the dataset using the Kaggle API
-        command = [
-            "kaggle", "datasets", "download",
-            "-d", dataset_info,
-            "-p", base_path,
-            "--unzip", # Automatically unzip the file
-            "--force"  # Overwrite if it exists
-        ]
-        
-        try:
-            status_callback(f"[Dataset Utils] Executing Kaggle command: {' '.join(command)}")
-            # Using subprocess.run to execute the command
-            result = subprocess.run(command, check=True, capture_output=True, text=True)
-            status_callback("[Dataset Utils] Kaggle download and extraction successful.")
-            status_callback(f"[Dataset Utils] Dataset available at: {dataset_path}")
-            return dataset_path
-        except FileNotFoundError:
-            raise FileNotFoundError("Kaggle API not found. Please ensure 'kaggle' is installed and in your system's PATH.")
-        except subprocess.CalledProcessError as e:
-            # This catches errors from the Kaggle command itself (e.g., dataset not found, auth issues)
-            error_message = e.stderr or e.stdout
-            raise RuntimeError(f"Kaggle API error: {error_message}")
+        # Downloads live in a content-addressed store; a dataset that is
+        # already there is used without invoking the Kaggle CLI at all.
+        dataset_path = dataset_store.DatasetStore().fetch(dataset_info, status_callback, refresh=refresh)
+        status_callback(f"[Dataset Utils] Dataset available at: {dataset_path}")
+        return dataset_path
 
     elif source == "Custom":
         if not os.path.isdir(dataset_info):
             raise FileNotFoundError(f"Custom dataset path does not exist or is not a directory: {dataset_info}")
+        # The folder is indexed once, by the cache builder of the model's
+        # modality (see backend/manifest.py), which also reports its classes
         status_callback(f"[Dataset Utils] Using custom dataset at: {dataset_info}")
         return dataset_info
 
@@ -0,0 +1,169 @@
+# backend/distributed.py
+
+# This module runs the training loop data-parallel over several CPU
+# processes. Each rank trains a replica of the model on its own shard of the
+# training set (a DistributedSampler over the same split), gradients are
+# averaged with an all-reduce over the gloo backend by DistributedDataParallel,
+# and every rank steps its optimizer on the same averaged gradients, so the
+# replicas stay identical.
+#
+# The model is never pickled: each rank rebuilds its architecture with the
+# builder function it is given and loads the caller's state_dict with
+# weights_only=True.
+#
+# Rank 0 is the only one that writes checkpoints and reports status; its
+# messages and telemetry events are forwarded to the caller's status_callback.
+# When training finishes, rank 0 hands the trained weights back to the parent
+# process, which runs the post-training stages (pruning, quantization,
+# export) as usual.
+#
+# The effective batch size is batch_size * world_size, times the gradient
+# accumulation steps. The CPU threads are split evenly between ranks.
+
+import os
+import queue
+import shutil
+import socket
+import tempfile
+import threading
+
+
+def free_port():
+    """Returns a free TCP port on localhost for the process group rendezvous."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def loader_spec(loader, world_size):
+    """Describes a map-style DataLoader (without its tensors) so each rank can rebuild it."""
+    return {
+        "dataset": loader.dataset,
+        "batch_size": loader.batch_size or loader.batch_sampler.batch_size,
+        "collate_fn": loader.collate_fn,
+        "num_workers": loader.num_workers // world_size,
+        "prefetch_factor": loader.prefetch_factor,
+        "lengths": getattr(loader.batch_sampler, "lengths", None),
+    }
+
+
+def shard_loader(spec, rank, world_size, seed=0):
+    """
+    Builds the DataLoader that yields this rank's shard of the training set.
+
+    DistributedSampler pads the shards to equal length, so every rank runs the
+    same number of steps per epoch.
+
+    Length-bucketed text loaders are sharded once instead (every rank keeps
+    the same samples, padded to equal length the same way), and each rank
+    buckets its own shard.
+    """
+    from torch.utils.data import DataLoader
+    from torch.utils.data.distributed import DistributedSampler
+
+    num_workers = spec["num_workers"]
+    kwargs = {"persistent_workers": True, "prefetch_factor": spec["prefetch_factor"]} if num_workers else {}
+    if spec.get("lengths") is not None:
+        import numpy as np
+        from torch.utils.data import Subset
+
+        from backend import data_pipeline
+
+        size = len(spec["dataset"])
+        shard = (np.arange(-(-size // world_size) * world_size) % size)[rank::world_size]
+        batch_sampler = data_pipeline.BucketBatchSampler(spec["lengths"][shard], spec["batch_size"], seed=seed + rank)
+        return DataLoader(Subset(spec["dataset"], shard.tolist()), batch_sampler=batch_sampler,
+                          num_workers=num_workers, collate_fn=spec["collate_fn"], **kwargs)
+    sampler = DistributedSampler(spec["dataset"], num_replicas=world_size, rank=rank, shuffle=True, seed=seed)
+    return DataLoader(spec["dataset"], batch_size=spec["batch_size"], sampler=sampler, num_workers=num_workers,
+                      collate_fn=spec["collate_fn"], **kwargs)
+
+
+def _rank_main(rank, world_size, port, threads, workdir, builder, spec, train_kwargs, events, step_every):
+    """Entry point of one training process."""
+    import torch
+    import torch.distributed as dist
+
+    from backend import optizer, telemetry
+
+    torch.set_num_threads(threads)
+    build, build_kwargs = builder
+    model = build(**build_kwargs)
+    model.load_state_dict(torch.load(os.path.join(workdir, "initial.pt"), map_location="cpu", weights_only=True))
+    dist.init_process_group("gloo", init_method=f"tcp://127.0.0.1:{port}", rank=rank, world_size=world_size)
+    try:
+        if rank == 0:
+            status_callback = telemetry.Telemetry(events.put, structured=True, step_every=step_every)
+        else:
+            status_callback = telemetry.Telemetry(lambda message: None, step_every=0)
+            train_kwargs["profile"] = False
+        loader = shard_loader(spec, rank, world_size)
+        optizer.fit(model, loader, status_callback=status_callback, rank=rank, **train_kwargs)
+        if rank == 0:
+            torch.save(model.state_dict(), os.path.join(workdir, "trained.pt"))
+    finally:
+        dist.destroy_process_group()
+
+
+def train_data_parallel(model, builder, train_loader, world_size, status_callback=print, **train_kwargs):
+    """
+    Trains `model` in place with `world_size` data-parallel processes.
+
+    Args:
+        model (nn.Module): The model to train; it receives the trained weights.
+        builder (tuple): (function, kwargs) that rebuild the model's
+            architecture in each rank, e.g. from model_loader.model_builder.
+            The function must be importable (defined at module level).
+        train_loader (DataLoader): A map-style training loader; each rank
+            iterates its own shard of `train_loader.dataset`.
+        world_size (int): Number of training processes.
+        status_callback (function): Receives rank 0's status messages and telemetry events.
+        **train_kwargs: Training options passed to optizer.fit on every rank
+            (epochs, lr, optimizer_type, fine_tune, checkpoint options, ...).
+    """
+    import torch
+    import torch.multiprocessing as mp
+
+    from backend import telemetry
+
+    status_callback = telemetry.get(status_callback)
+    threads = max(1, torch.get_num_threads() // world_size)
+    spec = loader_spec(train_loader, world_size)
+    status_callback(f"[Distributed] Training with {world_size} processes (gloo), {threads} thread(s) each, "
+                    f"effective batch size {spec['batch_size'] * world_size * train_kwargs.get('accumulation_steps', 1)}.")
+
+    ctx = mp.get_context("spawn")
+    events = ctx.Queue()
+    # The weights go to the ranks, and the trained weights come back, through
+    # files rather than shared memory
+    workdir = tempfile.mkdtemp(prefix="data_parallel_")
+    torch.save(model.state_dict(), os.path.join(workdir, "initial.pt"))
+
+    # Forward rank 0's reports while the ranks train
+    stop = threading.Event()
+
+    def forward():
+        while not (stop.is_set() and events.empty()):
+            try:
+                message = events.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if isinstance(message, dict):
+                status_callback.emit(**{"kind" if key == "type" else key: value for key, value in message.items()})
+            else:
+                status_callback(message)
+
+    forwarder = threading.Thread(target=forward, daemon=True)
+    forwarder.start()
+    try:
+        mp.start_processes(
+            _rank_main, nprocs=world_size, start_method="spawn",
+            args=(world_size, free_port(), threads, workdir, builder, spec, train_kwargs, events,
+                  status_callback.step_every),
+        )
+        model.load_state_dict(torch.load(os.path.join(workdir, "trained.pt"), weights_only=True))
+    finally:
+        stop.set()
+        forwarder.join()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return model
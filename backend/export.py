@@ -0,0 +1,184 @@
+# backend/export.py
+
+# This module exports the final model (after training, pruning and
+# quantization) to servable formats: TorchScript and ONNX. Each artifact is
+# checked for numerical parity with the eager model on a real input batch,
+# then eager and exported models are benchmarked across batch sizes and
+# thread counts, so deployment settings can be picked from measured
+# p50/p95/p99 latency and throughput.
+#
+# ONNX export needs the `onnx` package, and checking/benchmarking the ONNX
+# file needs `onnxruntime`. A format that cannot be exported is recorded as
+# an error in the report and the rest of the stage still runs.
+
+import os
+
+import torch
+import torch.nn as nn
+
+from backend import inference_bench
+
+DEFAULT_EXPORT_CONFIG = {
+    "formats": ["torchscript", "onnx"],
+    "batch_sizes": [1, 8, 32],
+    "threads": None,          # thread counts to benchmark; None = [1, all cores]
+    "iterations": 30,
+    "rtol": 1e-3,             # parity tolerance against the eager model
+    "atol": 1e-4,
+}
+
+
+class OnnxRunner(nn.Module):
+    """Runs an ONNX file with onnxruntime behind the nn.Module call interface."""
+    def __init__(self, path, num_threads=None):
+        super().__init__()
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def forward(self, x):
+        return torch.from_numpy(self.session.run(None, {self.input_name: x.numpy()})[0])
+
+
+def make_batch(example, batch_size):
+    """Returns a batch of `batch_size` rows built by repeating the rows of `example`."""
+    index = torch.arange(batch_size) % example.shape[0]
+    return example[index].contiguous()
+
+
+def export_torchscript(model, example, path):
+    with torch.no_grad():
+        scripted = torch.jit.trace(model, example, check_trace=False)
+    scripted.save(path)
+    return torch.jit.load(path)
+
+
+def export_onnx(model, example, path):
+    torch.onnx.export(
+        model, (example,), path,
+        input_names=["input"], output_names=["output"],
+        dynamic_axes={"input": {0: "batch"}, "output": {0: "batch"}},
+        dynamo=False,
+    )
+    return path
+
+
+def check_parity(reference, exported, example, rtol, atol):
+    """Compares the outputs of the eager and exported models on `example`."""
+    with torch.no_grad():
+        expected = reference(example)
+        actual = exported(example)
+    max_abs_diff = (expected.float() - actual.float()).abs().max().item()
+    return {
+        "max_abs_diff": max_abs_diff,
+        "passed": bool(torch.allclose(actual.float(), expected.float(), rtol=rtol, atol=atol)),
+    }
+
+
+def benchmark(runners, example, batch_sizes, threads, iterations):
+    """
+    Measures every runner at every batch size and thread count.
+
+    Args:
+        runners (dict): Format name -> function(num_threads) returning a callable model.
+        example (Tensor): An input batch whose rows are repeated to the batch sizes.
+        batch_sizes (list): Batch sizes to measure.
+        threads (list): Thread counts to measure.
+        iterations (int): Timed forward passes per setting.
+
+    Returns:
+        list: One row of latency statistics per (format, threads, batch size).
+    """
+    rows = []
+    for name, make_runner in runners.items():
+        for num_threads in threads:
+            runner = make_runner(num_threads)
+            for batch_size in batch_sizes:
+                stats = inference_bench.measure_latency(runner, make_batch(example, batch_size),
+                                                        iterations=iterations, num_threads=num_threads)
+                rows.append({"format": name, **stats})
+    return rows
+
+
+def best_settings(rows):
+    """Returns, per format, the lowest-p95 single-sample setting and the highest-throughput setting."""
+    best = {}
+    for name in dict.fromkeys(row["format"] for row in rows):
+        own = [row for row in rows if row["format"] == name]
+        single = [row for row in own if row["batch_size"] == 1] or own
+        best[name] = {
+            "lowest_latency": min(single, key=lambda row: row["p95_ms"]),
+            "highest_throughput": max(own, key=lambda row: row["throughput"]),
+        }
+    return best
+
+
+def export_model(model, loader, save_path, status_callback=print, config=None):
+    """
+    Runs the export stage and returns its report.
+
+    Artifacts are written next to `save_path`: `<name>.torchscript.pt` and
+    `<name>.onnx`.
+
+    Args:
+        model (nn.Module): The final model.
+        loader (DataLoader): Training data; its first batch is the example input.
+        save_path (str): Path the state_dict is saved to.
+        status_callback (function): A function to send status updates back to the GUI.
+        config (dict): Options overriding DEFAULT_EXPORT_CONFIG.
+    """
+    config = {**DEFAULT_EXPORT_CONFIG, **(config or {})}
+    threads = config["threads"] or sorted({1, os.cpu_count() or 1})
+    base = os.path.splitext(save_path)[0]
+    example, _ = next(iter(loader))
+    model.eval()
+    report = {"config": {**config, "threads": threads}, "input_shape": list(example.shape[1:]), "artifacts": {}}
+    runners = {"eager": lambda num_threads: model}
+
+    if "torchscript" in config["formats"]:
+        path = base + ".torchscript.pt"
+        try:
+            scripted = export_torchscript(model, example, path)
+            parity = check_parity(model, scripted, example, config["rtol"], config["atol"])
+            report["artifacts"]["torchscript"] = {"path": path, "parity": parity}
+            status_callback(f"[Export] TorchScript saved to {path} (max abs diff {parity['max_abs_diff']:.2e}, "
+                            f"parity {'passed' if parity['passed'] else 'FAILED'})")
+            runners["torchscript"] = lambda num_threads: scripted
+        except Exception as e:
+            report["artifacts"]["torchscript"] = {"error": str(e)}
+            status_callback(f"[Export] TorchScript export failed: {e}")
+
+    if "onnx" in config["formats"]:
+        path = base + ".onnx"
+        try:
+            export_onnx(model, example, path)
+            entry = {"path": path}
+            try:
+                runner = OnnxRunner(path)
+            except ImportError:
+                status_callback(f"[Export] ONNX saved to {path}; install onnxruntime to check parity and benchmark it.")
+            else:
+                entry["parity"] = check_parity(model, runner, example, config["rtol"], config["atol"])
+                status_callback(f"[Export] ONNX saved to {path} (max abs diff {entry['parity']['max_abs_diff']:.2e}, "
+                                f"parity {'passed' if entry['parity']['passed'] else 'FAILED'})")
+                runners["onnx"] = lambda num_threads: OnnxRunner(path, num_threads)
+            report["artifacts"]["onnx"] = entry
+        except Exception as e:
+            report["artifacts"]["onnx"] = {"error": str(e)}
+            status_callback(f"[Export] ONNX export failed: {e}")
+
+    status_callback(f"[Export] Benchmarking {', '.join(runners)} at batch sizes {config['batch_sizes']}, threads {threads}...")
+    report["benchmarks"] = benchmark(runners, example, config["batch_sizes"], threads, config["iterations"])
+    report["best"] = best_settings(report["benchmarks"])
+    for name, best in report["best"].items():
+        fast, wide = best["lowest_latency"], best["highest_throughput"]
+        status_callback(
+            f"[Export] {name}: p95 {fast['p95_ms']:.2f} ms at batch {fast['batch_size']}/{fast['threads']} thread(s); "
+            f"best throughput {wide['throughput']:.0f} samples/s at batch {wide['batch_size']}/{wide['threads']} thread(s)"
+        )
+    return report
@@ -0,0 +1,192 @@
+# backend/feature_cache.py
+
+# This module speeds up fine-tuning by running the frozen backbone of a model
+# only once. The inputs to the trainable head are captured for the whole
+# training set and written to a memory-mapped feature file, keyed by the model
+# id, a hash of the frozen backbone weights and the dataset hash. Every epoch
+# after that trains the head alone on the cached features, skipping the
+# backbone's forward pass entirely.
+#
+# Each writer builds the files under temporary names of its own and renames
+# them into place, so parallel jobs caching the same features (e.g. sweep
+# trials) never write to the same file.
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+
+from backend import optizer
+
+CACHE_DIR = os.path.join(os.getcwd(), "datasets", ".cache", "features")
+
+
+def cache_key(model_id, dataset_hash, extra=""):
+    """Builds the cache key for one model/dataset pair."""
+    return hashlib.sha1(f"{model_id}\0{dataset_hash}\0{extra}".encode("utf-8")).hexdigest()
+
+
+def backbone_digest(model):
+    """Hashes the frozen parameters and the buffers of a model."""
+    digest = hashlib.sha1()
+    frozen = [(name, p) for name, p in model.named_parameters() if not p.requires_grad]
+    for name, tensor in frozen + list(model.named_buffers()):
+        digest.update(name.encode("utf-8"))
+        digest.update(tensor.detach().cpu().contiguous().reshape(-1).view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _temp_path(path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.close(fd)
+    return tmp_path
+
+
+def find_head(model):
+    """
+    Returns the smallest submodule that owns every trainable parameter, or
+    None if the model has no trainable parameters.
+    """
+    trainable = {id(p) for p in model.parameters() if p.requires_grad}
+    if not trainable:
+        return None
+    head = model
+    for module in model.modules():
+        owned = {id(p) for p in module.parameters()}
+        if trainable <= owned and len(owned) < len({id(p) for p in head.parameters()}):
+            head = module
+    return head
+
+
+class FeatureDataset:
+    """A map-style dataset over cached (features, labels) memmaps, fetched a batch at a time."""
+    def __init__(self, features_path, labels_path):
+        self.features = np.load(features_path, mmap_mode="r")
+        self.labels = np.load(labels_path, mmap_mode="r")
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, idx):
+        return torch.from_numpy(np.array(self.features[idx])), int(self.labels[idx])
+
+    def __getitems__(self, indices):
+        indices = np.sort(np.asarray(indices))
+        return torch.from_numpy(self.features[indices]), torch.from_numpy(self.labels[indices])
+
+
+def _collate_cached(batch):
+    return batch
+
+
+def _write_features(model, head, loader, features_path, labels_path, status_callback):
+    """Runs the model once over `loader`, saving the head's inputs and the labels."""
+    captured = {}
+
+    def capture(module, inputs):
+        captured["features"] = inputs[0].detach()
+
+    handle = head.register_forward_pre_hook(capture)
+    was_training = model.training
+    model.eval()
+    features = None
+    labels = np.empty(len(loader.dataset), dtype=np.int64)
+    offset = 0
+    features_tmp = _temp_path(features_path)
+    labels_tmp = _temp_path(labels_path)
+    try:
+        with torch.no_grad():
+            for images, batch_labels in loader:
+                outputs = optizer.forward(model, images)
+                batch = captured["features"]
+                if features is None:
+                    # The head must produce the model's output from the captured
+                    # features alone, otherwise caching would change the result.
+                    head_outputs = head(batch)
+                    if head_outputs.shape != outputs.shape or not torch.allclose(head_outputs, outputs, atol=1e-5):
+                        raise ValueError("Model output is not a direct function of the head's input.")
+                    shape = (len(loader.dataset), *batch.shape[1:])
+                    features = np.lib.format.open_memmap(features_tmp, mode="w+", dtype=np.float32, shape=shape)
+                features[offset:offset + len(batch)] = batch.cpu().numpy()
+                labels[offset:offset + len(batch)] = batch_labels.cpu().numpy()
+                offset += len(batch)
+        if features is None:
+            raise ValueError("Cannot cache features for an empty dataset.")
+        features.flush()
+        del features
+        with open(labels_tmp, "wb") as f:
+            np.save(f, labels)
+        # The features file goes last: its presence marks a complete cache
+        os.replace(labels_tmp, labels_path)
+        os.replace(features_tmp, features_path)
+    finally:
+        handle.remove()
+        model.train(was_training)
+        for tmp_path in (features_tmp, labels_tmp):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    status_callback(f"[Feature Cache] Cached {offset} feature vectors to {features_path}")
+
+
+def build_head_loader(model, train_loader, key, status_callback, cache_dir=None):
+    """
+    Caches backbone features for the training set and returns a loader over them.
+
+    Args:
+        model (nn.Module): The model, with its backbone already frozen.
+        train_loader (DataLoader): The training loader the features are computed from.
+        key (str): The cache key, see `cache_key`. A hash of the frozen
+            backbone weights is added to it.
+        status_callback (function): A function to send status updates back to the GUI.
+        cache_dir (str): Where feature files are stored. Defaults to CACHE_DIR.
+
+    Returns:
+        tuple: (head, feature_loader), or (None, None) if the model cannot be
+               split into a frozen backbone and a trainable head.
+    """
+    head = find_head(model)
+    if head is None or head is model:
+        status_callback("[Feature Cache] Model has no separable head; training the full model.")
+        return None, None
+
+    batch_size = train_loader.batch_size or train_loader.batch_sampler.batch_size
+    cache_dir = os.path.join(cache_dir or CACHE_DIR, cache_key(key, backbone_digest(model)))
+    os.makedirs(cache_dir, exist_ok=True)
+    features_path = os.path.join(cache_dir, "features.npy")
+    labels_path = os.path.join(cache_dir, "labels.npy")
+
+    if os.path.exists(features_path) and os.path.exists(labels_path):
+        status_callback(f"[Feature Cache] Reusing cached backbone features from {cache_dir}")
+    else:
+        status_callback("[Feature Cache] Running frozen backbone once over the training set...")
+        # An ordered pass over the same samples the training loader draws
+        # from; length-bucketed text is passed sorted by length, with the
+        # least padding. Features and labels are stored in the same order.
+        if hasattr(train_loader.batch_sampler, "lengths"):
+            from backend import data_pipeline
+            lengths = train_loader.batch_sampler.lengths
+            loader_kwargs = {"batch_sampler": data_pipeline.BucketBatchSampler(lengths, batch_size, shuffle=False)}
+        else:
+            loader_kwargs = {"batch_size": batch_size, "shuffle": False}
+        ordered_loader = DataLoader(
+            train_loader.dataset,
+            num_workers=train_loader.num_workers,
+            collate_fn=train_loader.collate_fn,
+            **loader_kwargs,
+        )
+        try:
+            _write_features(model, head, ordered_loader, features_path, labels_path, status_callback)
+        except ValueError as e:
+            status_callback(f"[Feature Cache] {e} Training the full model.")
+            return None, None
+
+    feature_loader = DataLoader(
+        FeatureDataset(features_path, labels_path),
+        batch_size=batch_size,
+        shuffle=True,
+        collate_fn=_collate_cached,
+    )
+    return head, feature_loader
@@ -0,0 +1,100 @@
+# backend/inference_bench.py
+
+# This module measures what a model costs to ship and to run on CPU:
+# parameter count, serialized size, and inference latency/throughput.
+# The optimization stages (pruning, quantization) use it to report their
+# before/after numbers.
+
+import io
+import math
+import statistics
+import time
+
+import torch
+
+from backend import optizer
+
+
+def count_parameters(model):
+    """Returns the number of parameter elements, including packed quantized weights."""
+    total = sum(p.numel() for p in model.parameters())
+    for module in model.modules():
+        weight = getattr(module, "weight", None)
+        if callable(weight) and not isinstance(weight, torch.nn.Parameter):
+            # Quantized modules expose their packed weight through a method
+            try:
+                total += weight().numel()
+            except Exception:
+                pass
+    return total
+
+
+def serialized_size(model):
+    """Returns the size in bytes of the model's saved state_dict."""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def percentile(sorted_values, pct):
+    """Returns the pct-th percentile of an already sorted list (nearest rank)."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def measure_latency(model, example, iterations=50, warmup=5, num_threads=None):
+    """
+    Times repeated forward passes of `model` on `example`.
+
+    Args:
+        model (nn.Module): The model to time. It is run in eval mode under no_grad.
+        example (Tensor or dict): One input batch, as yielded by the data loader.
+        iterations (int): Number of timed forward passes.
+        warmup (int): Untimed passes run first.
+        num_threads (int): torch intra-op threads to use while timing.
+
+    Returns:
+        dict: Latency statistics in milliseconds per batch and throughput in samples/sec.
+    """
+    previous_threads = torch.get_num_threads()
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    was_training = model.training
+    model.eval()
+    timings = []
+    try:
+        with torch.no_grad():
+            for _ in range(warmup):
+                optizer.forward(model, example)
+            for _ in range(iterations):
+                start = time.perf_counter()
+                optizer.forward(model, example)
+                timings.append((time.perf_counter() - start) * 1000.0)
+    finally:
+        model.train(was_training)
+        torch.set_num_threads(previous_threads)
+
+    timings.sort()
+    first = next(iter(example.values())) if isinstance(example, dict) else example
+    batch_size = first.shape[0] if hasattr(first, "shape") and first.dim() > 0 else 1
+    mean_ms = statistics.fmean(timings)
+    return {
+        "batch_size": batch_size,
+        "threads": num_threads or previous_threads,
+        "mean_ms": mean_ms,
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+        "p99_ms": percentile(timings, 99),
+        "throughput": batch_size * 1000.0 / mean_ms if mean_ms else float("nan"),
+    }
+
+
+def model_report(model, example, iterations=50):
+    """Returns parameter count, file size and latency for one model."""
+    return {
+        "parameters": count_parameters(model),
+        "size_bytes": serialized_size(model),
+        "latency": measure_latency(model, example, iterations=iterations),
+    }
@@ -0,0 +1,265 @@
+# backend/manifest.py
+
+# This module keeps a persistent index (manifest) of a class-per-folder dataset:
+# one entry per file with its path, size, modification time, class label and
+# content hash. Manifests are SQLite files under datasets/.manifests, one per
+# dataset folder.
+#
+# Building a manifest walks the folder with a thread pool, one directory per
+# task, so the stat calls of large folders overlap. Files are hashed lazily:
+# a new file is recorded by its size and mtime alone, and a file is hashed
+# only once its size or mtime changes, so a file that was merely touched
+# keeps its fingerprint. An update only rewrites the rows of new and changed
+# files. With quick=True, directories whose mtime is unchanged are not even
+# listed: their stored entries are reused. That skips per-file stat calls, but
+# it misses files rewritten in place (which do not change the directory), so
+# it is only suited to listing a dataset. The dataset caches decide what to
+# rebuild from the manifest and always use the full pass.
+#
+# The manifest also provides stratified train/val splits and class-balanced
+# sampling over its labels.
+
+import concurrent.futures
+import hashlib
+import os
+import sqlite3
+import time
+
+MANIFEST_DIR = os.path.join(os.getcwd(), "datasets", ".manifests")
+CHUNK_SIZE = 1 << 20
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff", ".webp")
+
+
+def hash_file(path, chunk_size=CHUNK_SIZE):
+    """Returns the SHA-1 hex digest of a file's contents."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_path(root, manifest_dir=None, extensions=IMAGE_EXTENSIONS):
+    """Returns where the manifest of the dataset folder `root` (for files with `extensions`) is stored."""
+    key = os.path.abspath(root)
+    if tuple(extensions) != IMAGE_EXTENSIONS:
+        key += "\0" + ",".join(extensions)
+    key = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(manifest_dir or MANIFEST_DIR, f"{key}.sqlite")
+
+
+def _scan_dir(root, rel_dir, extensions, known_mtime=None):
+    """
+    Lists one directory: returns (mtime_ns, files as (rel_path, size, mtime_ns), subdirectories).
+    If the directory's mtime equals `known_mtime`, it is not listed and files is None.
+    """
+    path = os.path.join(root, rel_dir)
+    mtime_ns = os.stat(path).st_mtime_ns
+    if mtime_ns == known_mtime:
+        return mtime_ns, None, None
+    files, subdirs = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            rel_path = os.path.join(rel_dir, entry.name)
+            if entry.is_dir():
+                subdirs.append(rel_path)
+            elif entry.name.lower().endswith(extensions):
+                stat = entry.stat()
+                files.append((rel_path, stat.st_size, stat.st_mtime_ns))
+    return mtime_ns, files, subdirs
+
+
+class Manifest:
+    """
+    The entries of a dataset folder, sorted by path.
+
+    Attributes:
+        root (str): The dataset folder.
+        classes (list): Sorted class (top-level folder) names.
+        paths (list): Paths relative to `root`.
+        labels (list): Class index of every entry.
+        sizes, mtimes (list): File sizes and modification times (ns).
+        hashes (list): SHA-1 of every file changed since it was first
+            indexed, or None where not hashed.
+        stats (dict): What the last update did: added, changed, removed, unchanged, seconds.
+    """
+    def __init__(self, root, rows, stats=None):
+        self.root = root
+        rows = sorted(rows)
+        self.classes = sorted({path.split(os.sep, 1)[0] for path, *_ in rows})
+        class_index = {name: i for i, name in enumerate(self.classes)}
+        self.paths = [row[0] for row in rows]
+        self.sizes = [row[1] for row in rows]
+        self.mtimes = [row[2] for row in rows]
+        self.hashes = [row[3] for row in rows]
+        self.labels = [class_index[path.split(os.sep, 1)[0]] for path in self.paths]
+        self.stats = stats or {}
+
+    def __len__(self):
+        return len(self.paths)
+
+    def samples(self):
+        """Returns (relative_path, label) pairs, like a class-per-folder scan."""
+        return list(zip(self.paths, self.labels))
+
+    def fingerprint(self, i):
+        """A string that changes whenever entry `i`'s contents change: its hash, or else size and mtime."""
+        return self.hashes[i] or f"{self.sizes[i]}-{self.mtimes[i]}"
+
+    def class_counts(self):
+        counts = [0] * len(self.classes)
+        for label in self.labels:
+            counts[label] += 1
+        return counts
+
+    def split(self, val_fraction, seed=0):
+        """Returns a stratified (train_indices, val_indices) split."""
+        return stratified_split(self.labels, val_fraction, seed)
+
+    def balanced_sample(self, num_samples, seed=0):
+        """Returns `num_samples` entry indices drawn with every class equally likely."""
+        return balanced_sample(self.labels, num_samples, seed)
+
+
+def update(root, status_callback=print, hash_files=True, quick=False, manifest_dir=None, extensions=IMAGE_EXTENSIONS, workers=None):
+    """
+    Brings the manifest of `root` up to date and returns it.
+
+    Only the top-level folders are classes; files directly in `root` and
+    hidden files and folders are ignored.
+
+    Args:
+        root (str): The dataset folder.
+        status_callback (function): A function to send status updates back to the GUI.
+        hash_files (bool): Hash files whose size or mtime changed since
+            they were indexed.
+        quick (bool): Reuse the stored entries of directories whose mtime is
+            unchanged. Misses files rewritten in place; do not use it to decide
+            whether cached data is still valid.
+        manifest_dir (str): Where manifests are stored. Defaults to MANIFEST_DIR.
+        extensions (tuple): File extensions to index (lower case).
+        workers (int): Threads for scanning and hashing.
+    """
+    start = time.time()
+    db_path = manifest_path(root, manifest_dir, extensions)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS entries (path TEXT PRIMARY KEY, dir TEXT, size INTEGER, mtime_ns INTEGER, hash TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime_ns INTEGER)")
+        stored = {path: (size, mtime, digest) for path, size, mtime, digest in
+                  conn.execute("SELECT path, size, mtime_ns, hash FROM entries")}
+        stored_dirs = {path: mtime for path, mtime in conn.execute("SELECT path, mtime_ns FROM dirs")}
+        children = {}
+        stored_files = {}
+        if quick:
+            for path, parent in conn.execute("SELECT path, parent FROM dirs"):
+                children.setdefault(parent, []).append(path)
+            for path, directory in conn.execute("SELECT path, dir FROM entries"):
+                stored_files.setdefault(directory, []).append(path)
+
+        # Walk the tree: each directory is one task, its subdirectories new tasks
+        workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        scanned = {}  # path -> (dir, size, mtime_ns)
+        dirs = {}     # path -> (parent, mtime_ns)
+        with os.scandir(root) as entries:
+            top_level = [entry.name for entry in entries if entry.is_dir() and not entry.name.startswith(".")]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            known = stored_dirs.get if quick else lambda rel_dir: None
+            pending = {pool.submit(_scan_dir, root, name, extensions, known(name)): (name, "") for name in top_level}
+            while pending:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    rel_dir, parent = pending.pop(future)
+                    mtime_ns, files, subdirs = future.result()
+                    if files is None:
+                        # Unchanged listing: reuse the stored files, but still visit subdirectories
+                        files = [(path, *stored[path][:2]) for path in stored_files.get(rel_dir, ())]
+                        subdirs = children.get(rel_dir, [])
+                    dirs[rel_dir] = (parent, mtime_ns)
+                    for path, size, mtime in files:
+                        scanned[path] = (rel_dir, size, mtime)
+                    for subdir in subdirs:
+                        pending[pool.submit(_scan_dir, root, subdir, extensions, known(subdir))] = (subdir, rel_dir)
+
+            removed = [path for path in stored if path not in scanned]
+            changed = [path for path, (_, size, mtime) in scanned.items()
+                       if path not in stored or stored[path][:2] != (size, mtime)]
+            added = sum(1 for path in changed if path not in stored)
+
+            # Hash only files that changed since they were indexed
+            hashes = {}
+            to_hash = [path for path in changed if path in stored] if hash_files else []
+            for path, digest in zip(to_hash, pool.map(hash_file, (os.path.join(root, p) for p in to_hash))):
+                hashes[path] = digest
+
+        with conn:
+            conn.executemany("DELETE FROM entries WHERE path = ?", ((path,) for path in removed))
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                ((path, scanned[path][0], scanned[path][1], scanned[path][2], hashes.get(path)) for path in changed),
+            )
+            conn.execute("DELETE FROM dirs")
+            conn.executemany("INSERT INTO dirs VALUES (?, ?, ?)", ((path, parent, mtime) for path, (parent, mtime) in dirs.items()))
+
+        changed = set(changed)
+        rows = [(path, size, mtime, hashes.get(path) if path in changed else stored[path][2])
+                for path, (_, size, mtime) in scanned.items()]
+    finally:
+        conn.close()
+
+    stats = {"added": added, "changed": len(changed) - added, "removed": len(removed),
+             "unchanged": len(scanned) - len(changed), "seconds": time.time() - start}
+    manifest = Manifest(root, rows, stats)
+    status_callback(f"[Manifest] {len(manifest)} files in {len(manifest.classes)} classes "
+                    f"({stats['added']} new, {stats['changed']} changed, {stats['removed']} removed) "
+                    f"indexed in {stats['seconds']:.2f}s.")
+    return manifest
+
+
+def stratified_split(labels, val_fraction, seed=0):
+    """
+    Splits sample indices into (train, val) with the same class proportions in both.
+
+    Returns:
+        tuple: Two sorted lists of indices.
+    """
+    import numpy as np
+
+    labels = np.asarray(labels)
+    rng = np.random.default_rng(seed)
+    train, val = [], []
+    for label in np.unique(labels):
+        indices = np.flatnonzero(labels == label)
+        rng.shuffle(indices)
+        val_count = int(round(len(indices) * val_fraction))
+        val.append(indices[:val_count])
+        train.append(indices[val_count:])
+    if not train:
+        return [], []
+    return np.sort(np.concatenate(train)).tolist(), np.sort(np.concatenate(val)).tolist()
+
+
+def balanced_weights(labels):
+    """Returns a sampling weight per sample that makes every class equally likely."""
+    import numpy as np
+
+    labels = np.asarray(labels)
+    counts = np.bincount(labels)
+    return 1.0 / counts[labels]
+
+
+def balanced_sample(labels, num_samples, seed=0):
+    """Draws `num_samples` indices (with replacement) with every class equally likely."""
+    import numpy as np
+
+    labels = np.asarray(labels)
+    rng = np.random.default_rng(seed)
+    by_class = [np.flatnonzero(labels == label) for label in np.unique(labels)]
+    counts = np.bincount(rng.integers(0, len(by_class), size=num_samples), minlength=len(by_class))
+    sample = np.concatenate([rng.choice(indices, size=count) for indices, count in zip(by_class, counts)])
+    rng.shuffle(sample)
+    return sample
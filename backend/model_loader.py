@@ -1,8 +1,24 @@
 # backend/model_loader.py
 
 # This module is responsible for loading the correct pre-trained models.
-# In a real application, this is where you would import libraries like
-# transformers, timm, or torch to load models from hubs.
+# Loaded models are kept in a two-tier cache:
+#   1. An in-process LRU cache bounded by a memory budget, so repeat runs in
+#      the same session skip loading entirely.
+#   2. An on-disk weight cache under `models/.cache`, keyed by the model id,
+#      revision and the class the model is loaded as, so later sessions skip
+#      the hub download and resolution.
+# The disk cache never pickles a model: Hugging Face models are stored with
+# `save_pretrained`, and other models as their state_dict plus the arguments
+# that rebuild their architecture, which is loaded with weights_only=True.
+# Heavy libraries (torch, transformers) are only imported when a model is
+# actually requested, so importing this module stays cheap.
+
+import collections
+import copy
+import os
+import shutil
+import tempfile
+import threading
 
 # This map helps translate the user-friendly name to a specific model ID
 # that a library like Hugging Face Transformers would use.
@@ -12,47 +28,219 @@ MODEL_MAP = {
     "Whisper": "openai/whisper-base" # Standard Whisper model for speech-to-text
 }
 
-def load_model(user_choice, status_callback):
+# The kind of input each model takes, which decides how its dataset is prepared.
+MODALITIES = {
+    "YOLO": "image",
+    "BERT": "text",
+    "Whisper": "audio",
+}
+
+# The class each model is loaded as. It is part of the cache id, so a model
+# cached as one architecture is never reused once the loader builds another.
+MODEL_CLASSES = {
+    "YOLO": "AutoShape",
+    "BERT": "BertForSequenceClassification",
+    "Whisper": "WhisperForAudioClassification",
+}
+
+DEFAULT_REVISION = "main"
+WEIGHTS_CACHE_DIR = os.path.join(os.getcwd(), "models", ".cache")
+STATE_FILE = "state.pt"
+MEMORY_BUDGET_MB = 4096
+
+
+def _load_yolo(model_name, revision, pretrained=True):
+    import torch
+    repo, variant = "ultralytics/yolov5", model_name.split("/")[1]
+    return torch.hub.load(f"{repo}:{revision}" if revision != DEFAULT_REVISION else repo, variant, pretrained=pretrained)
+
+
+def _build_yolo(model_name, revision):
+    # The architecture only; torch.hub reuses the repository code it cached
+    # when the model was first downloaded
+    return _load_yolo(model_name, revision, pretrained=False)
+
+
+def _load_bert(model_name, revision):
+    import transformers
+    return getattr(transformers, MODEL_CLASSES["BERT"]).from_pretrained(model_name, revision=revision)
+
+
+def _load_whisper(model_name, revision):
+    # Whisper's encoder with a classification head: it is trained on audio
+    # class labels like the other models (see backend/audio_cache.py)
+    import transformers
+    return getattr(transformers, MODEL_CLASSES["Whisper"]).from_pretrained(model_name, revision=revision)
+
+
+# How each supported model is fetched from its hub on a cache miss.
+LOADERS = {
+    "YOLO": _load_yolo,
+    "BERT": _load_bert,
+    "Whisper": _load_whisper,
+}
+
+# How models without `save_pretrained` are rebuilt from the weight cache,
+# called with the builder arguments stored next to their state_dict.
+BUILDERS = {
+    "YOLO": _build_yolo,
+}
+
+
+def _build_pretrained(user_choice, config):
+    # The architecture only, from the model's config
+    import transformers
+    model_class = getattr(transformers, MODEL_CLASSES[user_choice])
+    return model_class(model_class.config_class.from_dict(config))
+
+
+def model_builder(user_choice, model, revision=None):
+    """
+    Returns (function, kwargs) that rebuild the architecture of `model`, as
+    loaded by load_model, in another process. The weights are then loaded
+    from its state_dict, so the model itself never has to be pickled.
+    """
+    if hasattr(model, "save_pretrained"):
+        return _build_pretrained, {"user_choice": user_choice, "config": model.config.to_dict()}
+    return BUILDERS[user_choice], {"model_name": MODEL_MAP[user_choice], "revision": revision or DEFAULT_REVISION}
+
+
+def model_id(user_choice, revision=None):
+    """Returns the cache id of a model, e.g. 'bert-base-uncased@main#BertForSequenceClassification'."""
+    model_name = MODEL_MAP.get(user_choice)
+    if not model_name:
+        raise ValueError(f"Model '{user_choice}' is not supported.")
+    return f"{model_name}@{revision or DEFAULT_REVISION}#{MODEL_CLASSES[user_choice]}"
+
+
+def model_size_bytes(model):
+    """Returns the memory held by a model's parameters and buffers."""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class ModelCache:
+    """
+    An in-process LRU cache of loaded models with a memory budget.
+
+    Cached models are kept pristine: `get` hands out a deep copy, so a
+    training run can freeze and update its copy without affecting later runs.
+    """
+    def __init__(self, budget_mb=MEMORY_BUDGET_MB):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._models = collections.OrderedDict()  # id -> (model, size_bytes)
+        self._lock = threading.Lock()
+
+    @property
+    def used_bytes(self):
+        return sum(size for _, size in self._models.values())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return None
+            self._models.move_to_end(key)
+            return copy.deepcopy(entry[0])
+
+    def put(self, key, model, status_callback=None):
+        size = model_size_bytes(model)
+        with self._lock:
+            self._models.pop(key, None)
+            if size > self.budget_bytes:
+                return
+            while self._models and self.used_bytes + size > self.budget_bytes:
+                evicted, _ = self._models.popitem(last=False)
+                if status_callback:
+                    status_callback(f"[Model Loader] Evicted '{evicted}' from the in-memory model cache.")
+            self._models[key] = (copy.deepcopy(model), size)
+
+    def set_budget(self, budget_mb):
+        """Changes the memory budget, evicting least recently used models if needed."""
+        with self._lock:
+            self.budget_bytes = int(budget_mb * 1024 * 1024)
+            while self._models and self.used_bytes > self.budget_bytes:
+                self._models.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+model_cache = ModelCache()
+
+
+def weights_path(key, cache_dir=None):
+    """Returns the on-disk cache directory for a model id."""
+    safe_key = key.replace("/", "--").replace("@", "--").replace("#", "--")
+    return os.path.join(cache_dir or WEIGHTS_CACHE_DIR, safe_key)
+
+
+def _load_from_disk(user_choice, path):
+    state_path = os.path.join(path, STATE_FILE)
+    if not os.path.exists(state_path):
+        import transformers
+        return getattr(transformers, MODEL_CLASSES[user_choice]).from_pretrained(path)
+    import torch
+    state = torch.load(state_path, map_location="cpu", weights_only=True)
+    model = BUILDERS[user_choice](**state["builder"])
+    model.load_state_dict(state["state_dict"])
+    return model.eval()
+
+
+def _save_to_disk(model, builder, path):
+    """
+    Writes a model to the weight cache. The files are written to a private
+    directory and renamed into place, so a concurrent writer never leaves a
+    partial cache behind.
+    """
+    import torch
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        if hasattr(model, "save_pretrained"):
+            model.save_pretrained(tmp_dir)
+        else:
+            torch.save({"builder": builder, "state_dict": model.state_dict()}, os.path.join(tmp_dir, STATE_FILE))
+        try:
+            os.replace(tmp_dir, path)
+        except OSError:
+            pass  # another process cached the model first
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def load_model(user_choice, status_callback, revision=None):
     """
     Loads a pre-trained model based on the user's selection.
 
     Args:
         user_choice (str): The model selected by the user in the GUI (e.g., "YOLO").
         status_callback (function): A function to send status updates back to the GUI.
+        revision (str): The hub revision (branch, tag or commit) to load. Defaults to "main".
 
     Returns:
-        str: A string representing the loaded model (placeholder).
-             In a real app, this would return the actual model object.
+        torch.nn.Module: The loaded model, private to the caller.
     """
-    model_name = MODEL_MAP.get(user_choice)
-    if not model_name:
-        raise ValueError(f"Model '{user_choice}' is not supported.")
+    key = model_id(user_choice, revision)
+    revision = revision or DEFAULT_REVISION
+    status_callback(f"[Model Loader] Identified model: {key}")
+
+    model = model_cache.get(key)
+    if model is not None:
+        status_callback(f"[Model Loader] Using '{key}' from the in-memory model cache.")
+        return model
 
-    status_callback(f"[Model Loader] Identified model: {model_name}")
-
-    # --- Placeholder for Actual Model Loading ---
-    # In a real implementation, you would do something like this:
-    #
-    # if user_choice == "BERT":
-    #     from transformers import BertForSequenceClassification
-    #     status_callback("[Model Loader] Downloading and loading BERT model...")
-    #     model = BertForSequenceClassification.from_pretrained(model_name)
-    #     status_callback("[Model Loader] BERT model loaded successfully.")
-    #     return model
-    #
-    # elif user_choice == "YOLO":
-    #     import torch
-    #     status_callback("[Model Loader] Downloading and loading YOLOv5 model...")
-    #     model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
-    #     status_callback("[Model Loader] YOLOv5 model loaded successfully.")
-    #     return model
-    #
-    # For now, we'll just simulate the process.
-    import time
-    time.sleep(2) # Simulate download/loading time
-    
-    status_callback(f"[Model Loader] Successfully loaded model '{model_name}'.")
-    
-    # We return a string as a placeholder for the model object.
-    return f"PretrainedModel<{model_name}>"
+    path = weights_path(key)
+    if os.path.exists(path):
+        status_callback(f"[Model Loader] Loading '{key}' from the weight cache at {path}...")
+        model = _load_from_disk(user_choice, path)
+    else:
+        status_callback(f"[Model Loader] Downloading and loading '{key}'...")
+        model = LOADERS[user_choice](MODEL_MAP[user_choice], revision)
+        _save_to_disk(model, {"model_name": MODEL_MAP[user_choice], "revision": revision}, path)
+        status_callback(f"[Model Loader] Saved '{key}' to the weight cache at {path}.")
 
+    model_cache.put(key, model, status_callback)
+    status_callback(f"[Model Loader] Successfully loaded model '{key}'.")
+    return model
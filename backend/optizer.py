@@ -1,50 +1,294 @@
 # backend/optizer.py
-import torch
-import torch.nn as nn
-import torch.optim as optim
+import contextlib
+import json
+import os
+import time
 
-def train(model, dataset, epochs=5, lr=0.001, optimizer_type="adam", fine_tune=True, prune=False, quantize=False):
-    print(f"[Backend] Starting training for {epochs} epochs, LR={lr}, optimizer={optimizer_type}")
+from backend import telemetry
+
+def train(model, dataset, epochs=5, lr=0.001, optimizer_type="adam", fine_tune=True, prune=False, quantize=False, status_callback=print, feature_cache_key=None, save_path="trained_model.pth", checkpoint_dir=None, checkpoint_every=1, checkpoint_every_batches=None, keep_checkpoints=3, resume=False, prune_sparsity=0.4, prune_recovery_epochs=0, quantize_config=None, export=False, export_config=None, profile=False, profile_config=None, world_size=1, accumulation_steps=1, model_builder=None):
+    # Imported here so that importing this module does not pull in PyTorch
+    import torch
+
+    status_callback = telemetry.get(status_callback)
+    status_callback(f"[Backend] Starting training for {epochs} epochs, LR={lr}, optimizer={optimizer_type}")
     
     # Example dataset unpacking
     train_loader, val_loader = dataset  
+    data_loader = train_loader
+
+    fit_kwargs = dict(
+        epochs=epochs, lr=lr, optimizer_type=optimizer_type, fine_tune=fine_tune,
+        checkpoint_dir=checkpoint_dir, checkpoint_every=checkpoint_every,
+        checkpoint_every_batches=checkpoint_every_batches, keep_checkpoints=keep_checkpoints,
+        resume=resume, profile=profile, profile_config=profile_config,
+        accumulation_steps=accumulation_steps,
+    )
+    if world_size > 1 and hasattr(train_loader.dataset, "set_epoch"):
+        status_callback("[Backend] Data-parallel training needs a map-style dataset, not a stream; training in one process.")
+        world_size = 1
+    if world_size > 1 and model_builder is None:
+        status_callback("[Backend] Data-parallel training needs a way to rebuild the model in each process; training in one process.")
+        world_size = 1
+    if world_size > 1:
+        # The training loop runs in `world_size` processes; the trained
+        # weights come back to this process for the post-training stages
+        from backend import distributed
+        if fine_tune:
+            freeze_backbone(model)
+        with status_callback.stage("data_parallel_training", world_size=world_size):
+            distributed.train_data_parallel(model, model_builder, train_loader, world_size, status_callback, **fit_kwargs)
+    else:
+        fit(model, train_loader, status_callback=status_callback, feature_cache_key=feature_cache_key, **fit_kwargs)
+
+    # Optimization steps
+    if prune:
+        status_callback("[Backend] Applying structured pruning...")
+        from backend import pruning
+        with status_callback.stage("pruning"):
+            report = pruning.prune_model(model, data_loader, sparsity=prune_sparsity, recovery_epochs=prune_recovery_epochs,
+                                         lr=lr, status_callback=status_callback)
+        save_report(report, save_path, "pruning", status_callback)
+
+    if quantize:
+        status_callback("[Backend] Applying quantization...")
+        from backend import quantization
+        with status_callback.stage("quantization"):
+            model, report = quantization.quantize_model(model, data_loader, status_callback=status_callback, config=quantize_config,
+                                                        val_loader=val_loader)
+        save_report(report, save_path, "quantization", status_callback)
+
+    # Save model
+    torch.save(model.state_dict(), save_path)
+
+    # Servable artifacts next to the saved weights, with parity and latency checks
+    if export and not is_tensor_model(model, next(iter(data_loader))[0]):
+        status_callback("[Backend] Skipping export: TorchScript/ONNX export needs a model that takes and returns "
+                        "plain tensors, and this model takes a dict of inputs or returns an output object.")
+    elif export:
+        status_callback("[Backend] Exporting to TorchScript/ONNX...")
+        from backend import export as exporter
+        with status_callback.stage("export"):
+            report = exporter.export_model(model, data_loader, save_path, status_callback=status_callback, config=export_config)
+        save_report(report, save_path, "export", status_callback)
+
+    status_callback("[Backend] Training & optimization complete!")
+    return model
+
+
+def fit(model, train_loader, epochs=5, lr=0.001, optimizer_type="adam", fine_tune=True, status_callback=print, feature_cache_key=None, checkpoint_dir=None, checkpoint_every=1, checkpoint_every_batches=None, keep_checkpoints=3, resume=False, profile=False, profile_config=None, accumulation_steps=1, rank=None):
+    """
+    Runs the training loop, updating `model` in place.
+
+    With `accumulation_steps` above 1, gradients of that many batches are
+    accumulated before each optimizer step, so the effective batch size is
+    the loader's batch size times `accumulation_steps`.
+
+    With `rank` set, this is one process of data-parallel training (see
+    backend/distributed.py): the model is wrapped in DistributedDataParallel
+    and only rank 0 writes checkpoints.
+    """
+    import torch.nn as nn
+    import torch.optim as optim
+
+    status_callback = telemetry.get(status_callback)
+
+    # If fine-tuning, freeze some layers
+    train_module = model
+    if fine_tune:
+        freeze_backbone(model)
+
+        # Run the frozen backbone once and train only the head on cached features
+        if feature_cache_key:
+            from backend import feature_cache
+            with status_callback.stage("feature_cache"):
+                head, feature_loader = feature_cache.build_head_loader(model, train_loader, feature_cache_key, status_callback)
+            if head is not None:
+                train_module, train_loader = head, feature_loader
+
+    if rank is not None:
+        from torch.nn.parallel import DistributedDataParallel
+        train_module = DistributedDataParallel(train_module)
 
     # Optimizer selection
     if optimizer_type.lower() == "sgd":
-        optimizer = optim.SGD(model.parameters(), lr=lr, momentum=0.9)
+        optimizer = optim.SGD(train_module.parameters(), lr=lr, momentum=0.9)
     else:
-        optimizer = optim.Adam(model.parameters(), lr=lr)
+        optimizer = optim.Adam(train_module.parameters(), lr=lr)
 
     criterion = nn.CrossEntropyLoss()
 
-    # If fine-tuning, freeze some layers
-    if fine_tune:
-        for param in list(model.parameters())[:-2]:  # freeze all but last 2 layers
-            param.requires_grad = False
+    # Resume from the latest checkpoint, then keep writing checkpoints in the
+    # background while training continues. A checkpoint is only resumed if it
+    # was written with the same training config; the epoch count may grow
+    # (sweeps resume a trial with more epochs at every rung).
+    start_epoch = start_batch = 0
+    writer = None
+    if checkpoint_dir:
+        from backend import checkpoint
+        loader_generator = getattr(train_loader, "generator", None)
+        run_config = {
+            "model": type(model).__name__,
+            "optimizer_type": optimizer_type.lower(),
+            "lr": lr,
+            "fine_tune": bool(fine_tune),
+            "batch_size": (train_loader.batch_size or getattr(train_loader.batch_sampler, "batch_size", None) or 0) * accumulation_steps,
+        }
+        latest = checkpoint.latest_checkpoint(checkpoint_dir) if resume else None
+        if latest:
+            state = checkpoint.load_checkpoint(latest)
+            if state.get("config") != run_config:
+                raise ValueError(f"Cannot resume from {latest}: it was written with config {state.get('config')}, "
+                                 f"this run uses {run_config}. Use another checkpoint_dir or turn off resume.")
+            if state["epoch"] >= epochs:
+                raise ValueError(f"Cannot resume from {latest}: it has already trained {state['epoch']} of the "
+                                 f"{epochs} requested epochs. Increase epochs or turn off resume.")
+            model.load_state_dict(state["model"])
+            optimizer.load_state_dict(state["optimizer"])
+            checkpoint.restore_rng_state(state["rng"], loader_generator)
+            start_epoch, start_batch = state["epoch"], state.get("batch", 0)
+            status_callback(f"[Backend] Resumed from {latest} at epoch {start_epoch}/{epochs}"
+                            + (f", batch {start_batch}" if start_batch else ""))
+        elif resume:
+            status_callback(f"[Backend] No checkpoint found in {checkpoint_dir}; starting from scratch.")
+        elif not rank and checkpoint.clear_checkpoints(checkpoint_dir):
+            status_callback(f"[Backend] Removed the previous run's checkpoints from {checkpoint_dir}.")
+        if not rank:
+            writer = checkpoint.CheckpointWriter(checkpoint_dir, keep_last=keep_checkpoints, status_callback=status_callback)
+
+    # Streaming datasets are told the epoch (and, on resume, the batches
+    # already trained) so they can reproduce the same sample order.
+    # They can also be checkpointed in the middle of an epoch.
+    streaming = hasattr(train_loader.dataset, "set_epoch")
+    if not streaming:
+        checkpoint_every_batches = None
+    try:
+        num_batches = len(train_loader)
+    except TypeError:
+        num_batches = None
 
-    # Training loop
+    # Training loop. Step and epoch telemetry is emitted as it goes; with
+    # profiling on, a few steps are also captured with torch.profiler.
+    profiler = status_callback.profiler(profile_config) if profile else contextlib.nullcontext()
     model.train()
-    for epoch in range(epochs):
-        for images, labels in train_loader:
+    with status_callback.stage("training"), profiler:
+        for epoch in range(start_epoch, epochs):
+            skip = start_batch if epoch == start_epoch else 0
+            if streaming:
+                train_loader.dataset.set_epoch(epoch, skip)
+            for sampler in (train_loader.sampler, train_loader.batch_sampler):
+                if hasattr(sampler, "set_epoch"):
+                    sampler.set_epoch(epoch)
+            # Time spent waiting on the loader vs. running the step tells us
+            # whether training is input-bound.
+            steps = status_callback.step_reporter(epoch + 1)
             optimizer.zero_grad()
-            outputs = model(images)
-            loss = criterion(outputs, labels)
-            loss.backward()
-            optimizer.step()
-        print(f"[Backend] Epoch {epoch+1}/{epochs} completed")
+            stepping = True
+            batch_start = time.perf_counter()
+            for batch, (images, labels) in enumerate(train_loader, start=skip + 1):
+                step_start = time.perf_counter()
+                # With gradient accumulation the optimizer steps once every
+                # `accumulation_steps` batches; DDP only all-reduces on those.
+                stepping = batch % accumulation_steps == 0 or batch == num_batches
+                with contextlib.nullcontext() if stepping or rank is None else train_module.no_sync():
+                    loss = criterion(forward(train_module, images), labels)
+                    (loss / accumulation_steps).backward()
+                if stepping:
+                    optimizer.step()
+                    optimizer.zero_grad()
+                step_end = time.perf_counter()
+                steps.record(batch, len(labels), step_start - batch_start, step_end - step_start, loss.item())
+                if profile:
+                    profiler.step()
+                if writer is not None and checkpoint_every_batches and stepping and batch % checkpoint_every_batches == 0:
+                    writer.save(epoch, {
+                        "model": model.state_dict(),
+                        "optimizer": optimizer.state_dict(),
+                        "rng": checkpoint.rng_state(loader_generator),
+                        "config": run_config,
+                    }, batch=batch)
+                batch_start = time.perf_counter()
+            if not stepping:
+                optimizer.step()
+            steps.finish(epochs)
 
-    # Optimization steps
-    if prune:
-        print("[Backend] Applying pruning...")
-        from torch.nn.utils import prune as prune_utils
-        for name, module in model.named_modules():
-            if isinstance(module, nn.Linear):
-                prune_utils.l1_unstructured(module, name="weight", amount=0.4)
+            if writer is not None and ((epoch + 1) % checkpoint_every == 0 or epoch + 1 == epochs):
+                writer.save(epoch + 1, {
+                    "model": model.state_dict(),
+                    "optimizer": optimizer.state_dict(),
+                    "rng": checkpoint.rng_state(loader_generator),
+                    "config": run_config,
+                })
 
-    if quantize:
-        print("[Backend] Applying quantization...")
-        model = torch.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    if writer is not None:
+        writer.close()
 
-    # Save model
-    torch.save(model.state_dict(), "trained_model.pth")
-    print("[Backend] Training & optimization complete!")
+
+def forward(model, inputs):
+    """
+    Runs a model on a batch's inputs and returns its logits. Text batches
+    carry a dict of tensors (input_ids, attention_mask) passed as keyword
+    arguments, and Hugging Face models return an output object with `.logits`.
+    """
+    outputs = model(**inputs) if isinstance(inputs, dict) else model(inputs)
+    return getattr(outputs, "logits", outputs)
+
+
+def is_tensor_model(model, inputs):
+    """
+    Returns True if `model` takes a single tensor batch and returns a tensor,
+    which graph-based stages (FX quantization, TorchScript/ONNX export) need.
+    Text models take a dict of tensors and Hugging Face models return an
+    output object, so they are not.
+    """
+    import torch
+
+    if not isinstance(inputs, torch.Tensor):
+        return False
+    was_training = model.training
+    model.eval()
+    try:
+        with torch.no_grad():
+            return isinstance(model(inputs), torch.Tensor)
+    finally:
+        model.train(was_training)
+
+
+def freeze_backbone(model):
+    """Freezes all but the last 2 parameter tensors of a model, for fine-tuning."""
+    for param in list(model.parameters())[:-2]:
+        param.requires_grad = False
+
+
+def save_report(report, save_path, stage, status_callback=print):
+    """Writes a stage's report as JSON next to the saved model, e.g. trained_model.pruning.json."""
+    report_path = f"{os.path.splitext(save_path)[0]}.{stage}.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    status_callback(f"[Backend] {stage.capitalize()} report saved to {report_path}")
+
+
+def evaluate(model, loader):
+    """
+    Computes the average cross-entropy loss and accuracy of a model on a loader.
+
+    Returns:
+        tuple: (loss, accuracy)
+    """
+    import torch
+    import torch.nn as nn
+
+    criterion = nn.CrossEntropyLoss(reduction="sum")
+    was_training = model.training
+    model.eval()
+    total_loss, correct, count = 0.0, 0, 0
+    with torch.no_grad():
+        for images, labels in loader:
+            outputs = forward(model, images)
+            total_loss += criterion(outputs, labels).item()
+            correct += (outputs.argmax(dim=1) == labels).sum().item()
+            count += len(labels)
+    model.train(was_training)
+    if count == 0:
+        return float("nan"), float("nan")
+    return total_loss / count, correct / count
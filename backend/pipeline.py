@@ -0,0 +1,77 @@
+# backend/pipeline.py
+
+# This module runs one complete backend pipeline: load the model, prepare
+# the dataset, then train and optimize. It is the single entry point shared
+# by the GUI's job scheduler and any headless runner, and it only depends on
+# the `params` dict and a status callback, so it can run in any process.
+
+from backend import model_loader, dataset_utils, telemetry, train
+
+# Keys every params dict must provide, and defaults for the rest. The
+# defaults match the initial values of the GUI's widgets.
+REQUIRED_PARAMS = ("model_choice", "dataset_source", "dataset_info")
+DEFAULT_PARAMS = {
+    "epochs": 10,
+    "lr": 0.001,
+    "optimizer_type": "Adam",
+    "fine_tune": True,
+    "prune": False,
+    "quantize": False,
+    "export": False,
+    "num_workers": None,
+    "resume": False,
+    "streaming": False,
+    "profile": False,
+    "world_size": 1,
+    "batch_size": 32,
+    "auto_batch": False,
+}
+
+
+def complete_params(params):
+    """
+    Validates a params dict and fills in defaults for any missing keys.
+
+    Raises:
+        ValueError: If a required key is missing or the model is not supported.
+    """
+    missing = [key for key in REQUIRED_PARAMS if not params.get(key)]
+    if missing:
+        raise ValueError(f"Missing required parameter(s): {', '.join(missing)}")
+    if params["model_choice"] not in model_loader.MODEL_MAP:
+        raise ValueError(f"Model '{params['model_choice']}' is not supported.")
+    return {**DEFAULT_PARAMS, **params}
+
+
+def run_pipeline(params, status_callback):
+    """
+    Runs the model -> dataset -> training pipeline for one set of parameters.
+
+    Status messages and telemetry events (dicts, see backend/telemetry.py)
+    are sent to `status_callback`. Every event is also logged to
+    logs/runs/<run>/events.jsonl, next to a Chrome trace of the stages.
+
+    Args:
+        params (dict): The training preferences, as collected by the GUI.
+        status_callback (function): A function to send status updates back to the GUI.
+    """
+    status_callback = telemetry.Telemetry(status_callback, run_dir=telemetry.run_directory(params),
+                                          step_every=params.get("telemetry_step_every", 50))
+    try:
+        status_callback("--- Starting Backend Pipeline ---")
+
+        # 1. Load Model
+        with status_callback.stage("model_load"):
+            model = model_loader.load_model(params["model_choice"], status_callback, revision=params.get("model_revision"))
+
+        # 2. Load Dataset
+        with status_callback.stage("dataset_load"):
+            dataset_path = dataset_utils.load_dataset(params["dataset_source"], params["dataset_info"], status_callback,
+                                                      refresh=params.get("refresh_dataset", False))
+
+        # 3. Train and Optimize
+        train.run_training_pipeline(model, dataset_path, params, status_callback)
+
+        status_callback("--- Backend Pipeline Finished Successfully! ---")
+    finally:
+        status_callback.close()
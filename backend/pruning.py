@@ -0,0 +1,264 @@
+# backend/pruning.py
+
+# This module performs structured pruning: whole neurons (Linear outputs) and
+# channels (Conv2d output channels) are removed from the model, and every
+# layer that consumed them is shrunk to match. Unlike mask-based pruning the
+# saved model really gets smaller and inference really gets faster.
+#
+# Prunable layers are found by tracing the model with torch.fx. A layer is
+# prunable when its output flows, through shape-preserving ops only
+# (activations, dropout, pooling, batch norm, flatten), into exactly one
+# Linear/Conv2d. The final output layer is never pruned. Models that cannot
+# be traced are left unchanged.
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from backend import inference_bench, optizer
+
+# Modules and functions that keep the channel layout of their input
+_PASSTHROUGH_MODULES = (
+    nn.ReLU, nn.ReLU6, nn.LeakyReLU, nn.GELU, nn.SiLU, nn.Tanh, nn.Sigmoid, nn.ELU, nn.Hardswish,
+    nn.Dropout, nn.Dropout2d, nn.Identity,
+    nn.MaxPool2d, nn.AvgPool2d, nn.AdaptiveAvgPool2d, nn.AdaptiveMaxPool2d,
+)
+_PASSTHROUGH_FUNCTIONS = (F.relu, F.gelu, F.silu, F.dropout, torch.relu, torch.tanh, torch.sigmoid,
+                          F.max_pool2d, F.avg_pool2d, F.adaptive_avg_pool2d)
+_PASSTHROUGH_METHODS = ("relu", "tanh", "sigmoid", "contiguous")
+_FLATTEN_FUNCTIONS = (torch.flatten,)
+
+
+def _is_prunable_layer(module):
+    return isinstance(module, nn.Linear) or (isinstance(module, nn.Conv2d) and module.groups == 1)
+
+
+def _out_units(module):
+    return module.out_features if isinstance(module, nn.Linear) else module.out_channels
+
+
+def find_prunable_groups(model):
+    """
+    Traces `model` and returns a list of prunable groups.
+
+    Each group is a dict with the producer layer name, any batch norms on the
+    way, the single consumer layer name, and `factor`, the number of consumer
+    input features per producer unit (greater than 1 after a flatten).
+    """
+    from torch import fx
+
+    traced = fx.symbolic_trace(model)
+    modules = dict(traced.named_modules())
+    groups = []
+    for node in traced.graph.nodes:
+        if node.op != "call_module" or not _is_prunable_layer(modules[node.target]):
+            continue
+        norms = []
+        flattened = False
+        current = node
+        consumer = None
+        while len(current.users) == 1:
+            user = next(iter(current.users))
+            if user.op == "call_module":
+                module = modules[user.target]
+                if _is_prunable_layer(module):
+                    consumer = user.target
+                    break
+                if isinstance(module, nn.BatchNorm2d) or isinstance(module, nn.BatchNorm1d):
+                    norms.append(user.target)
+                elif isinstance(module, nn.Flatten):
+                    flattened = True
+                elif not isinstance(module, _PASSTHROUGH_MODULES):
+                    break
+            elif user.op == "call_function" and user.target in _PASSTHROUGH_FUNCTIONS:
+                pass
+            elif user.op == "call_function" and user.target in _FLATTEN_FUNCTIONS:
+                flattened = True
+            elif user.op == "call_method" and user.target in _PASSTHROUGH_METHODS:
+                pass
+            elif user.op == "call_method" and user.target == "flatten":
+                flattened = True
+            else:
+                break
+            current = user
+        if consumer is None:
+            continue
+
+        producer, target = modules[node.target], modules[consumer]
+        in_features = target.in_features if isinstance(target, nn.Linear) else target.in_channels
+        if isinstance(target, nn.Conv2d) and (target.groups != 1 or flattened):
+            continue
+        if in_features % _out_units(producer) != 0:
+            continue
+        factor = in_features // _out_units(producer)
+        if factor > 1 and not flattened:
+            continue
+        groups.append({"producer": node.target, "norms": norms, "consumer": consumer, "factor": factor})
+    return groups
+
+
+def _unit_importance(module):
+    """L2 norm of each output unit's weights."""
+    return module.weight.detach().flatten(1).norm(dim=1)
+
+
+def _set_module(model, name, new_module):
+    parent_name, _, child_name = name.rpartition(".")
+    parent = model.get_submodule(parent_name) if parent_name else model
+    setattr(parent, child_name, new_module)
+
+
+def _copy_requires_grad(old, new):
+    for (_, old_param), (_, new_param) in zip(old.named_parameters(), new.named_parameters()):
+        new_param.requires_grad = old_param.requires_grad
+
+
+def _shrink_outputs(module, keep):
+    if isinstance(module, nn.Linear):
+        new = nn.Linear(module.in_features, len(keep), bias=module.bias is not None)
+    else:
+        new = nn.Conv2d(module.in_channels, len(keep), module.kernel_size, module.stride, module.padding,
+                        module.dilation, module.groups, module.bias is not None, module.padding_mode)
+    new.weight.data = module.weight.data[keep].clone()
+    if module.bias is not None:
+        new.bias.data = module.bias.data[keep].clone()
+    _copy_requires_grad(module, new)
+    return new
+
+
+def _shrink_inputs(module, keep):
+    if isinstance(module, nn.Linear):
+        new = nn.Linear(len(keep), module.out_features, bias=module.bias is not None)
+    else:
+        new = nn.Conv2d(len(keep), module.out_channels, module.kernel_size, module.stride, module.padding,
+                        module.dilation, module.groups, module.bias is not None, module.padding_mode)
+    new.weight.data = module.weight.data[:, keep].clone()
+    if module.bias is not None:
+        new.bias.data = module.bias.data.clone()
+    _copy_requires_grad(module, new)
+    return new
+
+
+def _shrink_norm(norm, keep):
+    new = type(norm)(len(keep), eps=norm.eps, momentum=norm.momentum, affine=norm.affine,
+                     track_running_stats=norm.track_running_stats)
+    if norm.affine:
+        new.weight.data = norm.weight.data[keep].clone()
+        new.bias.data = norm.bias.data[keep].clone()
+    if norm.track_running_stats:
+        new.running_mean = norm.running_mean[keep].clone()
+        new.running_var = norm.running_var[keep].clone()
+        new.num_batches_tracked = norm.num_batches_tracked.clone()
+    _copy_requires_grad(norm, new)
+    return new
+
+
+def prune_structured(model, sparsity, status_callback=print):
+    """
+    Removes the least important units across all prunable layers.
+
+    Unit importance is the L2 norm of its weights, divided by the layer's mean
+    so layers of different scale compete fairly for the global budget.
+
+    Args:
+        model (nn.Module): The model to prune in place.
+        sparsity (float): Fraction of prunable units to remove globally (0-1).
+        status_callback (function): A function to send status updates back to the GUI.
+
+    Returns:
+        int: The number of units removed.
+    """
+    try:
+        groups = find_prunable_groups(model)
+    except Exception as e:
+        status_callback(f"[Pruning] Model cannot be traced for structured pruning ({e}); skipping.")
+        return 0
+    if not groups:
+        status_callback("[Pruning] No prunable layers found; skipping.")
+        return 0
+
+    scores = []
+    for group_id, group in enumerate(groups):
+        importance = _unit_importance(model.get_submodule(group["producer"]))
+        importance = importance / importance.mean().clamp_min(1e-12)
+        scores.extend((score, group_id, unit) for unit, score in enumerate(importance.tolist()))
+    scores.sort()
+    budget = int(len(scores) * sparsity)
+
+    removed = {group_id: set() for group_id in range(len(groups))}
+    for score, group_id, unit in scores:
+        if budget == 0:
+            break
+        units = _out_units(model.get_submodule(groups[group_id]["producer"]))
+        if len(removed[group_id]) + 1 >= units:
+            continue  # always keep at least one unit per layer
+        removed[group_id].add(unit)
+        budget -= 1
+
+    total_removed = 0
+    for group_id, group in enumerate(groups):
+        if not removed[group_id]:
+            continue
+        producer = model.get_submodule(group["producer"])
+        keep = torch.tensor([u for u in range(_out_units(producer)) if u not in removed[group_id]])
+        _set_module(model, group["producer"], _shrink_outputs(producer, keep))
+        for norm_name in group["norms"]:
+            _set_module(model, norm_name, _shrink_norm(model.get_submodule(norm_name), keep))
+        factor = group["factor"]
+        consumer_keep = (keep[:, None] * factor + torch.arange(factor)[None, :]).flatten()
+        _set_module(model, group["consumer"], _shrink_inputs(model.get_submodule(group["consumer"]), consumer_keep))
+        total_removed += len(removed[group_id])
+        status_callback(f"[Pruning] {group['producer']}: kept {len(keep)} of {_out_units(producer)} units.")
+    return total_removed
+
+
+def recover(model, loader, epochs, lr, status_callback=print):
+    """Briefly fine-tunes a pruned model to recover accuracy."""
+    params = [p for p in model.parameters() if p.requires_grad]
+    if not params or epochs <= 0:
+        return
+    optimizer = torch.optim.Adam(params, lr=lr)
+    criterion = nn.CrossEntropyLoss()
+    model.train()
+    for epoch in range(epochs):
+        for images, labels in loader:
+            optimizer.zero_grad()
+            loss = criterion(optizer.forward(model, images), labels)
+            loss.backward()
+            optimizer.step()
+        status_callback(f"[Pruning] Recovery epoch {epoch + 1}/{epochs} completed, last loss {loss.item():.4f}")
+
+
+def prune_model(model, loader, sparsity=0.4, recovery_epochs=0, lr=1e-4, status_callback=print):
+    """
+    Runs the pruning stage: structured pruning, optional recovery fine-tuning,
+    and a before/after report.
+
+    Args:
+        model (nn.Module): The trained model, pruned in place.
+        loader (DataLoader): Training data; its first batch is used for latency
+            measurements and all of it for recovery.
+        sparsity (float): Global fraction of prunable units to remove.
+        recovery_epochs (int): Epochs of fine-tuning after pruning.
+        lr (float): Learning rate for recovery.
+        status_callback (function): A function to send status updates back to the GUI.
+
+    Returns:
+        dict: The report, with "before" and "after" parameter count, file size and latency.
+    """
+    example, _ = next(iter(loader))
+    before = inference_bench.model_report(model, example)
+    removed = prune_structured(model, sparsity, status_callback)
+    if removed and recovery_epochs:
+        recover(model, loader, recovery_epochs, lr, status_callback)
+    after = inference_bench.model_report(model, example)
+
+    report = {"sparsity": sparsity, "units_removed": removed, "recovery_epochs": recovery_epochs,
+              "before": before, "after": after}
+    status_callback(
+        f"[Pruning] Parameters {before['parameters']:,} -> {after['parameters']:,}, "
+        f"size {before['size_bytes'] / 1e6:.2f} MB -> {after['size_bytes'] / 1e6:.2f} MB, "
+        f"latency {before['latency']['mean_ms']:.2f} ms -> {after['latency']['mean_ms']:.2f} ms per batch, "
+        f"throughput {before['latency']['throughput']:.0f} -> {after['latency']['throughput']:.0f} samples/s"
+    )
+    return report
@@ -0,0 +1,201 @@
+# backend/quantization.py
+
+# This module performs static post-training int8 quantization for CPU
+# inference. The model is traced with torch.fx, Conv/BatchNorm/ReLU and
+# Linear/ReLU patterns are fused, observers are calibrated on a sample of
+# the training data, and the model is converted to int8 kernels, so conv
+# layers get faster as well as linear ones.
+#
+# If the int8 model's accuracy drops by more than a threshold, the layers
+# whose quantization hurts most are kept in fp32, one at a time, until the
+# drop is acceptable. Accuracy and sensitivity are measured on validation
+# batches when there are any, and otherwise on training batches not used for
+# calibration; the report records which. The report includes a per-layer CPU latency breakdown
+# of the fp32 and int8 models. Models that cannot be traced fall back to
+# dynamic quantization of their Linear layers.
+
+import copy
+import itertools
+import time
+
+import torch
+import torch.nn as nn
+
+from backend import inference_bench, optizer
+
+DEFAULT_QUANT_CONFIG = {
+    "mode": "static",            # "static" or "dynamic"
+    "calibration_batches": 10,   # training batches used to calibrate observers
+    "eval_batches": 10,          # validation batches used to measure the accuracy drop
+    "max_accuracy_drop": 0.01,   # absolute top-1 drop tolerated before falling back
+}
+
+
+def _quantizable_layers(model):
+    return [name for name, module in model.named_modules()
+            if isinstance(module, (nn.Conv1d, nn.Conv2d, nn.Conv3d, nn.Linear))]
+
+
+def _accuracy(model, batches):
+    correct, count = 0, 0
+    with torch.no_grad():
+        for images, labels in batches:
+            correct += (optizer.forward(model, images).argmax(dim=1) == labels).sum().item()
+            count += len(labels)
+    return correct / count if count else float("nan")
+
+
+def quantize_static(model, calibration, example, skip_layers=()):
+    """
+    Returns an int8 copy of `model`, keeping `skip_layers` in fp32.
+
+    Args:
+        model (nn.Module): The fp32 model (left unchanged).
+        calibration (list): (inputs, labels) batches run through the observers.
+        example (Tensor): An example input for tracing.
+        skip_layers (iterable): Names of Conv/Linear layers not to quantize.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+    qconfig_mapping = get_default_qconfig_mapping(torch.backends.quantized.engine)
+    for name in skip_layers:
+        qconfig_mapping.set_module_name(name, None)
+    prepared = prepare_fx(copy.deepcopy(model).eval(), qconfig_mapping, (example,))
+    with torch.no_grad():
+        for images, _ in calibration:
+            prepared(images)
+    return convert_fx(prepared)
+
+
+def layer_latency(model, example, iterations=20):
+    """
+    Times every leaf module of `model` during forward passes on `example`.
+
+    Returns:
+        dict: Mean milliseconds per forward pass, by module name.
+    """
+    totals = {}
+    starts = {}
+    handles = []
+
+    def pre_hook(name):
+        def hook(module, inputs):
+            starts[name] = time.perf_counter()
+        return hook
+
+    def post_hook(name):
+        def hook(module, inputs, output):
+            totals[name] = totals.get(name, 0.0) + time.perf_counter() - starts[name]
+        return hook
+
+    for name, module in model.named_modules():
+        if name and not list(module.children()):
+            handles.append(module.register_forward_pre_hook(pre_hook(name)))
+            handles.append(module.register_forward_hook(post_hook(name)))
+    try:
+        model.eval()
+        with torch.no_grad():
+            optizer.forward(model, example)
+            totals.clear()
+            for _ in range(iterations):
+                optizer.forward(model, example)
+    finally:
+        for handle in handles:
+            handle.remove()
+    return {name: total * 1000.0 / iterations for name, total in totals.items()}
+
+
+def _latency_breakdown(fp32_model, int8_model, example):
+    fp32 = layer_latency(fp32_model, example)
+    int8 = layer_latency(int8_model, example)
+    rows = []
+    for name in list(fp32) + [n for n in int8 if n not in fp32]:
+        rows.append({
+            "layer": name,
+            "fp32_ms": fp32.get(name),
+            "int8_ms": int8.get(name),
+            "int8_type": type(int8_model.get_submodule(name)).__name__ if name in int8 else None,
+        })
+    return rows
+
+
+def quantize_model(model, loader, status_callback=print, config=None, val_loader=None):
+    """
+    Runs the quantization stage and returns (quantized_model, report).
+
+    Args:
+        model (nn.Module): The trained fp32 model.
+        loader (DataLoader): Training data used for calibration.
+        status_callback (function): A function to send status updates back to the GUI.
+        config (dict): Options overriding DEFAULT_QUANT_CONFIG.
+        val_loader (DataLoader): Held-out data for the accuracy and sensitivity
+            checks. Without it (or if it is empty), training batches are used.
+    """
+    config = {**DEFAULT_QUANT_CONFIG, **(config or {})}
+    model.eval()
+    evaluation = list(itertools.islice(iter(val_loader), config["eval_batches"])) if val_loader is not None else []
+    eval_split = "val" if evaluation else "train"
+    train_batches = config["calibration_batches"] + (0 if evaluation else config["eval_batches"])
+    batches = list(itertools.islice(iter(loader), train_batches))
+    calibration = batches[:config["calibration_batches"]]
+    evaluation = evaluation or batches[config["calibration_batches"]:] or calibration
+    example = batches[0][0]
+    report = {"config": config, "eval_split": eval_split, "fallback_layers": []}
+
+    quantized = None
+    if config["mode"] == "static" and not optizer.is_tensor_model(model, example):
+        # FX tracing needs tensor inputs and outputs; text models take a dict
+        # and Hugging Face models return an output object
+        status_callback("[Quantization] Static quantization needs a model that takes and returns plain tensors; "
+                        "using dynamic quantization.")
+    elif config["mode"] == "static":
+        try:
+            quantized = quantize_static(model, calibration, example)
+        except Exception as e:
+            status_callback(f"[Quantization] Static quantization failed ({e}); using dynamic quantization.")
+
+    if quantized is None:
+        report["mode"] = "dynamic"
+        quantized = torch.quantization.quantize_dynamic(copy.deepcopy(model), {nn.Linear}, dtype=torch.qint8)
+    else:
+        report["mode"] = "static"
+        fp32_acc = _accuracy(model, evaluation)
+        int8_acc = _accuracy(quantized, evaluation)
+        status_callback(f"[Quantization] Accuracy on {eval_split} batches: fp32 {fp32_acc:.4f}, int8 {int8_acc:.4f}")
+
+        if fp32_acc - int8_acc > config["max_accuracy_drop"]:
+            # Rank layers by how far quantizing each one alone moves the
+            # output on the evaluation batches.
+            status_callback("[Quantization] Accuracy drop above threshold; measuring per-layer sensitivity...")
+            layers = _quantizable_layers(model)
+            with torch.no_grad():
+                references = [optizer.forward(model, images) for images, _ in evaluation]
+            sensitivity = {}
+            for layer in layers:
+                only_this = quantize_static(model, calibration, example, skip_layers=[l for l in layers if l != layer])
+                with torch.no_grad():
+                    errors = [torch.mean((only_this(images) - reference) ** 2).item()
+                              for (images, _), reference in zip(evaluation, references)]
+                sensitivity[layer] = sum(errors) / len(errors)
+
+            skipped = []
+            for layer in sorted(layers, key=sensitivity.get, reverse=True):
+                skipped.append(layer)
+                quantized = quantize_static(model, calibration, example, skip_layers=skipped)
+                int8_acc = _accuracy(quantized, evaluation)
+                status_callback(f"[Quantization] Keeping '{layer}' in fp32: int8 accuracy {int8_acc:.4f}")
+                if fp32_acc - int8_acc <= config["max_accuracy_drop"]:
+                    break
+            report["fallback_layers"] = skipped
+        report["accuracy"] = {"fp32": fp32_acc, "int8": int8_acc}
+        report["layers"] = _latency_breakdown(model, quantized, example)
+
+    report["before"] = inference_bench.model_report(model, example)
+    report["after"] = inference_bench.model_report(quantized, example)
+    before, after = report["before"], report["after"]
+    status_callback(
+        f"[Quantization] {report['mode']} int8: size {before['size_bytes'] / 1e6:.2f} MB -> {after['size_bytes'] / 1e6:.2f} MB, "
+        f"latency {before['latency']['mean_ms']:.2f} ms -> {after['latency']['mean_ms']:.2f} ms per batch"
+    )
+    return quantized, report
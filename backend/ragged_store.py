@@ -0,0 +1,116 @@
+# backend/ragged_store.py
+
+# This module holds what the token cache (text_cache) and the log-mel feature
+# store (audio_cache) have in common: variable-length samples written back to
+# back into one flat memory-mapped array, with an offsets array marking where
+# each sample starts (sample i is data[offsets[i]:offsets[i + 1]]) and a
+# labels array, all named by a JSON index.
+
+import json
+import os
+
+import numpy as np
+
+
+def write_chunks(data_path, results):
+    """
+    Writes chunk results to a store's data file and returns the sample offsets.
+
+    Chunks are appended to the file in order as they finish, so `results`
+    may be a lazy iterator, such as a process pool's map. The file only
+    appears under `data_path` once every chunk is written.
+
+    Args:
+        data_path (str): Where the flat data array is written.
+        results (iterable): (array, lengths) per chunk: the chunk's samples
+            concatenated along the first axis, and the length of each.
+
+    Returns:
+        np.ndarray: int64 offsets, one more than the number of samples.
+    """
+    lengths = []
+    with open(data_path + ".tmp", "wb") as f:
+        for data, chunk_lengths in results:
+            f.write(data.tobytes())
+            lengths.append(chunk_lengths)
+    os.replace(data_path + ".tmp", data_path)
+
+    lengths = np.concatenate(lengths) if lengths else np.zeros(0, dtype=np.int64)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+class RaggedDataset:
+    """
+    A map-style dataset over a store of variable-length samples.
+
+    Samples are (data, label), the data being a read-only view into the
+    memory-mapped data array. Arrays are opened lazily in each process,
+    which makes the dataset safe to hand to multi-process data loaders.
+
+    Subclasses set DATA_KEY, the index entry naming the data file, and
+    implement _layout.
+    """
+    DATA_KEY = None
+
+    def __init__(self, index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.index_path = index_path
+        self.key = os.path.splitext(os.path.basename(index_path))[0]
+        self.classes = self.index["classes"]
+        self._data = None
+        self._offsets = None
+        self._labels = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_data"] = state["_offsets"] = state["_labels"] = None
+        return state
+
+    def __len__(self):
+        return self.index["num_samples"]
+
+    def _path(self, name):
+        return os.path.join(os.path.dirname(self.index_path), self.index[name])
+
+    def _layout(self):
+        """Returns the (dtype, shape) of the whole data array."""
+        raise NotImplementedError
+
+    @property
+    def data(self):
+        if self._data is None:
+            dtype, shape = self._layout()
+            # np.memmap cannot map an empty file
+            if shape[0]:
+                self._data = np.memmap(self._path(self.DATA_KEY), dtype=dtype, mode="r", shape=shape)
+            else:
+                self._data = np.zeros(shape, dtype=dtype)
+        return self._data
+
+    @property
+    def offsets(self):
+        if self._offsets is None:
+            self._offsets = np.load(self._path("offsets"), mmap_mode="r")
+        return self._offsets
+
+    @property
+    def labels(self):
+        if self._labels is None:
+            self._labels = np.load(self._path("labels"), mmap_mode="r")
+        return self._labels
+
+    @property
+    def lengths(self):
+        """The length of every sample along the data's first axis."""
+        return np.diff(self.offsets)
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"Sample index {idx} out of range for dataset of size {len(self)}.")
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        return self.data[start:end], int(self.labels[idx])
@@ -0,0 +1,275 @@
+# backend/scheduler.py
+
+# This module runs backend pipelines as jobs in a pool of worker processes.
+# Jobs wait in a priority queue and are handed to idle workers, up to a
+# configurable concurrency limit. Each job's status messages are streamed
+# back to the submitting process, and jobs can be cancelled whether they are
+# still queued or already running. Because jobs run in separate processes,
+# they neither share the GIL with the GUI's Tk loop nor with each other.
+#
+# Every worker reports through its own event queue, drained by a reader
+# thread into one in-process queue. Cancelling a running job terminates its
+# worker, which may leave that worker's queue half-written; since no other
+# worker uses it, the rest of the pool is unaffected. When a worker process
+# dies on its own, its reader thread reports that after the worker's last
+# event, so the crash is noticed however busy the other workers are.
+
+import heapq
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import traceback
+
+from backend import pipeline
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+_EXITED = "exited"
+
+
+class Job:
+    """The state of one submitted job, as seen by the scheduler."""
+    def __init__(self, job_id, params, priority, target):
+        self.id = job_id
+        self.params = params
+        self.priority = priority
+        self.target = target
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+
+    @property
+    def done(self):
+        return self.status in (SUCCEEDED, FAILED, CANCELLED)
+
+
+def _worker_main(inbox, events, default_threads):
+    """Worker process loop: runs jobs from `inbox` and reports through `events`."""
+    while True:
+        task = inbox.get()
+        if task is None:
+            break
+        job_id, target, params = task
+        threads = params.get("num_threads") or default_threads
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+
+        def status_callback(message):
+            events.put((job_id, "status", message))
+
+        try:
+            result = target(params, status_callback)
+            events.put((job_id, SUCCEEDED, result))
+        except Exception as e:
+            events.put((job_id, FAILED, f"{e}\n{traceback.format_exc()}"))
+
+
+class _Worker:
+    def __init__(self, ctx, sink, default_threads):
+        self.inbox = ctx.Queue()
+        self.events = ctx.Queue()
+        self.process = ctx.Process(target=_worker_main, args=(self.inbox, self.events, default_threads))
+        self.process.start()
+        self.job_id = None
+        self._stopped = threading.Event()
+        self.reader = threading.Thread(target=self._forward, args=(sink,), daemon=True)
+        self.reader.start()
+
+    def _forward(self, sink):
+        """
+        Moves this worker's events to `sink` until it is terminated, or until
+        its process exits, which is then reported to `sink` as well.
+        """
+        while not self._stopped.is_set():
+            try:
+                event = self.events.get(timeout=0.5)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    break
+                continue
+            except (EOFError, OSError, ValueError):
+                break  # the queue was left broken by a dying process
+            sink.put(event)
+        if not self._stopped.is_set():
+            sink.put((self.job_id, _EXITED, self))
+
+    def terminate(self):
+        """Kills the worker process and abandons its queues."""
+        self._stopped.set()
+        self.process.terminate()
+        self.process.join()
+        self.reader.join()
+
+
+class JobScheduler:
+    """
+    A priority job queue served by a pool of worker processes.
+
+    Lower `priority` values run first; jobs of equal priority run in
+    submission order.
+    """
+    def __init__(self, max_workers=None, threads_per_job=None, on_status=None, on_finished=None, target=pipeline.run_pipeline):
+        """
+        Args:
+            max_workers (int): Maximum number of jobs running at once. Defaults to 2.
+            threads_per_job (int): torch CPU threads per job. Defaults to an even
+                share of the host's cores. A job's `num_threads` param overrides it.
+            on_status (function): Called as on_status(job, message) for every status message.
+            on_finished (function): Called as on_finished(job) when a job ends.
+            target (function): The default function run for each job, called as
+                target(params, status_callback). Must be importable by the workers.
+        """
+        self.max_workers = max_workers or 2
+        self.threads_per_job = threads_per_job or max(1, (os.cpu_count() or 1) // self.max_workers)
+        self.on_status = on_status
+        self.on_finished = on_finished
+        self.target = target
+
+        self._ctx = mp.get_context("spawn")
+        self._events = queue.Queue()
+        self._jobs = {}
+        self._heap = []
+        self._workers = []
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._closed = False
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+
+    def submit(self, params, priority=0, target=None):
+        """Queues a job and returns its id."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Cannot submit jobs to a scheduler that has been shut down.")
+            job = Job(next(self._ids), params, priority, target or self.target)
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (priority, job.id))
+            self._dispatch()
+        return job.id
+
+    def cancel(self, job_id):
+        """
+        Cancels a queued or running job. A running job's worker process is
+        terminated, together with its private event queue, and replaced.
+
+        Returns:
+            bool: True if the job was cancelled, False if it had already finished.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return False
+            if job.status == RUNNING:
+                for worker in self._workers:
+                    if worker.job_id == job_id:
+                        worker.terminate()
+                        self._workers.remove(worker)
+                        break
+            job.status = CANCELLED
+            self._dispatch()
+        self._notify_finished(job)
+        return True
+
+    def job(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        """Returns all jobs in submission order."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def wait(self, timeout=None):
+        """Blocks until every submitted job has finished. Returns False on timeout."""
+        with self._changed:
+            return self._changed.wait_for(lambda: all(job.done for job in self._jobs.values()), timeout)
+
+    def shutdown(self, cancel_pending=True):
+        """Stops the scheduler. Running jobs are cancelled when `cancel_pending` is True."""
+        with self._lock:
+            self._closed = True
+            if cancel_pending:
+                for job in list(self._jobs.values()):
+                    if not job.done:
+                        self.cancel(job.id)
+            for worker in self._workers:
+                worker.inbox.put(None)
+        for worker in list(self._workers):
+            worker.process.join()
+            worker.reader.join()
+        self._events.put(None)
+        self._listener.join()
+
+    def _dispatch(self):
+        """Hands queued jobs to idle workers, starting workers up to max_workers."""
+        while self._heap:
+            worker = next((w for w in self._workers if w.job_id is None), None)
+            if worker is None:
+                if len(self._workers) >= self.max_workers:
+                    return
+                worker = _Worker(self._ctx, self._events, self.threads_per_job)
+                self._workers.append(worker)
+            _, job_id = heapq.heappop(self._heap)
+            job = self._jobs[job_id]
+            if job.status != QUEUED:
+                continue
+            job.status = RUNNING
+            worker.job_id = job_id
+            worker.inbox.put((job_id, job.target, job.params))
+
+    def _listen(self):
+        """Routes worker events to the callbacks and reaps exited workers."""
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            job_id, kind, payload = event
+            if kind == _EXITED:
+                self._reap(payload)
+                continue
+            # Checked and updated under the lock, so a job cancelled in the
+            # meantime is never marked finished a second time. The callbacks
+            # run after the lock is released, so they may call back into the
+            # scheduler without holding up other threads.
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job.done:
+                    continue
+                if kind != "status":
+                    job.status = kind
+                    if kind == SUCCEEDED:
+                        job.result = payload
+                    else:
+                        job.error = payload
+                    for worker in self._workers:
+                        if worker.job_id == job_id:
+                            worker.job_id = None
+                    self._dispatch()
+            if kind == "status":
+                if self.on_status:
+                    self.on_status(job, payload)
+                continue
+            self._notify_finished(job)
+
+    def _reap(self, worker):
+        """Removes a worker whose process exited, failing the job it was running."""
+        with self._lock:
+            if worker not in self._workers:
+                return
+            self._workers.remove(worker)
+            job = self._jobs.get(worker.job_id)
+            if job is None or job.done:
+                return
+            job.status = FAILED
+            job.error = f"Worker process exited unexpectedly (exit code {worker.process.exitcode})."
+            if not self._closed:
+                self._dispatch()
+        self._notify_finished(job)
+
+    def _notify_finished(self, job):
+        if self.on_finished:
+            self.on_finished(job)
+        with self._changed:
+            self._changed.notify_all()
@@ -0,0 +1,427 @@
+# backend/serving.py
+
+# This module serves a trained model over HTTP on localhost with dynamic
+# batching. Incoming requests wait in a queue. A pool of worker threads each
+# takes the oldest request plus whatever else arrives within `max_wait_ms`,
+# up to `max_batch_size` requests, and runs them through the model as one
+# batch. While every worker is busy, requests keep accumulating, so batches
+# grow with load and shrink back to single requests when traffic is light.
+#
+# The saved artifact is loaded the way the builder wrote it: the exported
+# TorchScript file next to the weights if there is one (this also covers
+# pruned and quantized models), otherwise the MODEL_MAP model is rebuilt
+# with model_loader and the state_dict is loaded into it. Only image models
+# are served: requests carry float tensors, not token ids or audio.
+#
+# Endpoints:
+#   GET  /health    model and batching settings
+#   GET  /metrics   throughput, latency percentiles, batch sizes, queue depth
+#   POST /predict   one sample or a batch of samples, as JSON {"inputs": [...]}
+#                   or raw little-endian float32 bytes (Content-Type:
+#                   application/octet-stream) in the model's input shape.
+#                   If the input shape is unknown (no export report and no
+#                   --input-shape), JSON inputs are always read as a batch.
+#                   Empty requests and samples of the wrong shape get a 400.
+
+import http.client
+import json
+import os
+import queue
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import torch
+
+from backend import inference_bench, model_loader, optizer
+
+LOCALHOST = ("127.0.0.1", "localhost", "::1")
+DEFAULT_PORT = 8000
+DEFAULT_SERVING_CONFIG = {
+    "max_batch_size": 32,
+    "max_wait_ms": 5.0,
+    "workers": 2,
+    "threads_per_worker": None,   # None = split the cores evenly between workers
+}
+
+
+def load_artifact(path, model_choice=None, status_callback=print):
+    """
+    Loads a saved model for inference.
+
+    Args:
+        path (str): The saved weights (e.g. trained_model.pth) or a TorchScript file.
+        model_choice (str): The MODEL_MAP family the weights belong to; only
+            needed when no TorchScript export exists.
+        status_callback (function): A function to send status updates.
+
+    Returns:
+        tuple: (model, input_shape), where input_shape is the per-sample shape
+        recorded by the export stage, or None if unknown.
+
+    Raises:
+        ValueError: If the model family is not an image model, or the weights
+            do not fit the rebuilt model (e.g. after pruning, which changes
+            layer shapes; serve the TorchScript export instead).
+    """
+    if model_choice and model_loader.MODALITIES.get(model_choice) != "image":
+        raise ValueError(f"Serving supports image models only; '{model_choice}' takes "
+                         f"{model_loader.MODALITIES.get(model_choice, 'unknown')} inputs.")
+    base = os.path.splitext(path)[0]
+    if base.endswith(".torchscript"):
+        base = os.path.splitext(base)[0]
+    input_shape = None
+    export_report = base + ".export.json"
+    if os.path.exists(export_report):
+        with open(export_report, "r", encoding="utf-8") as f:
+            input_shape = json.load(f).get("input_shape")
+
+    scripted = base + ".torchscript.pt"
+    if os.path.exists(scripted):
+        status_callback(f"[Serving] Loading TorchScript model from {scripted}")
+        return torch.jit.load(scripted, map_location="cpu").eval(), input_shape
+
+    if not model_choice:
+        raise ValueError(f"No TorchScript export found for {path}; pass the model family it was trained from.")
+    model = model_loader.load_model(model_choice, status_callback)
+    if not hasattr(model, "load_state_dict"):
+        raise ValueError(f"Model '{model_choice}' could not be loaded as a PyTorch module.")
+    try:
+        model.load_state_dict(torch.load(path, map_location="cpu"))
+    except RuntimeError as e:
+        raise ValueError(f"The weights in {path} do not fit the {model_choice} model (were they pruned or "
+                         f"quantized? serve the TorchScript export instead): {e}") from e
+    status_callback(f"[Serving] Loaded {model_choice} weights from {path}")
+    return model.eval(), input_shape
+
+
+class _Request:
+    __slots__ = ("sample", "future", "arrived")
+
+    def __init__(self, sample):
+        self.sample = sample
+        self.future = Future()
+        self.arrived = time.perf_counter()
+
+
+class ServerMetrics:
+    """Thread-safe counters plus a sliding window of recent request latencies."""
+    def __init__(self, window=10000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._batch_sizes = deque(maxlen=window)
+        self._completions = deque(maxlen=window)
+        self.started = time.time()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+
+    def record_batch(self, latencies_ms, failed=False):
+        now = time.time()
+        with self._lock:
+            self.batches += 1
+            self.requests += len(latencies_ms)
+            if failed:
+                self.errors += len(latencies_ms)
+            self._batch_sizes.append(len(latencies_ms))
+            self._latencies.extend(latencies_ms)
+            self._completions.extend([now] * len(latencies_ms))
+
+    def snapshot(self, queue_depth=0):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            batch_sizes = list(self._batch_sizes)
+            completions = list(self._completions)
+            requests, batches, errors = self.requests, self.batches, self.errors
+        now = time.time()
+        recent = [t for t in completions if now - t <= 10.0]
+        return {
+            "uptime_s": now - self.started,
+            "requests": requests,
+            "batches": batches,
+            "errors": errors,
+            "queue_depth": queue_depth,
+            "throughput_rps": len(recent) / min(10.0, max(now - self.started, 1e-9)),
+            "mean_batch_size": statistics.fmean(batch_sizes) if batch_sizes else 0.0,
+            "max_batch_size": max(batch_sizes, default=0),
+            "latency_ms": {
+                "p50": inference_bench.percentile(latencies, 50),
+                "p95": inference_bench.percentile(latencies, 95),
+                "p99": inference_bench.percentile(latencies, 99),
+            },
+        }
+
+
+class DynamicBatcher:
+    """
+    Groups single-sample requests into batches and runs them on a worker pool.
+
+    Only one worker collects a batch at a time; the others are either running
+    the model or waiting for their turn to collect, so a batch always holds
+    every request that queued up while the workers were busy.
+    """
+    def __init__(self, model, max_batch_size=32, max_wait_ms=5.0, workers=2, threads_per_worker=None):
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.workers = max(1, int(workers))
+        self.metrics = ServerMetrics()
+        self._queue = queue.Queue()
+        self._collect_lock = threading.Lock()
+        self._closed = False
+        torch.set_num_threads(threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers))
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, sample):
+        """Queues one sample (a tensor without batch dimension) and returns a Future of its output row."""
+        if self._closed:
+            raise RuntimeError("The batcher is closed.")
+        request = _Request(sample)
+        self._queue.put(request)
+        return request.future
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            self._queue.put(None)  # let the other workers see the shutdown too
+            return None
+        batch = [first]
+        deadline = first.arrived + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _worker(self):
+        while True:
+            with self._collect_lock:
+                batch = self._collect()
+            if batch is None:
+                return
+            self._run(batch)
+
+    def _run(self, batch):
+        # Samples of different shapes (possible while the input shape is
+        # unknown) run as separate batches, so one client's bad input never
+        # fails the requests of another
+        groups = {}
+        for request in batch:
+            groups.setdefault(tuple(request.sample.shape), []).append(request)
+        for group in groups.values():
+            self._run_batch(group)
+
+    def _run_batch(self, batch):
+        try:
+            with torch.no_grad():
+                outputs = optizer.forward(self.model, torch.stack([request.sample for request in batch]))
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            failed = True
+        else:
+            for request, output in zip(batch, outputs):
+                request.future.set_result(output)
+            failed = False
+        done = time.perf_counter()
+        self.metrics.record_batch([(done - request.arrived) * 1000.0 for request in batch], failed=failed)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "ModelBuilderServing/1.0"
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients do not reconnect per request
+
+    def log_message(self, format, *args):
+        pass  # one line per request would flood the status log
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        batcher = self.server.batcher
+        if self.path == "/health":
+            self._send_json(200, {
+                "status": "ok",
+                "model": self.server.model_name,
+                "input_shape": self.server.input_shape,
+                "max_batch_size": batcher.max_batch_size,
+                "max_wait_ms": batcher.max_wait * 1000.0,
+                "workers": batcher.workers,
+            })
+        elif self.path == "/metrics":
+            self._send_json(200, batcher.metrics.snapshot(batcher.queue_depth()))
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            samples, single = self._split_samples(self._parse_inputs(body))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        futures = [self.server.batcher.submit(sample) for sample in samples]
+        try:
+            outputs = torch.stack([future.result() for future in futures])
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        payload = {"outputs": outputs.tolist(), "predictions": outputs.argmax(dim=-1).tolist()}
+        if single:
+            payload = {"outputs": payload["outputs"][0], "predictions": payload["predictions"][0]}
+        self._send_json(200, payload)
+
+    def _parse_inputs(self, body):
+        if self.headers.get("Content-Type") == "application/octet-stream":
+            if self.server.input_shape is None:
+                raise ValueError("Raw float32 input needs a known input shape; send JSON instead.")
+            array = np.frombuffer(body, dtype="<f4")
+            return torch.from_numpy(array.reshape(-1, *self.server.input_shape).copy())
+        return torch.tensor(json.loads(body)["inputs"], dtype=torch.float32)
+
+    def _split_samples(self, inputs):
+        """
+        Splits parsed inputs into samples, checking each against the input
+        shape (or, while it is unknown, against the first sample).
+
+        Returns:
+            tuple: (samples, single), where single is True if one unbatched
+            sample was sent.
+        """
+        input_shape = self.server.input_shape
+        if input_shape is not None and inputs.dim() == len(input_shape):
+            samples, single = [inputs], True
+        elif inputs.dim() and len(inputs):
+            samples, single = list(inputs), False
+        else:
+            raise ValueError("The request holds no input samples.")
+        expected = input_shape if input_shape is not None else list(samples[0].shape)
+        for sample in samples:
+            if list(sample.shape) != expected:
+                raise ValueError(f"Expected samples of shape {expected}, got {list(sample.shape)}.")
+        return samples, single
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # many clients connect at once under load
+
+
+def make_server(model, host="127.0.0.1", port=DEFAULT_PORT, input_shape=None, model_name=None, config=None):
+    """
+    Creates (but does not start) a batching HTTP server for `model`.
+
+    Raises:
+        ValueError: If `host` is not a localhost address.
+    """
+    if host not in LOCALHOST:
+        raise ValueError(f"The inference server only listens on localhost, not {host!r}.")
+    config = {**DEFAULT_SERVING_CONFIG, **(config or {})}
+    server = _Server((host, port), _Handler)
+    server.batcher = DynamicBatcher(model, config["max_batch_size"], config["max_wait_ms"],
+                                    config["workers"], config["threads_per_worker"])
+    server.input_shape = list(input_shape) if input_shape else None
+    server.model_name = model_name or type(model).__name__
+    return server
+
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+    server.batcher.close()
+
+
+def generate_load(host, port, input_shape, requests=1000, concurrency=16, seed=0):
+    """
+    Sends `requests` single-sample predictions from `concurrency` client threads.
+
+    Each client keeps one connection open and sends raw float32 samples of
+    `input_shape`, so client-side encoding stays cheap.
+
+    Returns:
+        dict: Client-side throughput and latency percentiles plus the server's /metrics.
+    """
+    generator = np.random.default_rng(seed)
+    payloads = [generator.standard_normal(input_shape, dtype=np.float32).tobytes() for _ in range(8)]
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client():
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+        own = []
+        try:
+            for i in counter:
+                start = time.perf_counter()
+                connection.request("POST", "/predict", body=payloads[i % len(payloads)],
+                                   headers={"Content-Type": "application/octet-stream"})
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    with lock:
+                        errors.append(response.status)
+                own.append((time.perf_counter() - start) * 1000.0)
+        finally:
+            connection.close()
+            with lock:
+                latencies.extend(own)
+
+    start = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    connection.request("GET", "/metrics")
+    server_metrics = json.loads(connection.getresponse().read())
+    connection.close()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else float("nan"),
+        "latency_ms": {
+            "mean": statistics.fmean(latencies) if latencies else float("nan"),
+            "p50": inference_bench.percentile(latencies, 50),
+            "p95": inference_bench.percentile(latencies, 95),
+            "p99": inference_bench.percentile(latencies, 99),
+        },
+        "server": server_metrics,
+    }
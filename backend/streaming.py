@@ -0,0 +1,134 @@
+# backend/streaming.py
+
+# This module streams a preprocessed dataset (the shards written by
+# dataset_cache.build_cache) instead of indexing it at random, so training
+# memory stays constant however large the dataset is.
+#
+# Each data loader worker reads a disjoint subset of the shards from start to
+# end, one shard at a time, and unmaps a shard once it is done with it. Samples
+# are mixed with a bounded shuffle buffer: shard order is shuffled per epoch,
+# and each sample is swapped with a random buffer slot before it is yielded.
+#
+# The order of samples depends only on (seed, epoch, number of workers, batch
+# size), so a run stopped in the middle of an epoch can resume after exactly
+# the batches it had already trained on.
+
+import random
+
+import numpy as np
+from torch.utils.data import IterableDataset, get_worker_info
+
+from backend import dataset_cache
+
+class StreamingDataset(IterableDataset):
+    """
+    An iterable dataset over some of the shards of a dataset cache.
+
+    Call `set_epoch` before every epoch: it selects the shard order and
+    shuffle seed, and how many batches to skip when resuming mid-epoch.
+    """
+    def __init__(self, index_path, shard_ids=None, shuffle=True, shuffle_buffer=2048, seed=0, batch_size=1):
+        self.source = dataset_cache.ShardedDataset(index_path)
+        self.key = self.source.key
+        self.classes = self.source.classes
+        self.shard_ids = list(range(len(self.source.index["shards"]))) if shard_ids is None else list(shard_ids)
+        self.shuffle = shuffle
+        self.shuffle_buffer = max(1, shuffle_buffer)
+        self.seed = seed
+        self.batch_size = batch_size
+        self.epoch = 0
+        self.skip_batches = 0
+
+    def __len__(self):
+        return sum(self.shard_count(shard_id) for shard_id in self.shard_ids)
+
+    def shard_count(self, shard_id):
+        return self.source.index["shards"][shard_id]["count"]
+
+    def set_epoch(self, epoch, skip_batches=0):
+        """Selects the epoch to stream and the number of already trained batches to skip."""
+        self.epoch = epoch
+        self.skip_batches = skip_batches
+
+    def worker_shards(self, worker_id, num_workers):
+        """Returns the shards one worker reads this epoch, in reading order."""
+        order = list(self.shard_ids)
+        if self.shuffle:
+            random.Random(f"{self.seed}-{self.epoch}").shuffle(order)
+        return order[worker_id::num_workers]
+
+    def resume_plan(self, num_workers):
+        """
+        Works out how to resume after `skip_batches` batches of this epoch.
+
+        The DataLoader takes batches from its workers in round-robin order,
+        skipping workers that have run out, so the batches each worker had
+        already contributed can be counted without reading any data. A resumed
+        loader starts again at worker 0, so worker ids are rotated to make the
+        worker that was due next go first.
+
+        Returns:
+            tuple: (samples to skip per logical worker, rotation)
+        """
+        if not self.skip_batches:
+            return [0] * num_workers, 0
+        remaining = []
+        for worker in range(num_workers):
+            count = sum(self.shard_count(shard_id) for shard_id in self.worker_shards(worker, num_workers))
+            remaining.append(-(-count // self.batch_size))
+        taken = [0] * num_workers
+        batches = turn = 0
+        while batches < self.skip_batches and any(remaining):
+            worker, turn = turn, (turn + 1) % num_workers
+            if remaining[worker]:
+                remaining[worker] -= 1
+                taken[worker] += 1
+                batches += 1
+        return [count * self.batch_size for count in taken], turn
+
+    def _read_shards(self, shard_ids):
+        for shard_id in shard_ids:
+            # Read each shard sequentially, then unmap it so its pages are released
+            shard = self.source.shard(shard_id)
+            start = self.source.offsets[shard_id]
+            labels = np.array(self.source.labels[start:start + len(shard)])
+            for i in range(len(shard)):
+                yield np.array(shard[i]), int(labels[i])
+            del shard
+            self.source.release(shard_id)
+
+    def __iter__(self):
+        info = get_worker_info()
+        worker_id, num_workers = (info.id, info.num_workers) if info else (0, 1)
+        skips, rotation = self.resume_plan(num_workers)
+        worker_id = (worker_id + rotation) % num_workers
+        samples = self._read_shards(self.worker_shards(worker_id, num_workers))
+        to_skip = skips[worker_id]
+        if self.shuffle:
+            samples = self._shuffled(samples, random.Random(f"{self.seed}-{self.epoch}-{worker_id}"))
+        for sample in samples:
+            if to_skip:
+                to_skip -= 1
+                continue
+            yield sample
+
+    def _shuffled(self, samples, rng):
+        buffer = []
+        for sample in samples:
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(sample)
+                continue
+            slot = rng.randrange(len(buffer))
+            yield buffer[slot]
+            buffer[slot] = sample
+        rng.shuffle(buffer)
+        yield from buffer
+
+
+def split_shards(index_path, val_split, seed):
+    """Splits the shards of a dataset cache into (train_shard_ids, val_shard_ids)."""
+    source = dataset_cache.ShardedDataset(index_path)
+    shard_ids = list(range(len(source.index["shards"])))
+    random.Random(seed).shuffle(shard_ids)
+    val_count = int(round(len(shard_ids) * val_split)) if len(shard_ids) > 1 else 0
+    return sorted(shard_ids[val_count:]), sorted(shard_ids[:val_count])
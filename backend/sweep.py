@@ -0,0 +1,260 @@
+# backend/sweep.py
+
+# This module runs hyperparameter sweeps over the training parameters
+# (lr, optimizer_type, fine_tune, ...) using successive halving or Hyperband.
+# Every trial first trains for a small number of epochs; only the best
+# 1/eta of the trials at each rung are trained further, so losing configs
+# are stopped after a fraction of the full budget; survivors resume from
+# their last checkpoint. Trials of one rung run in parallel on the job
+# scheduler's worker processes, and each trial's result at each rung is
+# recorded in an SQLite table that can be queried afterwards.
+#
+# Epochs are the budget being allocated: `max_epochs` is what a surviving
+# trial is trained for in total, and `min_epochs` is its first rung.
+#
+# A sweep spec is a params dict (as for the CLI) with an extra "sweep" entry:
+#   model_choice: BERT
+#   dataset_source: Built-in
+#   dataset_info: IMDB
+#   sweep:
+#     method: hyperband         # or successive_halving
+#     space:
+#       lr: {min: 0.0001, max: 0.1, log: true}
+#       optimizer_type: [Adam, SGD]
+#       fine_tune: [true, false]
+#     num_samples: 27           # random configs (grid search if omitted)
+#     min_epochs: 1
+#     max_epochs: 27
+#     eta: 3
+#     workers: 4
+
+import itertools
+import json
+import math
+import os
+import random
+import sqlite3
+import time
+
+from backend import model_loader, dataset_utils, train, optizer
+from backend.scheduler import JobScheduler, SUCCEEDED
+
+SWEEP_DIR = os.path.join(os.getcwd(), "sweeps")
+
+DEFAULT_SWEEP = {
+    "method": "successive_halving",
+    "space": {},
+    "num_samples": None,
+    "min_epochs": 1,
+    "max_epochs": None,
+    "eta": 3,
+    "workers": None,
+    "seed": 0,
+}
+
+
+def grid_configs(space):
+    """Returns every combination of the listed values in `space`."""
+    keys = sorted(space)
+    values = [space[key] if isinstance(space[key], list) else [space[key]] for key in keys]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def sample_value(spec, rng):
+    """Draws one value from a list of choices or a {min, max, log} range."""
+    if isinstance(spec, list):
+        return rng.choice(spec)
+    if isinstance(spec, dict):
+        low, high = spec["min"], spec["max"]
+        if spec.get("log"):
+            return math.exp(rng.uniform(math.log(low), math.log(high)))
+        if isinstance(low, int) and isinstance(high, int):
+            return rng.randint(low, high)
+        return rng.uniform(low, high)
+    return spec
+
+
+def random_configs(space, num_samples, rng):
+    keys = sorted(space)
+    return [{key: sample_value(space[key], rng) for key in keys} for _ in range(num_samples)]
+
+
+def rung_epochs(min_epochs, max_epochs, eta):
+    """Returns the cumulative epoch budget of each rung, e.g. [1, 3, 9, 27]."""
+    rungs = []
+    epochs = min_epochs
+    while epochs < max_epochs:
+        rungs.append(int(round(epochs)))
+        epochs *= eta
+    rungs.append(max_epochs)
+    return sorted(set(rungs))
+
+
+class ResultsTable:
+    """An SQLite table with one row per trial per rung."""
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS trials (
+                    sweep TEXT, trial INTEGER, bracket INTEGER, rung INTEGER, epochs INTEGER,
+                    lr REAL, optimizer_type TEXT, fine_tune INTEGER, params TEXT,
+                    val_loss REAL, val_acc REAL, seconds REAL, status TEXT, error TEXT)"""
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def record(self, sweep, trial, bracket, rung, epochs, config, result, seconds, status, error=None):
+        result = result or {}
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sweep, trial, bracket, rung, epochs, config.get("lr"), config.get("optimizer_type"),
+                 config.get("fine_tune"), json.dumps(config, sort_keys=True), result.get("val_loss"),
+                 result.get("val_acc"), seconds, status, error),
+            )
+
+    def query(self, sql, args=()):
+        """Runs a read query and returns the rows as dicts."""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, args)]
+
+    def best(self, sweep, limit=5):
+        """
+        Returns the best results of a sweep, deepest rung first, then lowest
+        validation loss. Trials without a loss (NaN is stored as NULL) sort last.
+        """
+        return self.query(
+            "SELECT * FROM trials WHERE sweep = ? AND status = 'succeeded' "
+            "ORDER BY epochs DESC, val_loss IS NULL, val_loss ASC LIMIT ?",
+            (sweep, limit),
+        )
+
+
+def run_trial(params, status_callback):
+    """
+    Scheduler job target: trains one trial up to params["epochs"] total epochs,
+    resuming from the checkpoint it wrote at its previous rung.
+
+    Returns:
+        dict: The trial's validation loss and accuracy.
+    """
+    model = model_loader.load_model(params["model_choice"], status_callback, revision=params.get("model_revision"))
+    dataset, train_loader, val_loader = train.prepare_data(params["dataset_info"], params, status_callback)
+    optizer.train(
+        model, (train_loader, val_loader),
+        epochs=params["epochs"], lr=params["lr"], optimizer_type=params["optimizer_type"],
+        fine_tune=params["fine_tune"], status_callback=status_callback,
+        feature_cache_key=train.feature_cache_key(model, params, dataset, train_loader, val_loader),
+        save_path=os.path.join(params["trial_dir"], "model.pth"),
+        checkpoint_dir=params["trial_dir"], keep_checkpoints=1, resume=True,
+    )
+    val_loss, val_acc = optizer.evaluate(model, val_loader)
+    return {"val_loss": val_loss, "val_acc": val_acc}
+
+
+def _format(value, spec):
+    return "n/a" if value is None else format(value, spec)
+
+
+def _rank_key(trial):
+    loss = (trial.get("result") or {}).get("val_loss")
+    return math.inf if loss is None or math.isnan(loss) else loss
+
+
+def successive_halving(sweep, configs, min_epochs, max_epochs, eta, base_params, scheduler, table, status_callback, bracket=0, first_trial=1):
+    """
+    Runs one successive-halving bracket and returns its trials, best first.
+    """
+    trials = [
+        {"id": first_trial + i, "config": config, "result": None}
+        for i, config in enumerate(configs)
+    ]
+    for rung, epochs in enumerate(rung_epochs(min_epochs, max_epochs, eta)):
+        status_callback(f"[Sweep] Bracket {bracket}, rung {rung}: training {len(trials)} trial(s) to {epochs} epoch(s).")
+        jobs = {}
+        for trial in trials:
+            trial_dir = os.path.join(SWEEP_DIR, sweep, f"trial-{trial['id']}")
+            os.makedirs(trial_dir, exist_ok=True)
+            params = {
+                **base_params, **trial["config"],
+                "epochs": epochs, "trial_dir": trial_dir,
+            }
+            jobs[scheduler.submit(params, target=run_trial)] = (trial, time.time())
+        scheduler.wait()
+
+        for job_id, (trial, started) in jobs.items():
+            job = scheduler.job(job_id)
+            trial["result"] = job.result if job.status == SUCCEEDED else None
+            error = job.error.splitlines()[0] if job.error else None
+            table.record(sweep, trial["id"], bracket, rung, epochs, trial["config"], trial["result"],
+                         time.time() - started, job.status, error)
+
+        trials.sort(key=_rank_key)
+        best = trials[0]
+        status_callback(f"[Sweep] Rung {rung} best: trial {best['id']} {best['config']} -> {best['result']}")
+        if epochs >= max_epochs:
+            break
+        trials = [t for t in trials[:max(1, len(trials) // eta)] if t["result"] is not None] or trials[:1]
+    return trials
+
+
+def run_sweep(spec, status_callback, name=None):
+    """
+    Runs a sweep described by `spec` (a params dict with a "sweep" entry).
+
+    Returns:
+        tuple: (results_table, sweep_name)
+    """
+    spec = dict(spec)
+    options = {**DEFAULT_SWEEP, **spec.pop("sweep", {})}
+    if options["method"] not in ("successive_halving", "hyperband"):
+        raise ValueError(f"Unknown sweep method: {options['method']}")
+    space = dict(options["space"])
+    base_params = spec
+    max_epochs = options["max_epochs"]
+    if "epochs" in space:
+        epochs = space.pop("epochs")
+        max_epochs = max_epochs or (max(epochs) if isinstance(epochs, list) else epochs)
+    max_epochs = int(max_epochs or base_params.get("epochs", 10))
+    min_epochs = min(int(options["min_epochs"]), max_epochs)
+    eta = options["eta"]
+    rng = random.Random(options["seed"])
+    name = name or time.strftime("sweep-%Y%m%d-%H%M%S")
+
+    # Resolve the dataset once so trials do not each download/prepare it.
+    dataset_path = dataset_utils.load_dataset(base_params["dataset_source"], base_params["dataset_info"], status_callback)
+    base_params = {**base_params, "dataset_source": "Custom", "dataset_info": dataset_path, "prune": False, "quantize": False, "export": False}
+
+    table = ResultsTable(os.path.join(SWEEP_DIR, "results.db"))
+    scheduler = JobScheduler(
+        max_workers=options["workers"] or max(1, (os.cpu_count() or 1) // 4),
+        on_status=lambda job, message: status_callback(f"[Sweep] job {job.id}: {message}"),
+    )
+    status_callback(f"[Sweep] Starting {options['method']} sweep '{name}' (eta={eta}, epochs {min_epochs}..{max_epochs}).")
+    try:
+        if options["method"] == "hyperband":
+            s_max = int(math.log(max_epochs / min_epochs, eta) + 1e-9)
+            next_trial = 1
+            for s in range(s_max, -1, -1):
+                n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+                configs = random_configs(space, n, rng)
+                successive_halving(name, configs, max(min_epochs, int(max_epochs / eta ** s)), max_epochs, eta,
+                                   base_params, scheduler, table, status_callback, bracket=s, first_trial=next_trial)
+                next_trial += n
+        else:
+            if options["num_samples"]:
+                configs = random_configs(space, options["num_samples"], rng)
+            else:
+                configs = grid_configs(space)
+            successive_halving(name, configs, min_epochs, max_epochs, eta, base_params, scheduler, table, status_callback)
+    finally:
+        scheduler.shutdown()
+
+    for row in table.best(name, limit=3):
+        status_callback(f"[Sweep] Top trial {row['trial']}: {row['params']} val_loss={_format(row['val_loss'], '.4f')} "
+                        f"val_acc={_format(row['val_acc'], '.3f')}")
+    return table, name
@@ -0,0 +1,315 @@
+# backend/telemetry.py
+
+# This module gives the pipeline structured telemetry. Instead of free-text
+# progress lines, the backend emits typed events:
+#   stage_start / stage_end   a pipeline stage (model load, dataset prep,
+#                             training, pruning, ...) with its duration and
+#                             the peak memory so far
+#   step                      rolling step time, samples/sec, data wait and
+#                             loss, every `step_every` training steps
+#   epoch                     per-epoch totals
+#   batch_tuning              the batch size chosen by backend/batch_tuner.py
+#   profile                   where a torch.profiler trace was written
+#
+# A Telemetry object is used as the status_callback everywhere, so plain
+# text messages keep working. Events travel through the same callback as
+# dicts; the GUI and CLI turn them into log lines with `as_text` and can
+# also read their fields. Each run can also record every message and event
+# to <run_dir>/events.jsonl and write the stage timings as a Chrome trace
+# (stages.trace.json, open it in chrome://tracing or Perfetto).
+#
+# With profiling enabled, a few training steps are captured with
+# torch.profiler and exported as profile.trace.json plus a JSON summary of
+# the most expensive operators.
+#
+# This module must not import PyTorch at the top: the GUI imports it to
+# format events.
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+RUNS_DIR = os.path.join(os.getcwd(), "logs", "runs")
+
+DEFAULT_PROFILE_CONFIG = {
+    "wait": 1,          # steps skipped before profiling
+    "warmup": 1,        # steps profiled but discarded
+    "active": 5,        # steps recorded
+    "top_ops": 25,      # operators listed in the summary
+    "record_shapes": False,
+    "profile_memory": True,
+}
+
+
+def peak_rss_mb():
+    """Returns the peak resident memory of this process in MB, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def format_event(event):
+    """Renders a telemetry event as one log line."""
+    kind = event.get("type")
+    if kind == "stage_start":
+        return f"[Telemetry] Stage '{event['stage']}' started"
+    if kind == "stage_end":
+        status = "finished" if event.get("ok", True) else "failed"
+        line = f"[Telemetry] Stage '{event['stage']}' {status} in {event['seconds']:.2f}s"
+        if event.get("peak_rss_mb") is not None:
+            line += f" (peak RSS {event['peak_rss_mb']:.0f} MB)"
+        return line
+    if kind == "step":
+        return (f"[Telemetry] Epoch {event['epoch']} step {event['step']}: {event['step_ms']:.1f} ms/step, "
+                f"{event['samples_per_sec']:.0f} samples/s, data wait {event['data_wait_ms']:.1f} ms, "
+                f"loss {event['loss']:.4f}")
+    if kind == "epoch":
+        total = event["data_wait_s"] + event["compute_s"]
+        wait_pct = 100.0 * event["data_wait_s"] / total if total else 0.0
+        line = (f"[Backend] Epoch {event['epoch']}/{event['epochs']} completed - data wait {event['data_wait_s']:.2f}s, "
+                f"compute {event['compute_s']:.2f}s ({wait_pct:.0f}% waiting on data), "
+                f"{event['samples_per_sec']:.0f} samples/s")
+        if event.get("loss") is not None:
+            line += f", loss {event['loss']:.4f}"
+        if event.get("peak_rss_mb") is not None:
+            line += f", peak RSS {event['peak_rss_mb']:.0f} MB"
+        return line
+    if kind == "batch_tuning":
+        processes = f" x {event['world_size']} processes" if event.get("world_size", 1) > 1 else ""
+        return (f"[Batch Tuner] Using batch size {event['batch_size']} x {event['accumulation_steps']} accumulation "
+                f"step(s){processes} = effective {event['effective_batch_size']}, "
+                f"{event['samples_per_sec']:.0f} samples/s")
+    if kind == "profile":
+        return f"[Telemetry] Profiler trace saved to {event['trace']} (summary: {event['summary']})"
+    fields = ", ".join(f"{key}={value}" for key, value in event.items() if key not in ("type", "time"))
+    return f"[Telemetry] {kind}: {fields}"
+
+
+def as_text(message):
+    """Returns a status message as text, formatting telemetry events."""
+    return format_event(message) if isinstance(message, dict) else str(message)
+
+
+class Telemetry:
+    """
+    A status callback that also emits typed events.
+
+    Args:
+        status_callback (function): Where messages and events are forwarded.
+        run_dir (str): If set, events.jsonl and stages.trace.json are written here.
+        structured (bool): Forward events as dicts (the receiver formats them
+            with `as_text`); if False, forward their text instead.
+        step_every (int): Emit a `step` event every this many training steps (0 disables).
+    """
+    def __init__(self, status_callback=print, run_dir=None, structured=True, step_every=50):
+        self.status_callback = status_callback
+        self.run_dir = run_dir
+        self.structured = structured
+        self.step_every = step_every
+        self._lock = threading.Lock()
+        self._spans = []
+        self._events_file = None
+        if run_dir:
+            os.makedirs(run_dir, exist_ok=True)
+            self._events_file = open(os.path.join(run_dir, "events.jsonl"), "a", encoding="utf-8")
+
+    def __call__(self, message):
+        self._record({"type": "message", "time": time.time(), "text": message})
+        self.status_callback(message)
+
+    def emit(self, kind, **fields):
+        """Emits one typed event."""
+        event = {"type": kind, "time": time.time(), **fields}
+        self._record(event)
+        self.status_callback(event if self.structured else format_event(event))
+        return event
+
+    def _record(self, event):
+        if self._events_file is None:
+            return
+        with self._lock:
+            self._events_file.write(json.dumps(event, default=str) + "\n")
+            self._events_file.flush()
+
+    @contextlib.contextmanager
+    def stage(self, name, **fields):
+        """Times a pipeline stage, emitting stage_start and stage_end events around it."""
+        self.emit("stage_start", stage=name, **fields)
+        start = time.time()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            seconds = time.time() - start
+            with self._lock:
+                self._spans.append((name, start, seconds, threading.get_ident()))
+            self.emit("stage_end", stage=name, seconds=seconds, ok=ok, peak_rss_mb=peak_rss_mb(), **fields)
+
+    def step_reporter(self, epoch):
+        """Returns a StepReporter that emits rolling `step` events for one epoch."""
+        return StepReporter(self, epoch, self.step_every)
+
+    def profiler(self, config=None, directory=None):
+        """
+        Returns a TrainingProfiler that records a window of training steps.
+
+        Args:
+            config (dict): Options overriding DEFAULT_PROFILE_CONFIG.
+            directory (str): Where traces go. Defaults to the run directory.
+        """
+        directory = directory or self.run_dir or os.path.join(RUNS_DIR, time.strftime("profile-%Y%m%d-%H%M%S"))
+        return TrainingProfiler(self, {**DEFAULT_PROFILE_CONFIG, **(config or {})}, directory)
+
+    def write_stage_trace(self):
+        """Writes the timed stages as a Chrome trace; returns its path (None without a run directory)."""
+        if not self.run_dir:
+            return None
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self._spans)
+        trace = {"traceEvents": [
+            {"name": name, "cat": "stage", "ph": "X", "ts": start * 1e6, "dur": seconds * 1e6, "pid": pid, "tid": tid}
+            for name, start, seconds, tid in spans
+        ]}
+        path = os.path.join(self.run_dir, "stages.trace.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        return path
+
+    def close(self):
+        """Writes the stage trace and closes the event log."""
+        path = self.write_stage_trace()
+        if path:
+            self(f"[Telemetry] Run telemetry saved to {self.run_dir}")
+        with self._lock:
+            if self._events_file is not None:
+                self._events_file.close()
+                self._events_file = None
+
+
+def get(status_callback):
+    """Returns `status_callback` if it is a Telemetry, otherwise wraps it in one that forwards text."""
+    if isinstance(status_callback, Telemetry):
+        return status_callback
+    return Telemetry(status_callback, structured=False)
+
+
+def run_directory(params):
+    """Returns a new per-run telemetry directory for a params dict."""
+    base = params.get("telemetry_dir") or RUNS_DIR
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{params.get('model_choice', 'model')}-{os.getpid()}"
+    return os.path.join(base, name)
+
+
+class StepReporter:
+    """Accumulates step timings for one epoch and emits a `step` event every N steps."""
+    def __init__(self, telemetry, epoch, every):
+        self.telemetry = telemetry
+        self.epoch = epoch
+        self.every = every
+        self.steps = 0
+        self.samples = 0
+        self.data_wait = 0.0
+        self.compute = 0.0
+        self.loss_sum = 0.0
+        self._window = [0, 0, 0.0, 0.0, 0.0]  # steps, samples, data wait, compute, loss
+
+    def record(self, step, samples, data_wait, compute, loss):
+        """Records one training step (times in seconds)."""
+        self.steps += 1
+        self.samples += samples
+        self.data_wait += data_wait
+        self.compute += compute
+        self.loss_sum += loss
+        window = self._window
+        window[0] += 1
+        window[1] += samples
+        window[2] += data_wait
+        window[3] += compute
+        window[4] += loss
+        if self.every and window[0] >= self.every:
+            seconds = window[2] + window[3]
+            self.telemetry.emit(
+                "step", epoch=self.epoch, step=step,
+                step_ms=1000.0 * seconds / window[0],
+                samples_per_sec=window[1] / seconds if seconds else 0.0,
+                data_wait_ms=1000.0 * window[2] / window[0],
+                loss=window[4] / window[0],
+            )
+            self._window = [0, 0, 0.0, 0.0, 0.0]
+
+    def finish(self, epochs):
+        """Emits the `epoch` event with this epoch's totals."""
+        seconds = self.data_wait + self.compute
+        return self.telemetry.emit(
+            "epoch", epoch=self.epoch, epochs=epochs, steps=self.steps, samples=self.samples,
+            seconds=seconds, data_wait_s=self.data_wait, compute_s=self.compute,
+            samples_per_sec=self.samples / seconds if seconds else 0.0,
+            loss=self.loss_sum / self.steps if self.steps else None,
+            peak_rss_mb=peak_rss_mb(),
+        )
+
+
+class TrainingProfiler:
+    """
+    Profiles a window of training steps with torch.profiler.
+
+    Use as a context manager around the training loop and call `step()` after
+    every training step. When the window is complete, a Chrome trace and a
+    summary of the top operators are written and a `profile` event is emitted.
+    """
+    def __init__(self, telemetry, config, directory):
+        self.telemetry = telemetry
+        self.config = config
+        self.directory = directory
+        self._profiler = None
+
+    def __enter__(self):
+        from torch import profiler
+
+        config = self.config
+        os.makedirs(self.directory, exist_ok=True)
+        self._profiler = profiler.profile(
+            activities=[profiler.ProfilerActivity.CPU],
+            schedule=profiler.schedule(wait=config["wait"], warmup=config["warmup"], active=config["active"], repeat=1),
+            on_trace_ready=self._export,
+            record_shapes=config["record_shapes"],
+            profile_memory=config["profile_memory"],
+        )
+        self._profiler.__enter__()
+        return self
+
+    def step(self):
+        self._profiler.step()
+
+    def __exit__(self, *exc_info):
+        return self._profiler.__exit__(*exc_info)
+
+    def _export(self, prof):
+        trace_path = os.path.join(self.directory, "profile.trace.json")
+        summary_path = os.path.join(self.directory, "profile.summary.json")
+        prof.export_chrome_trace(trace_path)
+        averages = sorted(prof.key_averages(), key=lambda avg: avg.self_cpu_time_total, reverse=True)
+        summary = {
+            "steps": self.config["active"],
+            "top_ops": [
+                {
+                    "name": avg.key,
+                    "calls": avg.count,
+                    "self_cpu_ms": avg.self_cpu_time_total / 1000.0,
+                    "cpu_total_ms": avg.cpu_time_total / 1000.0,
+                    "self_cpu_memory_mb": getattr(avg, "self_cpu_memory_usage", 0) / 2 ** 20,
+                }
+                for avg in averages[:self.config["top_ops"]]
+            ],
+        }
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        self.telemetry.emit("profile", trace=trace_path, summary=summary_path)
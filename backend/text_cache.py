@@ -0,0 +1,232 @@
+# backend/text_cache.py
+
+# This module pre-tokenizes a text classification dataset (e.g. IMDB for
+# BERT) once, instead of tokenizing raw text on every epoch. Texts are
+# tokenized in parallel worker processes and written, without padding, to a
+# flat memory-mapped array of token ids plus an offsets array (sample i is
+# tokens[offsets[i]:offsets[i + 1]]). The cache is keyed by the tokenizer,
+# the preprocessing config and a hash of the dataset, so later runs open it
+# directly, without reading the texts or loading the tokenizer.
+#
+# Batches are padded to their longest sample only (see
+# data_pipeline.build_text_loaders), and grouping samples of similar length
+# into batches keeps that padding small.
+#
+# Supported layouts:
+#     my_dataset/pos/001.txt, my_dataset/neg/002.txt   one sub-folder per class
+#     my_dataset/reviews.csv                           a text and a label column
+
+import concurrent.futures
+import csv
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+
+import numpy as np
+
+from backend import manifest, ragged_store
+
+CACHE_DIR = os.path.join(os.getcwd(), "datasets", ".cache", "text")
+TEXT_EXTENSIONS = (".txt",)
+TEXT_COLUMNS = ("text", "review", "sentence", "content")
+LABEL_COLUMNS = ("label", "sentiment", "labels", "target")
+
+DEFAULT_CONFIG = {
+    "max_length": 512,      # tokens per sample, including special tokens; longer texts are truncated
+    "text_column": None,    # CSV column holding the text; None picks one of TEXT_COLUMNS
+    "label_column": None,   # CSV column holding the label; None picks one of LABEL_COLUMNS
+    "workers": None,        # tokenizer processes; None uses every core
+    "chunk_size": 1000,     # texts per tokenization task
+}
+
+_tokenizer = None
+
+
+def load_tokenizer(name, revision=None):
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(name, revision=revision or "main")
+
+
+def _init_worker(name, revision):
+    global _tokenizer
+    # Each worker is one process; the tokenizer's own thread pool would only oversubscribe the cores
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    _tokenizer = load_tokenizer(name, revision)
+
+
+def _tokenize_chunk(texts, max_length, tokenizer=None):
+    """Tokenizes a list of texts; returns (flat int32 token ids, int64 lengths)."""
+    encoded = (tokenizer or _tokenizer)(texts, truncation=True, max_length=max_length)["input_ids"]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    ids = np.fromiter(itertools.chain.from_iterable(encoded), dtype=np.int32, count=int(lengths.sum()))
+    return ids, lengths
+
+
+def find_csv(dataset_path):
+    """Returns the CSV file of a dataset: the path itself, or the largest .csv under it."""
+    if os.path.isfile(dataset_path):
+        return dataset_path
+    candidates = [os.path.join(dirpath, name) for dirpath, _, names in os.walk(dataset_path)
+                  for name in names if name.lower().endswith(".csv")]
+    return max(candidates, key=os.path.getsize) if candidates else None
+
+
+def _pick_column(fieldnames, requested, candidates, kind):
+    if requested:
+        if requested not in fieldnames:
+            raise ValueError(f"CSV has no {kind} column '{requested}' (columns: {', '.join(fieldnames)}).")
+        return requested
+    by_lower = {name.lower(): name for name in fieldnames}
+    for candidate in candidates:
+        if candidate in by_lower:
+            return by_lower[candidate]
+    raise ValueError(f"Could not find a {kind} column in the CSV (columns: {', '.join(fieldnames)}); "
+                     f"set the '{kind}_column' option.")
+
+
+def fingerprint_dataset(dataset_path, status_callback):
+    """
+    Finds a text dataset's files without reading the texts.
+
+    Returns:
+        tuple: (source, fingerprint), where `source` is the CSV path or the
+        manifest of the .txt files, and `fingerprint` changes whenever the
+        dataset's contents change.
+    """
+    csv_path = find_csv(dataset_path)
+    if csv_path is not None:
+        return csv_path, manifest.hash_file(csv_path)
+    entries = manifest.update(dataset_path, status_callback, extensions=TEXT_EXTENSIONS)
+    if not len(entries):
+        raise ValueError(f"No .txt files in class folders or .csv file found in {dataset_path}.")
+    digest = hashlib.sha1()
+    for i, rel_path in enumerate(entries.paths):
+        digest.update(f"{rel_path}\0{entries.fingerprint(i)}\n".encode("utf-8"))
+    return entries, digest.hexdigest()
+
+
+def read_texts(dataset_path, source, status_callback, config):
+    """
+    Reads a text dataset from the `source` returned by fingerprint_dataset.
+
+    Returns:
+        tuple: (texts, labels, classes)
+    """
+    if not isinstance(source, str):
+        texts = []
+        for rel_path in source.paths:
+            with open(os.path.join(dataset_path, rel_path), "r", encoding="utf-8", errors="replace") as f:
+                texts.append(f.read())
+        return texts, list(source.labels), source.classes
+
+    csv_path = source
+    status_callback(f"[Text Cache] Reading {csv_path}...")
+    with open(csv_path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        reader = csv.DictReader(f)
+        text_column = _pick_column(reader.fieldnames or [], config["text_column"], TEXT_COLUMNS, "text")
+        label_column = _pick_column(reader.fieldnames or [], config["label_column"], LABEL_COLUMNS, "label")
+        rows = [(row[text_column] or "", row[label_column]) for row in reader]
+    classes = sorted({label for _, label in rows})
+    class_index = {name: i for i, name in enumerate(classes)}
+    texts = [text for text, _ in rows]
+    labels = [class_index[label] for _, label in rows]
+    return texts, labels, classes
+
+
+def build_cache(dataset_path, tokenizer_name, status_callback, revision=None, config=None, cache_dir=None):
+    """
+    Tokenizes a text dataset into a memory-mapped token cache, unless an
+    up-to-date cache for the same tokenizer and config already exists.
+
+    Args:
+        dataset_path (str): The local path to the dataset (as returned by load_dataset).
+        tokenizer_name (str): The Hugging Face tokenizer id, e.g. "bert-base-uncased".
+        status_callback (function): A function to send status updates back to the GUI.
+        revision (str): The tokenizer's hub revision. Defaults to "main".
+        config (dict): Options overriding DEFAULT_CONFIG.
+        cache_dir (str): Where caches are stored. Defaults to CACHE_DIR.
+
+    Returns:
+        str: The path to the cache index, to be opened with TokenizedDataset.
+    """
+    config = {**DEFAULT_CONFIG, **{k: v for k, v in (config or {}).items() if v is not None}}
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # The key only needs the dataset's fingerprint, so a cache hit never
+    # reads the texts
+    source, fingerprint = fingerprint_dataset(dataset_path, status_callback)
+    tokenizer_id = f"{tokenizer_name}@{revision or 'main'}"
+    key_config = {"max_length": config["max_length"], "text_column": config["text_column"],
+                  "label_column": config["label_column"]}
+    key = hashlib.sha1(json.dumps([tokenizer_id, key_config, fingerprint], sort_keys=True).encode("utf-8")).hexdigest()
+    index_path = os.path.join(cache_dir, f"{key}.json")
+    if os.path.exists(index_path):
+        status_callback(f"[Text Cache] Reusing tokenized dataset at {index_path}")
+        return index_path
+
+    texts, labels, classes = read_texts(dataset_path, source, status_callback, config)
+    tokenizer = load_tokenizer(tokenizer_name, revision)
+    workers = config["workers"] or os.cpu_count() or 1
+    chunk_size = config["chunk_size"]
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    status_callback(f"[Text Cache] Tokenizing {len(texts)} texts with {tokenizer_id} "
+                    f"in {min(workers, len(chunks))} process(es)...")
+
+    tokens_path = os.path.join(cache_dir, f"{key}.tokens.bin")
+    if workers <= 1 or len(chunks) <= 1:
+        results = (_tokenize_chunk(chunk, config["max_length"], tokenizer) for chunk in chunks)
+        offsets = ragged_store.write_chunks(tokens_path, results)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                                                    mp_context=mp.get_context("spawn"),
+                                                    initializer=_init_worker,
+                                                    initargs=(tokenizer_name, revision)) as pool:
+            results = pool.map(_tokenize_chunk, chunks, itertools.repeat(config["max_length"]))
+            offsets = ragged_store.write_chunks(tokens_path, results)
+
+    np.save(os.path.join(cache_dir, f"{key}.offsets.npy"), offsets)
+    np.save(os.path.join(cache_dir, f"{key}.labels.npy"), np.asarray(labels, dtype=np.int64))
+    index = {
+        "dataset_path": os.path.abspath(dataset_path),
+        "tokenizer": tokenizer_id,
+        "config": config,
+        "classes": classes,
+        "num_samples": len(texts),
+        "num_tokens": int(offsets[-1]),
+        "pad_token_id": tokenizer.pad_token_id or 0,
+        "tokens": os.path.basename(tokens_path),
+        "offsets": f"{key}.offsets.npy",
+        "labels": f"{key}.labels.npy",
+    }
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+
+    status_callback(f"[Text Cache] {index['num_tokens']} tokens cached "
+                    f"({index['num_tokens'] / max(1, len(texts)):.0f} per sample on average) at {index_path}")
+    return index_path
+
+
+class TokenizedDataset(ragged_store.RaggedDataset):
+    """
+    A map-style dataset over a token cache written by build_cache.
+
+    Samples are (token ids, label), the ids being a read-only int32 view into
+    the memory-mapped token array (see ragged_store.RaggedDataset).
+    """
+    DATA_KEY = "tokens"
+
+    def __init__(self, index_path):
+        super().__init__(index_path)
+        self.pad_token_id = self.index["pad_token_id"]
+
+    def _layout(self):
+        return np.int32, (self.index["num_tokens"],)
+
+    @property
+    def tokens(self):
+        return self.data
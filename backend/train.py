@@ -6,12 +6,146 @@
 
 import time
 
+from backend import telemetry
+
+def prepare_data(dataset_path, params, status_callback):
+    """
+    Preprocesses the dataset and builds the train/val loaders.
+
+    Returns:
+        tuple: (dataset, train_loader, val_loader)
+    """
+    # Imported here so the GUI does not pay for NumPy/PyTorch at startup.
+    from backend import dataset_cache, model_loader
+    modality = model_loader.MODALITIES.get(params.get('model_choice'))
+    if modality == "text":
+        return prepare_text_data(dataset_path, params, status_callback)
+    if modality == "audio":
+        return prepare_audio_data(dataset_path, params, status_callback)
+
+    # Decode the dataset once into memory-mapped shards. Unchanged shards are
+    # reused from datasets/.cache, so later runs and epochs skip decoding.
+    status_callback("[Trainer] Preprocessing data and creating data loaders...")
+    with telemetry.get(status_callback).stage("preprocess"):
+        index_path = dataset_cache.build_cache(dataset_path, status_callback, config=params.get("preprocess"))
+    dataset = dataset_cache.ShardedDataset(index_path)
+    train_loader, val_loader = make_loaders(dataset, params, status_callback)
+    status_callback(f"[Trainer] Data ready for training: {len(dataset)} samples, {len(dataset.classes)} classes.")
+    return dataset, train_loader, val_loader
+
+
+def prepare_text_data(dataset_path, params, status_callback):
+    """
+    Tokenizes a text dataset once with the model's tokenizer and builds
+    length-bucketed, dynamically padded train/val loaders.
+
+    Returns:
+        tuple: (dataset, train_loader, val_loader)
+    """
+    # Token ids are cached per tokenizer and dataset hash in datasets/.cache/text;
+    # `tokenize_max_length` and the other tokenize_ keys configure it
+    from backend import model_loader, text_cache
+    status_callback("[Trainer] Tokenizing text and creating data loaders...")
+    with telemetry.get(status_callback).stage("preprocess"):
+        index_path = text_cache.build_cache(
+            dataset_path, model_loader.MODEL_MAP[params['model_choice']], status_callback,
+            revision=params.get('model_revision'),
+            config={key[len('tokenize_'):]: value for key, value in params.items() if key.startswith('tokenize_')},
+        )
+    dataset = text_cache.TokenizedDataset(index_path)
+    train_loader, val_loader = make_loaders(dataset, params, status_callback)
+    status_callback(f"[Trainer] Data ready for training: {len(dataset)} texts, {len(dataset.classes)} classes.")
+    return dataset, train_loader, val_loader
+
+
+def prepare_audio_data(dataset_path, params, status_callback):
+    """
+    Extracts log-mel features from an audio dataset once and builds train/val
+    loaders that read them directly.
+
+    Returns:
+        tuple: (dataset, train_loader, val_loader)
+    """
+    # Features are cached per feature parameters and dataset hash in
+    # datasets/.cache/audio; `audio_n_mels` and the other audio_ keys configure it
+    from backend import audio_cache
+    status_callback("[Trainer] Extracting audio features and creating data loaders...")
+    with telemetry.get(status_callback).stage("preprocess"):
+        index_path = audio_cache.build_cache(
+            dataset_path, status_callback,
+            config={key[len('audio_'):]: value for key, value in params.items() if key.startswith('audio_')},
+        )
+    dataset = audio_cache.AudioFeatureDataset(index_path)
+    train_loader, val_loader = make_loaders(dataset, params, status_callback)
+    status_callback(f"[Trainer] Data ready for training: {len(dataset)} clips, {len(dataset.classes)} classes.")
+    return dataset, train_loader, val_loader
+
+
+def make_loaders(dataset, params, status_callback):
+    """Builds the train/val loaders for a prepared dataset from the loader keys of `params`."""
+    from backend import data_pipeline
+    loader_config = {key: params.get(key) for key in data_pipeline.DEFAULT_LOADER_CONFIG}
+    if hasattr(dataset, "pad_token_id") or hasattr(dataset, "window_frames"):
+        if params.get('streaming'):
+            status_callback("[Trainer] Streaming is only supported for images; using random access.")
+        if hasattr(dataset, "window_frames"):
+            return data_pipeline.build_audio_loaders(dataset, status_callback, config=loader_config)
+        return data_pipeline.build_text_loaders(dataset, status_callback, config=loader_config)
+    if params.get('streaming'):
+        # Shards are read sequentially with a bounded shuffle buffer, so memory
+        # stays flat however large the dataset is
+        return data_pipeline.build_streaming_loaders(dataset.index_path, status_callback, config=loader_config)
+    return data_pipeline.build_loaders(dataset, status_callback, config=loader_config)
+
+
+def tune_batch_size(model, dataset, params, status_callback, collate_fn=None):
+    """
+    Picks the micro-batch size with the best throughput under the RAM budget,
+    keeping params['batch_size'] as the effective batch size across all
+    data-parallel processes.
+
+    Returns:
+        tuple: (micro-batch size, gradient accumulation steps)
+    """
+    from backend import batch_tuner
+    with telemetry.get(status_callback).stage("batch_tuning"):
+        result = batch_tuner.tune(
+            model, dataset, status_callback,
+            target_batch_size=params.get('batch_size') or 32,
+            fine_tune=params['fine_tune'], optimizer_type=params['optimizer_type'], lr=params['lr'],
+            world_size=params.get('world_size') or 1, collate_fn=collate_fn,
+            config={key[len('tune_'):]: value for key, value in params.items() if key.startswith('tune_')},
+        )
+    return result["batch_size"], result["accumulation_steps"]
+
+
+def feature_cache_key(model, params, dataset, train_loader, val_loader):
+    """
+    Returns the key under which the frozen backbone's features are cached for
+    this run, or None when streaming (the feature cache needs random access).
+    """
+    from backend import feature_cache, model_loader
+    if params.get('streaming'):
+        return None
+    split = f"{train_loader.generator.initial_seed()}-{len(val_loader.dataset)}"
+    model_key = model_loader.model_id(params['model_choice'], params.get('model_revision')) if params.get('model_choice') else type(model).__name__
+    return feature_cache.cache_key(model_key, dataset.key, split)
+
+
+def model_builder(model, params):
+    """Returns how data-parallel ranks rebuild the model, or None if it was not loaded by model_loader."""
+    from backend import model_loader
+    if params.get('model_choice') not in model_loader.MODEL_MAP:
+        return None
+    return model_loader.model_builder(params['model_choice'], model, params.get('model_revision'))
+
+
 def run_training_pipeline(model, dataset_path, params, status_callback):
     """
-    The main function that simulates the training and optimization process.
+    The main function that runs the training and optimization process.
 
     Args:
-        model (str): A string representing the loaded model (placeholder).
+        model (nn.Module): The loaded model (a placeholder string is only simulated).
         dataset_path (str): The local path to the dataset.
         params (dict): A dictionary containing all training preferences from the GUI.
         status_callback (function): A function to send status updates back to the GUI.
@@ -21,13 +155,50 @@ def run_training_pipeline(model, dataset_path, params, status_callback):
     status_callback(f"[Trainer] Dataset Path: {dataset_path}")
     status_callback(f"[Trainer] Training Parameters: {params}")
 
-    # --- Placeholder for Data Preprocessing ---
-    # Here, you would use the dataset_path to create PyTorch DataLoaders or
-    # a TensorFlow Dataset object. This would involve transformations,
-    # tokenization (for text), and data augmentation.
-    status_callback("[Trainer] Preprocessing data and creating data loaders...")
-    time.sleep(2) # Simulate preprocessing
-    status_callback("[Trainer] Data ready for training.")
+    dataset, train_loader, val_loader = prepare_data(dataset_path, params, status_callback)
+
+    # With `auto_batch`, the loaders are rebuilt with the tuned micro-batch
+    # size and gradient accumulation keeps the requested batch size
+    accumulation_steps = 1
+    if params.get('auto_batch') and hasattr(model, "parameters"):
+        batch_size, accumulation_steps = tune_batch_size(model, dataset, params, status_callback,
+                                                         collate_fn=train_loader.collate_fn)
+        train_loader, val_loader = make_loaders(dataset, {**params, 'batch_size': batch_size}, status_callback)
+
+    # A real model is trained by the optimizer module, which also reports
+    # per-epoch data-wait vs. compute time.
+    # In fine-tune mode the frozen backbone's features are cached per model
+    # and dataset split, so only the head is trained on every epoch.
+    # Checkpoints are written every `checkpoint_every` epochs, and with
+    # `resume` the run continues from the latest one. With `profile`, a few
+    # training steps are traced with torch.profiler (profile_wait,
+    # profile_warmup and profile_active set the window). With `world_size`
+    # above 1, training runs data-parallel in that many processes.
+    if hasattr(model, "parameters"):
+        from backend import optizer, checkpoint
+        optizer.train(
+            model, (train_loader, val_loader),
+            epochs=params['epochs'], lr=params['lr'], optimizer_type=params['optimizer_type'],
+            fine_tune=params['fine_tune'], prune=params['prune'], quantize=params['quantize'],
+            status_callback=status_callback,
+            feature_cache_key=feature_cache_key(model, params, dataset, train_loader, val_loader),
+            checkpoint_dir=checkpoint.run_checkpoint_dir(params),
+            checkpoint_every=params.get('checkpoint_every') or 1,
+            checkpoint_every_batches=params.get('checkpoint_every_batches'),
+            keep_checkpoints=params.get('keep_checkpoints') or 3,
+            resume=params.get('resume', False),
+            prune_sparsity=params.get('prune_sparsity') or 0.4,
+            prune_recovery_epochs=params.get('prune_recovery_epochs') or 0,
+            quantize_config={key[len('quantize_'):]: value for key, value in params.items() if key.startswith('quantize_')},
+            export=params.get('export', False),
+            export_config={key[len('export_'):]: value for key, value in params.items() if key.startswith('export_')},
+            profile=params.get('profile', False),
+            profile_config={key[len('profile_'):]: value for key, value in params.items() if key.startswith('profile_')},
+            world_size=params.get('world_size') or 1,
+            accumulation_steps=accumulation_steps,
+            model_builder=model_builder(model, params),
+        )
+        return
 
     # --- Fine-Tuning Setup ---
     if params['fine_tune']:
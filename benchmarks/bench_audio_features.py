@@ -0,0 +1,115 @@
+# benchmarks/bench_audio_features.py
+
+# Measures the cached log-mel feature store (backend/audio_cache.py) on
+# synthetic WAV clips (1-10 s, mixed sample rates, mono and stereo). It
+# reports:
+#   - the time to build the store with 1 vs. N processes, and to reopen it;
+#   - the time of one data epoch (batches of Whisper input features, padded
+#     to 30 s) when every clip is decoded, resampled and transformed on the
+#     fly, vs. read from the store.
+#
+# Only data loading is timed: the store removes the per-epoch audio work,
+# whatever model consumes the features.
+#
+# Usage: python benchmarks/bench_audio_features.py [--clips 400] [--workers 4] [--batch-size 16]
+
+import argparse
+import functools
+import os
+import shutil
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def write_clips(root, num_clips, seed=0):
+    """Writes `num_clips` WAV files of tones and noise into two class folders."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    for i in range(num_clips):
+        label = i % 2
+        rate = (16000, 22050, 44100)[i % 3]
+        channels = 1 + i % 2
+        t = np.arange(int(rate * rng.uniform(1.0, 10.0))) / rate
+        signal = 0.3 * np.sin(2 * np.pi * (300 + 500 * label) * t) + 0.05 * rng.standard_normal(len(t))
+        data = (np.repeat(np.clip(signal, -1, 1)[:, None], channels, axis=1) * 32767).astype("<i2")
+        directory = os.path.join(root, f"class{label}")
+        os.makedirs(directory, exist_ok=True)
+        with wave.open(os.path.join(directory, f"{i}.wav"), "wb") as f:
+            f.setnchannels(channels)
+            f.setsampwidth(2)
+            f.setframerate(rate)
+            f.writeframes(data.tobytes())
+
+
+class OnTheFlyDataset:
+    """Decodes, resamples and transforms one clip per sample, as without a feature store."""
+    def __init__(self, root, config):
+        self.paths = sorted(os.path.join(dirpath, name) for dirpath, _, names in os.walk(root) for name in names)
+        self.config = config
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, idx):
+        from backend import audio_cache
+
+        config = self.config
+        audio = audio_cache.decode(self.paths[idx], config["sample_rate"], config["max_seconds"])
+        features, _ = audio_cache.log_mel([audio], config["sample_rate"], config["n_fft"], config["hop_length"], config["n_mels"])
+        return features, int("class1" in self.paths[idx])
+
+
+def time_epoch(loader):
+    start = time.perf_counter()
+    for _ in loader:
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log-mel feature store vs. per-epoch audio decoding.")
+    parser.add_argument("--clips", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="feature extraction processes")
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    from torch.utils.data import DataLoader
+
+    from backend import audio_cache, data_pipeline
+
+    root = tempfile.mkdtemp(prefix="bench_audio_features_")
+    try:
+        data_dir = os.path.join(root, "data")
+        write_clips(data_dir, args.clips)
+        quiet = lambda message: None
+        print(f"{args.clips} clips, batch size {args.batch_size}")
+
+        for workers in sorted({1, args.workers}):
+            cache_dir = os.path.join(root, f"cache-{workers}")
+            start = time.perf_counter()
+            index_path = audio_cache.build_cache(data_dir, quiet, config={"workers": workers}, cache_dir=cache_dir)
+            print(f"build store, {workers} process(es)   {time.perf_counter() - start:8.2f} s", flush=True)
+        start = time.perf_counter()
+        audio_cache.build_cache(data_dir, quiet, config={"workers": args.workers}, cache_dir=cache_dir)
+        print(f"reopen store                   {time.perf_counter() - start:8.2f} s", flush=True)
+
+        dataset = audio_cache.AudioFeatureDataset(index_path)
+        collate = functools.partial(data_pipeline.collate_features, pad_to=dataset.window_frames)
+        on_the_fly = DataLoader(OnTheFlyDataset(data_dir, audio_cache.DEFAULT_CONFIG), batch_size=args.batch_size,
+                                shuffle=True, collate_fn=collate)
+        from_store = DataLoader(dataset, batch_size=args.batch_size, shuffle=True, collate_fn=collate)
+        naive = time_epoch(on_the_fly)
+        cached = time_epoch(from_store)
+        print(f"epoch, decoded on the fly      {naive:8.2f} s  ({args.clips / naive:8.1f} clips/s)")
+        print(f"epoch, read from the store     {cached:8.2f} s  ({args.clips / cached:8.1f} clips/s, {naive / cached:.1f}x)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_data_parallel.py
+
+# Measures how data-parallel CPU training (backend/distributed.py) scales with
+# the number of processes. A small CNN is trained on a synthetic dataset cache
+# with 1, 2, 4, ... processes; each process keeps the same per-process batch
+# size, so the effective batch grows with the process count.
+#
+# Throughput is taken from the epoch telemetry of rank 0 (multiplied by the
+# number of ranks), skipping the first epoch, so process start-up is not
+# counted; the wall time column includes it.
+#
+# Usage: python benchmarks/bench_data_parallel.py [--world-sizes 1 2 4] [--samples 4096] [--epochs 3]
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_streaming import write_synthetic_cache
+
+
+def small_cnn(num_classes=10):
+    import torch
+    import torch.nn as nn
+
+    torch.manual_seed(0)
+    return nn.Sequential(
+        nn.Conv2d(3, 32, 3, padding=1), nn.ReLU(), nn.MaxPool2d(2),
+        nn.Conv2d(32, 64, 3, padding=1), nn.ReLU(), nn.MaxPool2d(2),
+        nn.Flatten(), nn.Linear(64 * 8 * 8, 128), nn.ReLU(), nn.Linear(128, num_classes),
+    )
+
+
+def run(index_path, world_size, epochs, batch_size):
+    """Trains once; returns (samples/sec across all ranks, wall seconds)."""
+    from backend import data_pipeline, dataset_cache, distributed, optizer, telemetry
+
+    epoch_events = []
+
+    def collect(message):
+        if isinstance(message, dict) and message["type"] == "epoch":
+            epoch_events.append(message)
+
+    dataset = dataset_cache.ShardedDataset(index_path)
+    train_loader, _ = data_pipeline.build_loaders(dataset, lambda message: None,
+                                                  {"batch_size": batch_size, "num_workers": 0, "val_split": 0.0})
+    status_callback = telemetry.Telemetry(collect, structured=True, step_every=0)
+    kwargs = {"epochs": epochs, "optimizer_type": "sgd", "fine_tune": False}
+    start = time.perf_counter()
+    if world_size == 1:
+        optizer.fit(small_cnn(), train_loader, status_callback=status_callback, **kwargs)
+    else:
+        distributed.train_data_parallel(small_cnn(), (small_cnn, {}), train_loader, world_size, status_callback, **kwargs)
+    wall = time.perf_counter() - start
+    measured = epoch_events[1:] or epoch_events
+    throughput = sum(event["samples"] for event in measured) / sum(event["seconds"] for event in measured)
+    return throughput * world_size, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Data-parallel training speedup vs. number of processes.")
+    cpus = os.cpu_count() or 1
+    default_sizes = [n for n in (1, 2, 4, 8, 16) if n <= cpus] or [1]
+    parser.add_argument("--world-sizes", type=int, nargs="+", default=default_sizes)
+    parser.add_argument("--samples", type=int, default=4096)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32, help="per-process batch size")
+    args = parser.parse_args()
+
+    import torch
+    print(f"{cpus} CPUs, torch {torch.__version__}, {torch.get_num_threads()} threads in total")
+    root = tempfile.mkdtemp(prefix="bench_data_parallel_")
+    try:
+        index_path = write_synthetic_cache(root, args.samples, 32)
+        print(f"{'processes':>9} {'samples/s':>10} {'speedup':>8} {'wall s':>8}")
+        base = None
+        for world_size in args.world_sizes:
+            throughput, wall = run(index_path, world_size, args.epochs, args.batch_size)
+            base = base or throughput
+            print(f"{world_size:>9} {throughput:>10.0f} {throughput / base:>7.2f}x {wall:>8.1f}", flush=True)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_log_bus.py
+
+# Measures how much GUI-thread time it costs to display a chatty training run.
+# A producer thread pushes messages through `status_callback` while the main
+# thread drains the log bus on a fixed tick, exactly like the GUI does.
+# If a display is available the real ModelBuilderApp log widget is used;
+# otherwise only the bus itself is measured.
+#
+# Usage: python benchmarks/bench_log_bus.py [--messages 100000] [--tick-ms 100]
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from frontend.log_bus import LogBus
+
+
+def make_app(log_path):
+    """Creates a hidden ModelBuilderApp, or returns None if there is no display."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None, None
+    root.withdraw()
+    from frontend import gui
+    gui.LOG_FILE = log_path
+    app = gui.ModelBuilderApp(root)
+    return root, app
+
+
+def run(messages, tick_ms):
+    log_path = os.path.join(tempfile.mkdtemp(), "bench.log")
+    root, app = make_app(log_path)
+    if app is not None:
+        bus = app.log_bus
+        drain = app.drain_log_bus
+        mode = "tk"
+    else:
+        bus = LogBus(log_path=log_path)
+        drain = bus.drain
+        mode = "headless (bus only)"
+
+    def status_callback(message):
+        bus.put(message)
+
+    def producer():
+        for i in range(messages):
+            status_callback(f"[Trainer] step {i} loss={1.0 / (i + 1):.6f}")
+
+    producer_thread = threading.Thread(target=producer, daemon=True)
+    start = time.perf_counter()
+    producer_thread.start()
+
+    gui_time = 0.0
+    max_tick = 0.0
+    ticks = 0
+    while producer_thread.is_alive() or not bus.empty():
+        time.sleep(tick_ms / 1000.0)
+        tick_start = time.perf_counter()
+        drain()
+        if root is not None:
+            root.update_idletasks()
+        tick = time.perf_counter() - tick_start
+        gui_time += tick
+        max_tick = max(max_tick, tick)
+        ticks += 1
+    wall = time.perf_counter() - start
+
+    if app is not None:
+        app.on_close()
+    else:
+        bus.close()
+
+    print(f"mode:               {mode}")
+    print(f"messages:           {messages}")
+    print(f"wall time:          {wall:.3f} s")
+    print(f"GUI-thread time:    {gui_time:.3f} s over {ticks} ticks")
+    print(f"max tick:           {max_tick * 1000:.2f} ms")
+    print(f"old drain would take {messages * tick_ms / 1000.0:.0f} s at one message per tick")
+    return {"mode": mode, "wall": wall, "gui_time": gui_time, "ticks": ticks, "max_tick": max_tick}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GUI log bus throughput benchmark")
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--tick-ms", type=int, default=100)
+    args = parser.parse_args()
+    run(args.messages, args.tick_ms)
+
+
+if __name__ == "__main__":
+    main()
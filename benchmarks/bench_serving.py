@@ -0,0 +1,152 @@
+# benchmarks/bench_serving.py
+
+# Load generator for the local inference server. It sends concurrent
+# single-sample requests and reports client-side throughput and latency
+# together with the server's own metrics (mean batch size, queue depth).
+#
+# Against a running server (python serve.py ...):
+#   python benchmarks/bench_serving.py --port 8000 --requests 2000 --concurrency 32
+#
+# Without --port it measures the batching gain itself: the same model is
+# served in-process once without batching (max batch 1) and once with
+# dynamic batching, and the two runs are compared. The model is the given
+# artifact, or a small synthetic MLP if none is given:
+#   python benchmarks/bench_serving.py [--artifact trained_model.pth --model YOLO]
+#
+# The in-process comparison is also run directly against the batcher,
+# without HTTP. On machines with few cores, the HTTP layer and the clients
+# compete with the model for CPU, and the direct numbers show the gain
+# that batching itself gives.
+
+import argparse
+import json
+import os
+import sys
+import statistics
+import threading
+import time
+import urllib.request
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend import serving
+
+
+def synthetic_model():
+    import torch.nn as nn
+    # Weight-heavy layers, like a classifier head on top of a backbone: at
+    # batch size 1 every request streams all weights through the cache.
+    model = nn.Sequential(
+        nn.Flatten(), nn.Linear(3 * 32 * 32, 2048), nn.ReLU(),
+        nn.Linear(2048, 2048), nn.ReLU(), nn.Linear(2048, 10),
+    )
+    return model.eval(), [3, 32, 32]
+
+
+def serve_and_load(model, input_shape, config, requests, concurrency):
+    server = serving.make_server(model, port=0, input_shape=input_shape, config=config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        return serving.generate_load("127.0.0.1", server.server_address[1], input_shape, requests, concurrency)
+    finally:
+        serving.stop_server(server)
+
+
+def direct_load(model, input_shape, config, requests, concurrency):
+    """Like serve_and_load, but clients submit straight to the batcher."""
+    import torch
+
+    batcher = serving.DynamicBatcher(model, config["max_batch_size"], config["max_wait_ms"], config["workers"])
+    sample = torch.randn(*input_shape)
+    counter = iter(range(requests))
+    latencies = []
+
+    def client():
+        own = []
+        for _ in counter:
+            start = time.perf_counter()
+            batcher.submit(sample).result()
+            own.append((time.perf_counter() - start) * 1000.0)
+        latencies.extend(own)
+
+    start = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    batcher.close()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": 0,
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed,
+        "latency_ms": {
+            "mean": statistics.fmean(latencies),
+            "p50": serving.inference_bench.percentile(latencies, 50),
+            "p95": serving.inference_bench.percentile(latencies, 95),
+            "p99": serving.inference_bench.percentile(latencies, 99),
+        },
+        "server": batcher.metrics.snapshot(),
+    }
+
+
+def summarize(label, result):
+    latency = result["latency_ms"]
+    print(f"{label:>16}: {result['throughput_rps']:8.0f} req/s  p50 {latency['p50']:7.2f} ms  "
+          f"p95 {latency['p95']:7.2f} ms  p99 {latency['p99']:7.2f} ms  "
+          f"mean batch {result['server']['mean_batch_size']:5.1f}  errors {result['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the local inference server.")
+    parser.add_argument("--port", type=int, help="port of a running server (default: start one in-process)")
+    parser.add_argument("--artifact", help="saved model to serve in-process")
+    parser.add_argument("--model", help="MODEL_MAP family of the artifact")
+    parser.add_argument("--input-shape", type=int, nargs="+", metavar="N")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--json", action="store_true", help="print the full results as JSON")
+    args = parser.parse_args()
+
+    if args.port:
+        with urllib.request.urlopen(f"http://127.0.0.1:{args.port}/health") as response:
+            health = json.load(response)
+        input_shape = args.input_shape or health["input_shape"]
+        if not input_shape:
+            parser.error("the server does not know its input shape; pass --input-shape")
+        results = {"server": serving.generate_load("127.0.0.1", args.port, input_shape, args.requests, args.concurrency)}
+    else:
+        if args.artifact:
+            model, input_shape = serving.load_artifact(args.artifact, args.model)
+            input_shape = args.input_shape or input_shape
+            if not input_shape:
+                parser.error("the artifact has no export report; pass --input-shape")
+        else:
+            model, input_shape = synthetic_model()
+        results = {}
+        for transport, run in (("http", serve_and_load), ("direct", direct_load)):
+            for mode, max_batch in (("unbatched", 1), ("batched", args.max_batch)):
+                config = {"max_batch_size": max_batch, "max_wait_ms": args.max_wait_ms, "workers": args.workers}
+                results[f"{transport} {mode}"] = run(model, input_shape, config, args.requests, args.concurrency)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for label, result in results.items():
+            summarize(label, result)
+        for transport in ("http", "direct"):
+            if f"{transport} batched" in results:
+                gain = results[f"{transport} batched"]["throughput_rps"] / results[f"{transport} unbatched"]["throughput_rps"]
+                print(f"Dynamic batching throughput gain ({transport}): {gain:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
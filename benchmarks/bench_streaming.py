@@ -0,0 +1,112 @@
+# benchmarks/bench_streaming.py
+
+# Measures peak memory (max RSS) of one training-style pass over a dataset,
+# random-access loading vs. streaming, for growing dataset sizes. Streaming
+# should stay flat while random access grows with the dataset, because every
+# memory-mapped page it touches stays resident.
+#
+# The datasets are synthetic caches in the dataset_cache format, written to
+# a temporary directory, so no images need decoding.
+#
+# Usage: python benchmarks/bench_streaming.py [--sizes 20000 80000] [--image-size 64] [--workers 0]
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def write_synthetic_cache(cache_dir, num_samples, image_size, shard_size=1024, num_classes=10):
+    """Writes random shards plus an index in the dataset_cache format; returns the index path."""
+    import numpy as np
+
+    shard_dir = os.path.join(cache_dir, "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+    rng = np.random.default_rng(0)
+    shards = []
+    for shard_id, start in enumerate(range(0, num_samples, shard_size)):
+        count = min(shard_size, num_samples - start)
+        key = f"synthetic-{num_samples}-{shard_id}"
+        shard = np.lib.format.open_memmap(os.path.join(shard_dir, f"{key}.npy"), mode="w+", dtype="uint8",
+                                          shape=(count, image_size, image_size, 3))
+        shard[:] = rng.integers(0, 256, size=shard.shape, dtype=np.uint8)
+        shard.flush()
+        del shard
+        shards.append({"key": key, "count": count})
+    key = f"synthetic-{num_samples}"
+    np.save(os.path.join(cache_dir, f"{key}.labels.npy"), rng.integers(0, num_classes, num_samples))
+    index_path = os.path.join(cache_dir, f"{key}.json")
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "dataset_path": "synthetic", "config": {}, "classes": [str(c) for c in range(num_classes)],
+            "num_samples": num_samples, "sample_shape": [image_size, image_size, 3], "dtype": "uint8",
+            "shard_dir": shard_dir, "shards": shards, "labels": f"{key}.labels.npy",
+        }, f)
+    return index_path
+
+
+def peak_rss_kb():
+    """Peak RSS of this process (VmHWM; unlike ru_maxrss it is not inherited from the parent across exec)."""
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def one_pass(index_path, streaming, workers):
+    """Runs in a child process: iterates every training batch once and prints peak RSS in MB."""
+    from backend import data_pipeline, dataset_cache
+
+    config = {"batch_size": 64, "num_workers": workers, "val_split": 0.0}
+    start = time.perf_counter()
+    if streaming:
+        train_loader, _ = data_pipeline.build_streaming_loaders(index_path, lambda message: None, config)
+        train_loader.dataset.set_epoch(0)
+    else:
+        dataset = dataset_cache.ShardedDataset(index_path)
+        train_loader, _ = data_pipeline.build_loaders(dataset, lambda message: None, config)
+    samples = sum(len(labels) for _, labels in train_loader)
+    print(json.dumps({"samples": samples, "peak_rss_mb": peak_rss_kb() / 1024, "seconds": time.perf_counter() - start}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak memory of random-access and streaming loading.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 80000], help="dataset sizes in samples")
+    parser.add_argument("--image-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--child", nargs=2, metavar=("INDEX", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        one_pass(args.child[0], args.child[1] == "streaming", args.workers)
+        return
+
+    root = tempfile.mkdtemp(prefix="bench_streaming_")
+    try:
+        print(f"{'samples':>9} {'dataset MB':>11} {'random-access MB':>17} {'streaming MB':>13}")
+        for size in args.sizes:
+            index_path = write_synthetic_cache(os.path.join(root, str(size)), size, args.image_size)
+            results = {}
+            for mode in ("random", "streaming"):
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", index_path, mode, "--workers", str(args.workers)],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                results[mode] = json.loads(output.strip().splitlines()[-1])
+            dataset_mb = size * args.image_size * args.image_size * 3 / 2 ** 20
+            print(f"{size:>9} {dataset_mb:>11.0f} {results['random']['peak_rss_mb']:>17.0f} "
+                  f"{results['streaming']['peak_rss_mb']:>13.0f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+# benchmarks/bench_suite.py
+
+# Benchmarks every pipeline stage on synthetic data and a small CNN, on CPU,
+# and gates on regressions against stored baseline results:
+#   dataset_prep     load_dataset + building the dataset cache (cold and warm)
+#   loader           train loader throughput over the cached dataset
+#   train_adam/sgd   optizer.train step rate with each optimizer
+#   pruning          pruning stage time
+#   quantization     quantization stage time
+#   log_bus          GUI log bus throughput
+#
+# Each stage runs --repeat times and its best result is kept. A metric
+# regresses when it is worse than the baseline by more than the tolerance
+# (a fraction; 0.2 = 20%). Tolerances can be set per metric with
+# --tolerance-for, or in the baseline file under "tolerances".
+#
+# Baselines depend on the machine, so keep one baseline file per machine
+# (e.g. per nightly runner) and refresh it with --save-baseline after an
+# intended change.
+#
+# Usage:
+#   python benchmarks/bench_suite.py --save-baseline             # record a baseline
+#   python benchmarks/bench_suite.py                             # compare; exit 1 on regression
+#   python benchmarks/bench_suite.py --stages train_adam loader --tolerance 0.3
+#   python benchmarks/bench_suite.py --tolerance-for quantization.seconds=0.5 --json results.json
+#
+# Exit codes: 0 no regression (or no baseline yet), 1 regression, 2 bad arguments.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_TOLERANCE = 0.2
+
+
+def quiet(message):
+    pass
+
+
+class Workspace:
+    """Synthetic inputs shared by the stages, created on first use in a temporary directory."""
+    def __init__(self, args):
+        self.args = args
+        self.root = tempfile.mkdtemp(prefix="bench_suite_")
+        self._images = None
+        self._index = None
+
+    def image_folder(self):
+        """A Custom-style dataset folder of random PNGs, <class>/<n>.png."""
+        if self._images is None:
+            import numpy as np
+            from PIL import Image
+
+            rng = np.random.default_rng(0)
+            self._images = os.path.join(self.root, "images")
+            for label in range(self.args.classes):
+                class_dir = os.path.join(self._images, f"class{label}")
+                os.makedirs(class_dir)
+                for i in range(self.args.images // self.args.classes):
+                    pixels = rng.integers(0, 256, size=(48, 48, 3), dtype=np.uint8)
+                    Image.fromarray(pixels).save(os.path.join(class_dir, f"{i}.png"))
+        return self._images
+
+    def index_path(self):
+        if self._index is None:
+            from backend import dataset_cache
+            self._index = dataset_cache.build_cache(self.image_folder(), quiet, cache_dir=os.path.join(self.root, "cache"))
+        return self._index
+
+    def tensor_loader(self, batches=20, batch_size=32):
+        """A DataLoader over random 3x32x32 inputs, for the model stages."""
+        import torch
+        from torch.utils.data import DataLoader, TensorDataset
+
+        generator = torch.Generator().manual_seed(0)
+        inputs = torch.randn(batches * batch_size, 3, 32, 32, generator=generator)
+        labels = torch.randint(0, self.args.classes, (batches * batch_size,), generator=generator)
+        return DataLoader(TensorDataset(inputs, labels), batch_size=batch_size, shuffle=True, generator=generator)
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def small_cnn(num_classes):
+    import torch
+    import torch.nn as nn
+
+    torch.manual_seed(0)
+    return nn.Sequential(
+        nn.Conv2d(3, 32, 3, padding=1), nn.BatchNorm2d(32), nn.ReLU(), nn.MaxPool2d(2),
+        nn.Conv2d(32, 64, 3, padding=1), nn.BatchNorm2d(64), nn.ReLU(), nn.MaxPool2d(2),
+        nn.Flatten(), nn.Linear(64 * 8 * 8, 128), nn.ReLU(), nn.Linear(128, num_classes),
+    )
+
+
+def metric(value, unit, better):
+    return {"value": value, "unit": unit, "better": better}
+
+
+# --- Stages: each returns {metric name: metric(...)} ---
+
+def bench_dataset_prep(workspace):
+    from backend import dataset_cache, dataset_utils
+
+    folder = workspace.image_folder()
+    cache_dir = tempfile.mkdtemp(dir=workspace.root)
+    start = time.perf_counter()
+    path = dataset_utils.load_dataset("Custom", folder, quiet)
+    dataset_cache.build_cache(path, quiet, cache_dir=cache_dir)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    path = dataset_utils.load_dataset("Custom", folder, quiet)
+    dataset_cache.build_cache(path, quiet, cache_dir=cache_dir)
+    warm = time.perf_counter() - start
+    return {
+        "cold_images_per_sec": metric(workspace.args.images / cold, "images/s", "higher"),
+        "warm_seconds": metric(warm, "s", "lower"),
+    }
+
+
+def bench_loader(workspace):
+    from backend import data_pipeline, dataset_cache
+
+    dataset = dataset_cache.ShardedDataset(workspace.index_path())
+    config = {"batch_size": 32, "num_workers": workspace.args.workers, "val_split": 0.0}
+    train_loader, _ = data_pipeline.build_loaders(dataset, quiet, config)
+    for _ in train_loader:  # warm up the page cache and any workers
+        pass
+    start = time.perf_counter()
+    samples = sum(len(labels) for _, labels in train_loader)
+    return {"samples_per_sec": metric(samples / (time.perf_counter() - start), "samples/s", "higher")}
+
+
+def bench_train(workspace, optimizer_type):
+    from backend import optizer, telemetry
+
+    epochs = []
+
+    def collect(message):
+        if isinstance(message, dict) and message["type"] == "epoch":
+            epochs.append(message)
+
+    loader = workspace.tensor_loader()
+    tel = telemetry.Telemetry(collect, structured=True, step_every=0)
+    optizer.train(small_cnn(workspace.args.classes), (loader, loader), epochs=3, optimizer_type=optimizer_type,
+                  fine_tune=False, status_callback=tel, save_path=os.path.join(workspace.root, "model.pth"))
+    # The first epoch includes one-off warm-up costs
+    best = max(event["samples_per_sec"] for event in epochs[1:])
+    step_ms = min(1000.0 * event["compute_s"] / event["steps"] for event in epochs[1:])
+    return {
+        "samples_per_sec": metric(best, "samples/s", "higher"),
+        "step_ms": metric(step_ms, "ms", "lower"),
+    }
+
+
+def bench_pruning(workspace):
+    from backend import pruning
+
+    model = small_cnn(workspace.args.classes).eval()
+    start = time.perf_counter()
+    pruning.prune_model(model, workspace.tensor_loader(), sparsity=0.4, status_callback=quiet)
+    return {"seconds": metric(time.perf_counter() - start, "s", "lower")}
+
+
+def bench_quantization(workspace):
+    from backend import quantization
+
+    model = small_cnn(workspace.args.classes).eval()
+    start = time.perf_counter()
+    quantization.quantize_model(model, workspace.tensor_loader(), status_callback=quiet)
+    return {"seconds": metric(time.perf_counter() - start, "s", "lower")}
+
+
+def bench_log_bus(workspace):
+    from frontend.log_bus import LogBus
+
+    messages = workspace.args.messages
+    bus = LogBus(log_path=os.path.join(workspace.root, "bench.log"))
+
+    def producer():
+        for i in range(messages):
+            bus.put(f"[Trainer] step {i} loss={1.0 / (i + 1):.6f}")
+
+    thread = threading.Thread(target=producer, daemon=True)
+    start = time.perf_counter()
+    thread.start()
+    while thread.is_alive() or not bus.empty():
+        time.sleep(0.01)
+        bus.drain()
+    elapsed = time.perf_counter() - start
+    bus.close()
+    return {"messages_per_sec": metric(messages / elapsed, "messages/s", "higher")}
+
+
+STAGES = {
+    "dataset_prep": bench_dataset_prep,
+    "loader": bench_loader,
+    "train_adam": lambda workspace: bench_train(workspace, "adam"),
+    "train_sgd": lambda workspace: bench_train(workspace, "sgd"),
+    "pruning": bench_pruning,
+    "quantization": bench_quantization,
+    "log_bus": bench_log_bus,
+}
+
+
+def best_of(runs):
+    """Keeps the best value of every metric across repeated runs of a stage."""
+    best = {}
+    for run in runs:
+        for name, m in run.items():
+            current = best.get(name)
+            if current is None or (m["value"] > current["value"]) == (m["better"] == "higher"):
+                best[name] = m
+    return best
+
+
+def environment():
+    import torch
+    return {
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+    }
+
+
+def compare(results, baseline, tolerance, tolerances):
+    """
+    Compares results with a baseline.
+
+    Returns:
+        list: (key, current, baseline, change, allowed, regressed) for every metric in both.
+    """
+    rows = []
+    for stage, metrics in results["stages"].items():
+        for name, m in metrics.items():
+            key = f"{stage}.{name}"
+            base = baseline["stages"].get(stage, {}).get(name)
+            if base is None or not base["value"]:
+                continue
+            change = (m["value"] - base["value"]) / base["value"]
+            worse = -change if m["better"] == "higher" else change
+            allowed = tolerances.get(key, tolerances.get(stage, tolerance))
+            rows.append((key, m, base, change, allowed, worse > allowed))
+    return rows
+
+
+def parse_tolerances(items):
+    tolerances = {}
+    for item in items or []:
+        key, _, value = item.partition("=")
+        tolerances[key] = float(value)
+    return tolerances
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage and gate on regressions.")
+    parser.add_argument("--stages", nargs="+", choices=sorted(STAGES), help="stages to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the best is kept")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed regression as a fraction of the baseline (default 0.2)")
+    parser.add_argument("--tolerance-for", nargs="+", metavar="METRIC=FRACTION",
+                        help="per-stage or per-metric tolerance, e.g. quantization=0.5 loader.samples_per_sec=0.3")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to this file")
+    parser.add_argument("--images", type=int, default=512, help="images in the synthetic dataset")
+    parser.add_argument("--classes", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=0, help="loader workers for the loader stage")
+    parser.add_argument("--messages", type=int, default=100000, help="messages for the log bus stage")
+    args = parser.parse_args()
+    try:
+        cli_tolerances = parse_tolerances(args.tolerance_for)
+    except ValueError:
+        parser.error("--tolerance-for expects METRIC=FRACTION")
+
+    workspace = Workspace(args)
+    results = {"environment": environment(), "time": time.time(), "stages": {}}
+    try:
+        for stage in args.stages or list(STAGES):
+            runs = [STAGES[stage](workspace) for _ in range(args.repeat)]
+            results["stages"][stage] = best_of(runs)
+            for name, m in results["stages"][stage].items():
+                print(f"{stage + '.' + name:<36} {m['value']:12.2f} {m['unit']}", flush=True)
+    finally:
+        workspace.close()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        previous = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        # Stages that were not run keep their previous baseline
+        baseline = {**results, "stages": {**previous.get("stages", {}), **results["stages"]},
+                    "tolerances": previous.get("tolerances", {})}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != results["environment"]:
+        print(f"Warning: the baseline was recorded in a different environment: {baseline.get('environment')}")
+
+    tolerances = {**baseline.get("tolerances", {}), **cli_tolerances}
+    rows = compare(results, baseline, args.tolerance, tolerances)
+    print(f"\n{'metric':<36} {'baseline':>12} {'current':>12} {'change':>8} {'allowed':>8}")
+    for key, current, base, change, allowed, regressed in rows:
+        print(f"{key:<36} {base['value']:12.2f} {current['value']:12.2f} {change:+8.1%} {allowed:8.0%}"
+              + ("  REGRESSION" if regressed else ""))
+    regressions = [row[0] for row in rows if row[5]]
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed: {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
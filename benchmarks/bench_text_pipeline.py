@@ -0,0 +1,172 @@
+# benchmarks/bench_text_pipeline.py
+
+# Measures the pre-tokenized text pipeline (backend/text_cache.py) on a
+# synthetic IMDB-like corpus (review lengths are log-normal, like real
+# reviews). It reports:
+#   - tokenization time into the cache with 1 vs. N processes, and the time
+#     to reopen an existing cache;
+#   - training throughput of a small BERT for one epoch with
+#       naive      texts tokenized on the fly, padded to max_length
+#       max_len    pre-tokenized, padded to max_length
+#       dynamic    pre-tokenized, padded to the longest sample, random batches
+#       bucketed   pre-tokenized, padded to the longest sample, length-bucketed
+#     together with the share of real (non-padding) tokens per batch.
+#
+# The tokenizer and the model are built locally (no hub download).
+#
+# Usage: python benchmarks/bench_text_pipeline.py [--texts 4000] [--max-length 512] [--workers 4]
+
+import argparse
+import csv
+import functools
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def write_corpus(root, num_texts, vocab_size, seed=0):
+    """Writes reviews.csv with `num_texts` random reviews; returns the vocabulary."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    words = [f"w{i}" for i in range(vocab_size)]
+    lengths = np.clip(rng.lognormal(5.0, 0.75, size=num_texts).astype(int), 5, 2000)
+    with open(os.path.join(root, "reviews.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["review", "sentiment"])
+        for length in lengths:
+            text = " ".join(words[i] for i in rng.integers(0, vocab_size, size=length))
+            writer.writerow([text, "positive" if rng.random() < 0.5 else "negative"])
+    return words
+
+
+def write_tokenizer(directory, words):
+    """Saves a BERT-style WordPiece tokenizer over `words` that AutoTokenizer can load."""
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast
+
+    special = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    vocab = {token: i for i, token in enumerate(special + words)}
+    tokenizer = Tokenizer(models.WordPiece(vocab, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])])
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]", cls_token="[CLS]",
+                            sep_token="[SEP]", mask_token="[MASK]").save_pretrained(directory)
+    return len(vocab)
+
+
+def small_bert(vocab_size, max_length):
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification
+
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=vocab_size, hidden_size=128, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=256, max_position_embeddings=max_length, num_labels=2)
+    return BertForSequenceClassification(config)
+
+
+class RawTextDataset:
+    """Raw (text, label) pairs, tokenized in the collate function on every epoch."""
+    def __init__(self, csv_path):
+        with open(csv_path, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.texts = [row["review"] for row in rows]
+        self.labels = [int(row["sentiment"] == "positive") for row in rows]
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __getitem__(self, idx):
+        return self.texts[idx], self.labels[idx]
+
+
+def collate_raw(samples, tokenizer, max_length):
+    import torch
+
+    encoded = tokenizer([text for text, _ in samples], padding="max_length", truncation=True,
+                        max_length=max_length, return_tensors="pt")
+    inputs = {"input_ids": encoded["input_ids"], "attention_mask": encoded["attention_mask"]}
+    return inputs, torch.as_tensor([label for _, label in samples], dtype=torch.long)
+
+
+def train_epoch(model, loader):
+    """Trains one epoch; returns (samples/sec, real-token share of the batches)."""
+    from backend import optizer, telemetry
+
+    events = []
+    status_callback = telemetry.Telemetry(lambda message: events.append(message), structured=True, step_every=0)
+    real = padded = 0
+    for inputs, _ in loader:
+        real += int(inputs["attention_mask"].sum())
+        padded += inputs["attention_mask"].numel()
+    optizer.fit(model, loader, epochs=1, lr=1e-4, fine_tune=False, status_callback=status_callback)
+    epoch = next(event for event in events if isinstance(event, dict) and event["type"] == "epoch")
+    return epoch["samples_per_sec"], real / padded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-tokenized, length-bucketed text pipeline vs. naive max-length padding.")
+    parser.add_argument("--texts", type=int, default=4000)
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--vocab-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="tokenizer processes")
+    args = parser.parse_args()
+
+    from torch.utils.data import DataLoader
+
+    from backend import data_pipeline, text_cache
+    from transformers import AutoTokenizer
+
+    root = tempfile.mkdtemp(prefix="bench_text_pipeline_")
+    try:
+        data_dir = os.path.join(root, "data")
+        tokenizer_dir = os.path.join(root, "tokenizer")
+        os.makedirs(data_dir)
+        words = write_corpus(data_dir, args.texts, args.vocab_size)
+        vocab_size = write_tokenizer(tokenizer_dir, words)
+        quiet = lambda message: None
+
+        print(f"{args.texts} texts, max_length {args.max_length}, batch size {args.batch_size}")
+        for workers in sorted({1, args.workers}):
+            cache_dir = os.path.join(root, f"cache-{workers}")
+            start = time.perf_counter()
+            index_path = text_cache.build_cache(data_dir, tokenizer_dir, quiet, cache_dir=cache_dir,
+                                                config={"workers": workers, "max_length": args.max_length})
+            print(f"tokenize, {workers} process(es)      {time.perf_counter() - start:8.2f} s", flush=True)
+        start = time.perf_counter()
+        text_cache.build_cache(data_dir, tokenizer_dir, quiet, cache_dir=cache_dir,
+                               config={"workers": args.workers, "max_length": args.max_length})
+        print(f"reopen cached tokens           {time.perf_counter() - start:8.2f} s", flush=True)
+
+        dataset = text_cache.TokenizedDataset(index_path)
+        collate = functools.partial(data_pipeline.collate_tokens, pad_token_id=dataset.pad_token_id)
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_dir)
+        loaders = {
+            "naive": DataLoader(RawTextDataset(os.path.join(data_dir, "reviews.csv")), batch_size=args.batch_size,
+                                shuffle=True, collate_fn=functools.partial(collate_raw, tokenizer=tokenizer,
+                                                                           max_length=args.max_length)),
+            "max_len": DataLoader(dataset, batch_size=args.batch_size, shuffle=True,
+                                  collate_fn=functools.partial(collate, pad_to=args.max_length)),
+            "dynamic": DataLoader(dataset, batch_size=args.batch_size, shuffle=True, collate_fn=collate),
+            "bucketed": DataLoader(dataset, collate_fn=collate, batch_sampler=data_pipeline.BucketBatchSampler(
+                dataset.lengths, args.batch_size)),
+        }
+        print(f"{'pipeline':>9} {'samples/s':>10} {'speedup':>8} {'real tokens':>12}")
+        base = None
+        for name, loader in loaders.items():
+            throughput, real_share = train_epoch(small_bert(vocab_size, args.max_length), loader)
+            base = base or throughput
+            print(f"{name:>9} {throughput:>10.1f} {throughput / base:>7.2f}x {real_share:>11.0%}", flush=True)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# cli.py
+
+# This is the headless entry point for the Universal ML Model Builder. It runs
+# the same model -> dataset -> training pipeline as the GUI, driven by one or
+# more YAML/JSON config files whose keys match the GUI's training parameters.
+# It never imports tkinter, so it starts quickly on build servers and in cron.
+#
+# Usage:
+#   python cli.py run.yaml other.json               # run configs one after another
+#   python cli.py sweep/*.json --parallel 4         # run in 4 worker processes
+#   python cli.py run.yaml --output progress.jsonl  # also write events to a file
+#   python cli.py run.yaml --resume                 # continue from the latest checkpoints
+#   python cli.py tune.yaml --sweep                 # hyperparameter sweep, see backend/sweep.py
+#
+# A config file holds either one params dict or a list of them, e.g.
+#   model_choice: BERT
+#   dataset_source: Built-in
+#   dataset_info: IMDB
+#   epochs: 3
+#
+# Progress is written to stdout as one JSON object per line. Telemetry
+# (stage timings, step and epoch throughput, see backend/telemetry.py) comes
+# as "telemetry" events carrying the event's fields.
+#
+# Exit codes:
+#   0  every job succeeded
+#   1  at least one job failed or was cancelled (for sweeps: no trial succeeded)
+#   2  invalid arguments or config files
+#   130 interrupted
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+from backend import pipeline
+
+EXIT_OK = 0
+EXIT_JOB_FAILED = 1
+EXIT_BAD_CONFIG = 2
+EXIT_INTERRUPTED = 130
+
+
+class EventWriter:
+    """Writes structured progress events as JSON lines to stdout and an optional file."""
+    def __init__(self, output_path=None):
+        self._lock = threading.Lock()
+        self._file = open(output_path, "a", encoding="utf-8") if output_path else None
+
+    def emit(self, event, **fields):
+        line = json.dumps({"time": round(time.time(), 3), "event": event, **fields}, default=str)
+        with self._lock:
+            print(line, flush=True)
+            if self._file is not None:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    def status(self, job, message):
+        """Emits a pipeline status message, or a telemetry event (a dict) with its fields."""
+        if isinstance(message, dict):
+            self.emit("telemetry", job=job, **message)
+        else:
+            self.emit("status", job=job, message=message)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def load_configs(paths):
+    """
+    Reads and validates every config file.
+
+    Returns:
+        list: (source, params) pairs, where source names the file and entry.
+
+    Raises:
+        ValueError: If a file cannot be parsed or a config is invalid.
+    """
+    configs = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        if path.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError(f"{path}: PyYAML is required to read YAML configs.")
+            try:
+                data = yaml.safe_load(text)
+            except yaml.YAMLError as e:
+                raise ValueError(f"{path}: {e}")
+        else:
+            data = json.loads(text)
+
+        entries = data if isinstance(data, list) else [data]
+        for i, entry in enumerate(entries):
+            source = path if len(entries) == 1 else f"{path}[{i}]"
+            if not isinstance(entry, dict):
+                raise ValueError(f"{source}: expected a mapping of parameters.")
+            try:
+                configs.append((source, pipeline.complete_params(entry)))
+            except ValueError as e:
+                raise ValueError(f"{source}: {e}")
+    return configs
+
+
+def run_sequential(configs, events):
+    """Runs each config in this process, one after another. Returns the number of failures."""
+    failures = 0
+    for job_id, (source, params) in enumerate(configs, start=1):
+        events.emit("started", job=job_id, config=source)
+
+        def status_callback(message, job_id=job_id):
+            events.status(job_id, message)
+
+        try:
+            result = pipeline.run_pipeline(params, status_callback)
+            events.emit("succeeded", job=job_id, config=source, result=result)
+        except Exception as e:
+            failures += 1
+            events.emit("failed", job=job_id, config=source, error=str(e))
+    return failures
+
+
+def run_parallel(configs, events, workers, threads_per_job):
+    """Runs the configs in a pool of worker processes. Returns the number of failures."""
+    from backend.scheduler import JobScheduler, SUCCEEDED
+
+    sources = {}
+    failures = []
+
+    def on_status(job, message):
+        events.status(job.id, message)
+
+    def on_finished(job):
+        if job.status == SUCCEEDED:
+            events.emit("succeeded", job=job.id, config=sources[job.id], result=job.result)
+        else:
+            failures.append(job.id)
+            events.emit(job.status, job=job.id, config=sources[job.id], error=job.error)
+
+    scheduler = JobScheduler(max_workers=workers, threads_per_job=threads_per_job, on_status=on_status, on_finished=on_finished)
+    try:
+        for source, params in configs:
+            job_id = scheduler.submit(params)
+            sources[job_id] = source
+            events.emit("queued", job=job_id, config=source)
+        scheduler.wait()
+    finally:
+        scheduler.shutdown()
+    return len(failures)
+
+
+def run_sweeps(configs, events):
+    """Runs each config as a hyperparameter sweep. Returns the number of failed sweeps."""
+    from backend import sweep
+
+    failures = 0
+    for job_id, (source, spec) in enumerate(configs, start=1):
+        events.emit("started", job=job_id, config=source)
+
+        def status_callback(message, job_id=job_id):
+            events.status(job_id, message)
+
+        try:
+            table, name = sweep.run_sweep(spec, status_callback)
+            best = table.best(name, limit=1)
+            if not best:
+                raise RuntimeError("No trial succeeded.")
+            events.emit("succeeded", job=job_id, config=source, sweep=name, results=table.db_path, best=best[0])
+        except Exception as e:
+            failures += 1
+            events.emit("failed", job=job_id, config=source, error=str(e))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run training pipelines without the GUI.")
+    parser.add_argument("configs", nargs="+", help="YAML or JSON pipeline config files")
+    parser.add_argument("--parallel", type=int, default=0, metavar="N",
+                        help="run configs in N worker processes (default: sequentially in this process)")
+    parser.add_argument("--threads-per-job", type=int, default=None, metavar="N",
+                        help="torch CPU threads per job in parallel mode")
+    parser.add_argument("--output", metavar="FILE", help="also append progress events to this JSONL file")
+    parser.add_argument("--resume", action="store_true",
+                        help="resume every config from its latest checkpoint")
+    parser.add_argument("--sweep", action="store_true",
+                        help="treat each config as a hyperparameter sweep spec (uses its 'sweep' entry)")
+    args = parser.parse_args(argv)
+
+    try:
+        configs = load_configs(args.configs)
+    except (OSError, ValueError) as e:
+        print(f"Invalid config: {e}", file=sys.stderr)
+        return EXIT_BAD_CONFIG
+    if args.resume:
+        configs = [(source, {**params, "resume": True}) for source, params in configs]
+
+    events = EventWriter(args.output)
+    start = time.time()
+    try:
+        if args.sweep:
+            failures = run_sweeps(configs, events)
+        elif args.parallel > 0:
+            failures = run_parallel(configs, events, args.parallel, args.threads_per_job)
+        else:
+            failures = run_sequential(configs, events)
+        events.emit("finished", jobs=len(configs), failed=failures, seconds=round(time.time() - start, 3))
+    except KeyboardInterrupt:
+        events.emit("interrupted")
+        return EXIT_INTERRUPTED
+    finally:
+        events.close()
+    return EXIT_JOB_FAILED if failures else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
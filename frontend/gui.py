@@ -2,27 +2,40 @@ import sys
 import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import threading
-import queue
 
 # Add the project root to sys.path dynamically
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 # It's good practice to handle potential import errors
 try:
-    from backend import model_loader, dataset_utils, train
+    from backend.scheduler import JobScheduler, SUCCEEDED, FAILED
+    from backend import telemetry
+    from frontend.log_bus import LogBus
 except ImportError as e:
     messagebox.showerror("Import Error", f"Could not import backend modules:\n{e}")
     exit()
 
+# Status log settings: how often the GUI drains the log bus, how many
+# messages may be pending before the oldest are dropped, how many lines
+# the log widget keeps, and where the full log is written.
+LOG_TICK_MS = 100
+LOG_BUS_SIZE = 10000
+LOG_MAX_LINES = 2000
+LOG_FILE = os.path.join(os.getcwd(), "logs", "pipeline.log")
+
+# How many training jobs may run at once, each in its own worker process.
+# Override with the MODEL_BUILDER_MAX_JOBS environment variable, or pass
+# max_concurrent_jobs to ModelBuilderApp.
+MAX_CONCURRENT_JOBS = int(os.environ.get("MODEL_BUILDER_MAX_JOBS") or 2)
+
 class ModelBuilderApp:
     """
     The main class for the Tkinter GUI application.
     """
-    def __init__(self, root):
+    def __init__(self, root, max_concurrent_jobs=None):
         self.root = root
         self.root.title("Universal ML Model Builder")
-        self.root.geometry("600x750")
+        self.root.geometry("600x900")
         self.root.configure(bg='#f0f0f0')
 
         # Style configuration
@@ -35,8 +48,15 @@ class ModelBuilderApp:
         self.style.configure('TCombobox', font=('Arial', 10))
         self.style.configure('Header.TLabel', font=('Arial', 14, 'bold'))
 
-        # Queue for backend-to-frontend communication
-        self.log_queue = queue.Queue()
+        # Bus for backend-to-frontend communication
+        self.log_bus = LogBus(maxsize=LOG_BUS_SIZE, log_path=LOG_FILE)
+
+        # Training jobs run in worker processes, off the Tk main loop
+        # Latest telemetry per job (current stage, throughput), shown in the jobs table
+        self.job_progress = {}
+        self.scheduler = JobScheduler(max_workers=max_concurrent_jobs or MAX_CONCURRENT_JOBS,
+                                      on_status=self.on_job_status, on_finished=self.on_job_finished)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.create_widgets()
         self.process_log_queue()
@@ -101,22 +121,75 @@ class ModelBuilderApp:
         self.optimizer = tk.StringVar(value="Adam")
         ttk.Combobox(training_frame, textvariable=self.optimizer, values=["Adam", "SGD"], width=10).grid(row=1, column=1, padx=5, pady=5, sticky=tk.W)
 
+        ttk.Label(training_frame, text="Loader Workers:").grid(row=1, column=2, padx=5, pady=5, sticky=tk.W)
+        self.num_workers = tk.StringVar(value="auto")
+        ttk.Entry(training_frame, textvariable=self.num_workers, width=10).grid(row=1, column=3, padx=5, pady=5, sticky=tk.W)
+
         self.fine_tune = tk.BooleanVar(value=True)
         ttk.Checkbutton(training_frame, text="Fine-Tune Pretrained Model", variable=self.fine_tune).grid(row=2, column=0, columnspan=2, pady=5, sticky=tk.W)
 
+        self.resume = tk.BooleanVar(value=False)
+        ttk.Checkbutton(training_frame, text="Resume From Last Checkpoint", variable=self.resume).grid(row=2, column=2, columnspan=2, pady=5, sticky=tk.W)
+
+        self.streaming = tk.BooleanVar(value=False)
+        ttk.Checkbutton(training_frame, text="Stream Dataset (Larger Than RAM)", variable=self.streaming).grid(row=3, column=0, columnspan=2, pady=5, sticky=tk.W)
+
+        self.profile = tk.BooleanVar(value=False)
+        ttk.Checkbutton(training_frame, text="Profile Training Steps", variable=self.profile).grid(row=3, column=2, columnspan=2, pady=5, sticky=tk.W)
+
+        ttk.Label(training_frame, text="Training Processes:").grid(row=4, column=0, padx=5, pady=5, sticky=tk.W)
+        self.world_size = tk.IntVar(value=1)
+        ttk.Entry(training_frame, textvariable=self.world_size, width=10).grid(row=4, column=1, padx=5, pady=5, sticky=tk.W)
+
+        ttk.Label(training_frame, text="Batch Size:").grid(row=4, column=2, padx=5, pady=5, sticky=tk.W)
+        self.batch_size = tk.IntVar(value=32)
+        ttk.Entry(training_frame, textvariable=self.batch_size, width=10).grid(row=4, column=3, padx=5, pady=5, sticky=tk.W)
+
+        self.auto_batch = tk.BooleanVar(value=False)
+        ttk.Checkbutton(training_frame, text="Auto-Tune Batch Size", variable=self.auto_batch).grid(row=5, column=0, columnspan=2, pady=5, sticky=tk.W)
+
+        ttk.Label(training_frame, text="RAM Budget (MB):").grid(row=5, column=2, padx=5, pady=5, sticky=tk.W)
+        self.memory_budget = tk.StringVar(value="auto")
+        ttk.Entry(training_frame, textvariable=self.memory_budget, width=10).grid(row=5, column=3, padx=5, pady=5, sticky=tk.W)
+
         # --- Optimization ---
         opt_frame = ttk.LabelFrame(main_frame, text="4. Post-Training Optimization", padding="10")
         opt_frame.pack(fill=tk.X, pady=10)
 
+        prune_frame = ttk.Frame(opt_frame)
+        prune_frame.pack(anchor=tk.W)
         self.prune = tk.BooleanVar(value=False)
-        ttk.Checkbutton(opt_frame, text="Apply Pruning (Reduce Size)", variable=self.prune).pack(anchor=tk.W)
+        ttk.Checkbutton(prune_frame, text="Apply Pruning (Reduce Size)", variable=self.prune).pack(side="left")
+        ttk.Label(prune_frame, text="Sparsity:").pack(side="left", padx=(15, 5))
+        self.prune_sparsity = tk.DoubleVar(value=0.4)
+        ttk.Entry(prune_frame, textvariable=self.prune_sparsity, width=6).pack(side="left")
         
         self.quantize = tk.BooleanVar(value=False)
         ttk.Checkbutton(opt_frame, text="Apply Quantization (Increase Speed)", variable=self.quantize).pack(anchor=tk.W)
 
+        self.export = tk.BooleanVar(value=False)
+        ttk.Checkbutton(opt_frame, text="Export TorchScript/ONNX + Benchmark", variable=self.export).pack(anchor=tk.W)
+
         # --- Action Button ---
-        self.train_button = ttk.Button(main_frame, text="Start Training Pipeline", command=self.start_training_thread)
-        self.train_button.pack(pady=20, fill=tk.X, ipady=5)
+        action_frame = ttk.Frame(main_frame)
+        action_frame.pack(pady=10, fill=tk.X)
+        ttk.Label(action_frame, text="Priority:").pack(side="left", padx=5)
+        self.priority = tk.IntVar(value=0)
+        ttk.Entry(action_frame, textvariable=self.priority, width=5).pack(side="left", padx=5)
+        self.train_button = ttk.Button(action_frame, text="Queue Training Job", command=self.submit_training_job)
+        self.train_button.pack(side="left", fill=tk.X, expand=True, padx=5, ipady=5)
+
+        # --- Jobs ---
+        jobs_frame = ttk.LabelFrame(main_frame, text="Jobs (lower priority runs first)", padding="10")
+        jobs_frame.pack(fill=tk.X, pady=10)
+        self.jobs_table = ttk.Treeview(jobs_frame, columns=("model", "dataset", "priority", "status", "progress"), height=4)
+        self.jobs_table.heading("#0", text="Job")
+        self.jobs_table.column("#0", width=50)
+        for column, width in (("model", 70), ("dataset", 150), ("priority", 60), ("status", 80), ("progress", 140)):
+            self.jobs_table.heading(column, text=column.capitalize())
+            self.jobs_table.column(column, width=width)
+        self.jobs_table.pack(fill=tk.X)
+        ttk.Button(jobs_frame, text="Cancel Selected Job", command=self.cancel_selected_job).pack(pady=5, anchor=tk.E)
 
         # --- Status Log ---
         log_frame = ttk.LabelFrame(main_frame, text="Status Log", padding="10")
@@ -128,21 +201,44 @@ class ModelBuilderApp:
         self.update_dataset_options()
 
     def log_message(self, message):
-        """Thread-safe way to add a message to the log area."""
+        """Adds a single message to the log area. Must run on the main thread."""
+        self.log_messages([message])
+
+    def log_messages(self, messages):
+        """
+        Adds a batch of messages to the log area with a single insert and trims
+        the widget to the most recent LOG_MAX_LINES lines. Must run on the main thread.
+        """
+        if not messages:
+            return
         self.log_area.configure(state='normal')
-        self.log_area.insert(tk.END, message + '\n')
+        self.log_area.insert(tk.END, '\n'.join(messages) + '\n')
+        line_count = int(self.log_area.index('end-1c').split('.')[0]) - 1
+        if line_count > LOG_MAX_LINES:
+            self.log_area.delete('1.0', f'{line_count - LOG_MAX_LINES + 1}.0')
         self.log_area.configure(state='disabled')
         self.log_area.see(tk.END)
 
+    def handle_controls(self, controls):
+        """Reacts to the SUCCESS/ERROR control events of finished jobs."""
+        for msg in controls:
+            if msg == "SUCCESS":
+                messagebox.showinfo("Success", "Model training pipeline completed successfully!")
+            elif msg.startswith("ERROR:"):
+                messagebox.showerror("Pipeline Error", msg)
+
+    def drain_log_bus(self):
+        """Drains everything pending on the log bus and displays it."""
+        self.log_messages(self.log_bus.drain())
+        self.handle_controls(self.log_bus.drain_controls())
+
     def process_log_queue(self):
-        """Checks the queue for messages from the backend and displays them."""
+        """Periodically drains the log bus and displays the messages."""
         try:
-            message = self.log_queue.get_nowait()
-            self.log_message(message)
-        except queue.Empty:
-            pass
+            self.drain_log_bus()
+            self.refresh_jobs()
         finally:
-            self.root.after(100, self.process_log_queue)
+            self.root.after(LOG_TICK_MS, self.process_log_queue)
 
     def select_custom_dataset(self):
         folder = filedialog.askdirectory()
@@ -164,10 +260,10 @@ class ModelBuilderApp:
         elif source == "Custom":
             self.custom_frame.pack(pady=5, anchor=tk.W)
 
-    def start_training_thread(self):
+    def submit_training_job(self):
         """
-        Validates user input and starts the backend pipeline in a separate thread
-        to keep the GUI responsive.
+        Validates user input and queues the backend pipeline on the job
+        scheduler, which runs it in a worker process to keep the GUI responsive.
         """
         # --- Input Validation ---
         source = self.dataset_source.get()
@@ -187,6 +283,40 @@ class ModelBuilderApp:
                 messagebox.showerror("Error", "Please select a custom dataset folder!")
                 return
             dataset_info = self.dataset_path.get()
+
+        num_workers = self.num_workers.get().strip().lower()
+        if num_workers not in ("", "auto") and not num_workers.isdigit():
+            messagebox.showerror("Error", "Loader workers must be a whole number or 'auto'!")
+            return
+
+        try:
+            prune_sparsity = self.prune_sparsity.get()
+        except tk.TclError:
+            prune_sparsity = -1
+        if not 0 <= prune_sparsity < 1:
+            messagebox.showerror("Error", "Pruning sparsity must be between 0 and 1!")
+            return
+
+        try:
+            world_size = self.world_size.get()
+        except tk.TclError:
+            world_size = 0
+        if world_size < 1:
+            messagebox.showerror("Error", "Training processes must be a whole number of at least 1!")
+            return
+
+        try:
+            batch_size = self.batch_size.get()
+        except tk.TclError:
+            batch_size = 0
+        if batch_size < 1:
+            messagebox.showerror("Error", "Batch size must be a whole number of at least 1!")
+            return
+
+        memory_budget = self.memory_budget.get().strip().lower()
+        if memory_budget not in ("", "auto") and not memory_budget.isdigit():
+            messagebox.showerror("Error", "RAM budget must be a whole number of MB or 'auto'!")
+            return
         
         # --- Collect all parameters ---
         params = {
@@ -198,64 +328,79 @@ class ModelBuilderApp:
             "optimizer_type": self.optimizer.get(),
             "fine_tune": self.fine_tune.get(),
             "prune": self.prune.get(),
-            "quantize": self.quantize.get()
+            "prune_sparsity": prune_sparsity,
+            "quantize": self.quantize.get(),
+            "export": self.export.get(),
+            "num_workers": int(num_workers) if num_workers.isdigit() else None,
+            "resume": self.resume.get(),
+            "streaming": self.streaming.get(),
+            "profile": self.profile.get(),
+            "world_size": world_size,
+            "batch_size": batch_size,
+            "auto_batch": self.auto_batch.get(),
+            "tune_memory_budget_mb": int(memory_budget) if memory_budget.isdigit() else None
         }
 
-        # Disable button to prevent multiple runs
-        self.train_button.config(state="disabled", text="Training in Progress...")
-        
-        # Run the backend pipeline in a daemon thread
-        threading.Thread(target=self.run_backend_pipeline, args=(params,), daemon=True).start()
-
-    def run_backend_pipeline(self, params):
-        """
-        The target function for the training thread. It calls the backend modules.
-        """
         try:
-            # --- Status Callback Function ---
-            # This function will be passed to the backend so it can send updates
-            def status_callback(message):
-                self.log_queue.put(message)
-
-            status_callback("--- Starting Backend Pipeline ---")
-            
-            # 1. Load Model
-            model = model_loader.load_model(params["model_choice"], status_callback)
-            
-            # 2. Load Dataset
-            dataset_path = dataset_utils.load_dataset(params["dataset_source"], params["dataset_info"], status_callback)
-            
-            # 3. Train and Optimize
-            train.run_training_pipeline(model, dataset_path, params, status_callback)
-            
-            status_callback("--- Backend Pipeline Finished Successfully! ---")
-            self.log_queue.put("SUCCESS")
-
-        except Exception as e:
-            self.log_queue.put(f"ERROR: {e}")
-        finally:
-            # Re-enable the button from the main thread
-            self.root.after(0, self.finalize_training)
-
-    def finalize_training(self):
-        """
-        This method is called on the main thread after training finishes
-        to safely update the GUI.
-        """
-        # Check for success/error messages from the queue
-        while not self.log_queue.empty():
-            try:
-                msg = self.log_queue.get_nowait()
-                if msg == "SUCCESS":
-                     messagebox.showinfo("Success", "Model training pipeline completed successfully!")
-                elif msg.startswith("ERROR:"):
-                     messagebox.showerror("Pipeline Error", msg)
-                else: # regular log message
-                    self.log_message(msg)
-            except queue.Empty:
-                break
-
-        self.train_button.config(state="normal  ", text="Start Training Pipeline")
+            priority = self.priority.get()
+        except tk.TclError:
+            messagebox.showerror("Error", "Priority must be a whole number!")
+            return
+
+        job_id = self.scheduler.submit(params, priority=priority)
+        self.log_bus.put(f"[Scheduler] Queued job {job_id}: {params['model_choice']} on {dataset_info}")
+        self.refresh_jobs()
+
+    def on_job_status(self, job, message):
+        """Called from the scheduler's listener thread for every job status message or telemetry event."""
+        if isinstance(message, dict):
+            self.update_progress(job.id, message)
+        self.log_bus.put(f"[Job {job.id}] {telemetry.as_text(message)}")
+
+    def update_progress(self, job_id, event):
+        """Keeps a short progress summary per job from its telemetry events."""
+        kind = event["type"]
+        if kind == "stage_start":
+            self.job_progress[job_id] = event["stage"]
+        elif kind == "batch_tuning":
+            self.job_progress[job_id] = (f"batch {event['batch_size']} x{event['accumulation_steps']}: "
+                                         f"{event['samples_per_sec']:.0f} samples/s")
+        elif kind in ("step", "epoch"):
+            self.job_progress[job_id] = f"epoch {event['epoch']}: {event['samples_per_sec']:.0f} samples/s"
+
+    def on_job_finished(self, job):
+        """Called from the scheduler's listener thread when a job ends."""
+        if job.status == SUCCEEDED:
+            self.log_bus.put(f"[Job {job.id}] Job succeeded.")
+            self.log_bus.put_control("SUCCESS")
+        elif job.status == FAILED:
+            error = f"ERROR: Job {job.id} failed: {job.error.splitlines()[0]}"
+            self.log_bus.put(error)
+            self.log_bus.put_control(error)
+        else:
+            self.log_bus.put(f"[Job {job.id}] Job {job.status}.")
+
+    def refresh_jobs(self):
+        """Updates the jobs table from the scheduler's job list."""
+        for job in self.scheduler.jobs():
+            values = (job.params["model_choice"], job.params["dataset_info"], job.priority, job.status,
+                      self.job_progress.get(job.id, ""))
+            item = str(job.id)
+            if self.jobs_table.exists(item):
+                self.jobs_table.item(item, values=values)
+            else:
+                self.jobs_table.insert("", tk.END, iid=item, text=item, values=values)
+
+    def cancel_selected_job(self):
+        """Cancels the jobs selected in the jobs table."""
+        for item in self.jobs_table.selection():
+            self.scheduler.cancel(int(item))
+
+    def on_close(self):
+        """Cancels outstanding jobs and stops the worker processes before exiting."""
+        self.scheduler.shutdown()
+        self.log_bus.close()
+        self.root.destroy()
 
 
 if __name__ == "__main__":
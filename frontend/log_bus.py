@@ -0,0 +1,103 @@
+# frontend/log_bus.py
+
+# This module provides the channel that carries status messages from the
+# backend threads to the GUI. Unlike a plain queue.Queue it is bounded,
+# coalesces repeated messages, drops the oldest entries under backpressure,
+# and hands the GUI everything that is pending in a single drain call.
+# Every message is also streamed to a log file, so nothing is lost even
+# when the on-screen log only keeps the most recent lines. Control events
+# (such as a job finishing) travel on a separate channel that is never
+# coalesced or dropped, since the GUI must react to every one of them.
+
+import collections
+import os
+import threading
+
+
+class LogBus:
+    """
+    A bounded, thread-safe message bus between the backend and the GUI.
+
+    Producers call `put` from any thread; the GUI thread calls `drain` once
+    per tick and renders the returned lines in one go.
+    """
+    def __init__(self, maxsize=10000, log_path=None):
+        """
+        Args:
+            maxsize (int): Maximum number of pending (uncoalesced) entries.
+                When full, the oldest entry is dropped to make room.
+            log_path (str): Optional file that receives every message,
+                including the ones dropped from the bus.
+        """
+        if maxsize < 1:
+            raise ValueError("LogBus maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.log_path = log_path
+        self.dropped = 0
+        self._pending = collections.deque()  # entries are [message, count]
+        self._controls = collections.deque()
+        self._lock = threading.Lock()
+        self._log_file = None
+        if log_path:
+            os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+            self._log_file = open(log_path, "a", encoding="utf-8")
+
+    def put(self, message):
+        """Adds a message to the bus. Never blocks."""
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.write(message + "\n")
+            if self._pending and self._pending[-1][0] == message:
+                self._pending[-1][1] += 1
+                return
+            if len(self._pending) >= self.maxsize:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append([message, 1])
+
+    def put_control(self, event):
+        """Adds a control event. Control events are never coalesced or dropped."""
+        with self._lock:
+            self._controls.append(event)
+
+    def drain_controls(self):
+        """Removes and returns every pending control event, in arrival order."""
+        with self._lock:
+            controls, self._controls = list(self._controls), collections.deque()
+        return controls
+
+    def drain(self):
+        """
+        Removes and returns every pending message.
+
+        Returns:
+            list: The pending messages in arrival order. Repeated messages are
+                  collapsed into one line with a repeat count, and a notice is
+                  prepended if anything was dropped since the last drain.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, collections.deque()
+            dropped, self.dropped = self.dropped, 0
+            if self._log_file is not None:
+                self._log_file.flush()
+
+        messages = []
+        if dropped:
+            notice = f"[Log] {dropped} older messages were dropped from the display."
+            if self.log_path:
+                notice += f" Full log: {self.log_path}"
+            messages.append(notice)
+        for message, count in pending:
+            messages.append(message if count == 1 else f"{message} (x{count})")
+        return messages
+
+    def empty(self):
+        with self._lock:
+            return not self._pending and not self.dropped and not self._controls
+
+    def close(self):
+        """Flushes and closes the log file."""
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
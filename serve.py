@@ -0,0 +1,60 @@
+# serve.py
+
+# This is the entry point for serving a trained model locally. It loads the
+# artifact written by the training pipeline and answers predictions over
+# HTTP on localhost, batching concurrent requests (see backend/serving.py).
+#
+# Usage:
+#   python serve.py trained_model.pth                      # uses trained_model.torchscript.pt if exported
+#   python serve.py trained_model.pth --model YOLO         # rebuild the MODEL_MAP model and load the weights
+#   python serve.py trained_model.pth --max-batch 64 --max-wait-ms 2 --workers 4 --port 8080
+#
+# Only image models can be served. Measure the server with the load
+# generator in benchmarks/bench_serving.py.
+
+import argparse
+import sys
+
+from backend import serving
+from backend.model_loader import MODALITIES
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a trained model on localhost with dynamic batching.")
+    parser.add_argument("artifact", help="saved weights (.pth) or an exported TorchScript file")
+    parser.add_argument("--model", choices=sorted(name for name, modality in MODALITIES.items() if modality == "image"),
+                        help="image model family, needed when there is no TorchScript export")
+    parser.add_argument("--input-shape", type=int, nargs="+", metavar="N",
+                        help="per-sample input shape, e.g. 3 32 32 (default: from the export report)")
+    parser.add_argument("--host", default="127.0.0.1", choices=serving.LOCALHOST)
+    parser.add_argument("--port", type=int, default=serving.DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=serving.DEFAULT_SERVING_CONFIG["max_batch_size"])
+    parser.add_argument("--max-wait-ms", type=float, default=serving.DEFAULT_SERVING_CONFIG["max_wait_ms"])
+    parser.add_argument("--workers", type=int, default=serving.DEFAULT_SERVING_CONFIG["workers"])
+    parser.add_argument("--threads-per-worker", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        model, input_shape = serving.load_artifact(args.artifact, args.model)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Could not load model: {e}", file=sys.stderr)
+        return 2
+
+    server = serving.make_server(
+        model, args.host, args.port, input_shape=args.input_shape or input_shape, model_name=args.model,
+        config={"max_batch_size": args.max_batch, "max_wait_ms": args.max_wait_ms,
+                "workers": args.workers, "threads_per_worker": args.threads_per_worker},
+    )
+    print(f"[Serving] Listening on http://{args.host}:{args.port} "
+          f"(max batch {args.max_batch}, max wait {args.max_wait_ms} ms, {args.workers} worker(s))", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serving.stop_server(server)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+# tests/conftest.py
+
+# Shared fixtures. Caches and manifests default to folders under the current
+# directory; every test gets its own instead.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+@pytest.fixture(autouse=True)
+def isolated_manifests(tmp_path, monkeypatch):
+    from backend import manifest
+    monkeypatch.setattr(manifest, "MANIFEST_DIR", str(tmp_path / "manifests"))
+
+
+@pytest.fixture
+def messages():
+    """A status callback that records every message."""
+    class Recorder(list):
+        def __call__(self, message):
+            self.append(message)
+    return Recorder()
+
+
+def rewrite_in_place(path, data):
+    """Overwrites a file with same-size content and moves its mtime forward,
+    without touching the directory (as an editor saving in place would)."""
+    stat = os.stat(path)
+    with open(path, "r+b") as f:
+        f.write(data)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
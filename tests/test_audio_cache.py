@@ -0,0 +1,61 @@
+# tests/test_audio_cache.py
+
+import os
+import wave
+
+import numpy as np
+import pytest
+
+from backend import audio_cache
+from conftest import rewrite_in_place
+
+CONFIG = {"workers": 1, "max_seconds": 1.0, "dtype": "float32"}
+
+
+def write_wav(path, frequency, rate=16000, seconds=0.5):
+    t = np.arange(int(rate * seconds)) / rate
+    data = (0.5 * np.sin(2 * np.pi * frequency * t) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(data.tobytes())
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    root = tmp_path / "data"
+    for label, frequency in (("no", 300), ("yes", 900)):
+        (root / label).mkdir(parents=True)
+        write_wav(root / label / "1.wav", frequency)
+    return str(root)
+
+
+def build(dataset, tmp_path, messages, **config):
+    return audio_cache.build_cache(dataset, messages, config={**CONFIG, **config}, cache_dir=str(tmp_path / "cache"))
+
+
+def test_features_are_cached_per_clip(dataset, tmp_path, messages):
+    store = audio_cache.AudioFeatureDataset(build(dataset, tmp_path, messages))
+    assert len(store) == 2
+    features, label = store[1]
+    assert features.shape[1] == 80 and label == 1
+
+
+def test_unchanged_dataset_reuses_the_store(dataset, tmp_path, messages):
+    first = build(dataset, tmp_path, messages)
+    assert build(dataset, tmp_path, messages) == first
+    assert messages[-1].startswith("[Audio Cache] Reusing")
+
+
+def test_feature_config_is_part_of_the_key(dataset, tmp_path, messages):
+    assert build(dataset, tmp_path, messages) != build(dataset, tmp_path, messages, n_mels=40)
+
+
+def test_clip_rewritten_in_place_is_extracted_again(dataset, tmp_path, messages):
+    first = build(dataset, tmp_path, messages)
+    path = os.path.join(dataset, "yes", "1.wav")
+    write_wav(os.path.join(str(tmp_path), "other.wav"), 2000)
+    with open(os.path.join(str(tmp_path), "other.wav"), "rb") as f:
+        rewrite_in_place(path, f.read())
+    assert build(dataset, tmp_path, messages) != first
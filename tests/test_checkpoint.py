@@ -0,0 +1,92 @@
+# tests/test_checkpoint.py
+
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from torch.utils.data import DataLoader, TensorDataset
+
+from backend import checkpoint, optizer
+
+
+def make_loader(batch_size=8):
+    generator = torch.Generator().manual_seed(0)
+    inputs, labels = torch.randn(32, 4, generator=generator), torch.randint(0, 2, (32,), generator=generator)
+    return DataLoader(TensorDataset(inputs, labels), batch_size=batch_size)
+
+
+def fit(directory, epochs, messages, optimizer_type="adam", resume=False, keep_checkpoints=3, model=None):
+    model = model or torch.nn.Linear(4, 2)
+    optizer.fit(model, make_loader(), epochs=epochs, optimizer_type=optimizer_type, fine_tune=False,
+                status_callback=messages, checkpoint_dir=str(directory), resume=resume,
+                keep_checkpoints=keep_checkpoints)
+    return model
+
+
+def saved_epochs(directory):
+    return [epoch for (epoch, _), _ in checkpoint.list_checkpoints(str(directory))]
+
+
+def test_only_the_newest_checkpoints_are_kept(tmp_path, messages):
+    fit(tmp_path, 5, messages, keep_checkpoints=2)
+    assert saved_epochs(tmp_path) == [4, 5]
+
+
+def test_resume_continues_from_the_latest_checkpoint(tmp_path, messages):
+    fit(tmp_path, 2, messages)
+    resumed = fit(tmp_path, 4, messages, resume=True)
+    assert any(message.startswith("[Backend] Resumed from") and "epoch 2/4" in message for message in messages)
+    assert saved_epochs(tmp_path) == [2, 3, 4]
+    state = checkpoint.load_checkpoint(checkpoint.latest_checkpoint(str(tmp_path)))
+    assert torch.equal(state["model"]["weight"], resumed.state_dict()["weight"])
+
+
+def test_resume_refuses_a_checkpoint_of_another_config(tmp_path, messages):
+    fit(tmp_path, 2, messages, optimizer_type="adam")
+    with pytest.raises(ValueError, match="config"):
+        fit(tmp_path, 4, messages, optimizer_type="sgd", resume=True)
+
+
+def test_resume_refuses_a_finished_run(tmp_path, messages):
+    fit(tmp_path, 4, messages)
+    with pytest.raises(ValueError, match="already trained 4 of the 3"):
+        fit(tmp_path, 3, messages, resume=True)
+
+
+def test_fresh_run_discards_the_previous_runs_checkpoints(tmp_path, messages):
+    fit(tmp_path, 4, messages)
+    fit(tmp_path, 2, messages)
+    assert saved_epochs(tmp_path) == [1, 2]
+
+
+def test_runs_with_different_settings_get_their_own_folder():
+    params = {"model_choice": "YOLO", "dataset_info": "/data/cats", "optimizer_type": "Adam", "lr": 0.001,
+              "epochs": 3, "batch_size": 32, "fine_tune": True}
+    folder = checkpoint.run_checkpoint_dir(params)
+    assert os.path.basename(folder).startswith("YOLO-cats-")
+    assert checkpoint.run_checkpoint_dir(dict(params)) == folder
+    assert checkpoint.run_checkpoint_dir({**params, "optimizer_type": "SGD"}) != folder
+    assert checkpoint.run_checkpoint_dir({**params, "epochs": 4}) == folder
+    assert checkpoint.run_checkpoint_dir({**params, "checkpoint_dir": "elsewhere"}) == "elsewhere"
+
+
+def test_rng_state_survives_a_weights_only_round_trip(tmp_path):
+    import random
+
+    import numpy as np
+
+    generator = torch.Generator().manual_seed(3)
+    writer = checkpoint.CheckpointWriter(str(tmp_path))
+    writer.save(1, {"rng": checkpoint.rng_state(generator)})
+    writer.close()
+    expected = (random.random(), np.random.rand(), torch.rand(1), torch.rand(1, generator=generator))
+
+    random.seed(0)
+    np.random.seed(0)
+    torch.manual_seed(0)
+    generator.manual_seed(0)
+    state = checkpoint.load_checkpoint(checkpoint.latest_checkpoint(str(tmp_path)))
+    checkpoint.restore_rng_state(state["rng"], generator)
+    assert (random.random(), np.random.rand(), torch.rand(1), torch.rand(1, generator=generator)) == expected
@@ -0,0 +1,72 @@
+# tests/test_cli.py
+
+import json
+
+import pytest
+
+import cli
+from backend import pipeline
+
+CONFIG = {"model_choice": "YOLO", "dataset_source": "Custom", "dataset_info": "data", "epochs": 1}
+
+
+def write_config(tmp_path, data, name="run.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps(data) if not isinstance(data, str) else data, encoding="utf-8")
+    return str(path)
+
+
+def events(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+@pytest.mark.parametrize("data", [
+    "{not json",
+    {"model_choice": "YOLO"},
+    {**CONFIG, "model_choice": "GPT"},
+    [CONFIG, 42],
+])
+def test_invalid_configs_exit_with_2(tmp_path, data):
+    assert cli.main([write_config(tmp_path, data)]) == cli.EXIT_BAD_CONFIG
+
+
+def test_missing_config_file_exits_with_2(tmp_path):
+    assert cli.main([str(tmp_path / "missing.json")]) == cli.EXIT_BAD_CONFIG
+
+
+def test_all_jobs_succeeding_exits_with_0(tmp_path, monkeypatch, capsys):
+    seen = []
+    monkeypatch.setattr(pipeline, "run_pipeline", lambda params, status_callback: seen.append(params) or "ok")
+    assert cli.main([write_config(tmp_path, [CONFIG, CONFIG]), "--resume"]) == cli.EXIT_OK
+    assert [params["resume"] for params in seen] == [True, True]
+    assert events(capsys)[-1]["event"] == "finished"
+
+
+def test_any_failed_job_exits_with_1(tmp_path, monkeypatch, capsys):
+    def run_pipeline(params, status_callback):
+        if params["epochs"] == 2:
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(pipeline, "run_pipeline", run_pipeline)
+    path = write_config(tmp_path, [CONFIG, {**CONFIG, "epochs": 2}])
+    assert cli.main([path, "--output", str(tmp_path / "events.jsonl")]) == cli.EXIT_JOB_FAILED
+    written = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+    assert written == events(capsys)
+    assert [event["event"] for event in written if "job" in event and event["event"] != "started"] == ["succeeded", "failed"]
+    assert written[-1]["failed"] == 1
+
+
+def test_interrupt_exits_with_130(tmp_path, monkeypatch, capsys):
+    def run_pipeline(params, status_callback):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(pipeline, "run_pipeline", run_pipeline)
+    assert cli.main([write_config(tmp_path, CONFIG)]) == cli.EXIT_INTERRUPTED
+    assert events(capsys)[-1]["event"] == "interrupted"
+
+
+def test_failed_job_in_parallel_mode_exits_with_1(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)  # the worker writes its run logs under the current directory
+    config = {**CONFIG, "dataset_info": str(tmp_path / "no-such-dataset")}
+    assert cli.main([write_config(tmp_path, config), "--parallel", "1"]) == cli.EXIT_JOB_FAILED
+    assert [event["event"] for event in events(capsys)][-2:] == ["failed", "finished"]
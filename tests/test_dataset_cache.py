@@ -0,0 +1,95 @@
+# tests/test_dataset_cache.py
+
+import os
+import re
+
+import numpy as np
+import pytest
+
+from backend import dataset_cache
+from conftest import rewrite_in_place
+
+Image = pytest.importorskip("PIL.Image")
+
+CONFIG = {"image_size": [8, 8], "channels": 1, "shard_size": 2}
+
+
+def write_image(path, value):
+    Image.fromarray(np.full((8, 8), value, dtype=np.uint8)).save(path, format="BMP")
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    root = tmp_path / "data"
+    for i in range(4):
+        directory = root / f"class{i % 2}"
+        directory.mkdir(parents=True, exist_ok=True)
+        write_image(directory / f"{i}.bmp", 10 * i)
+    return str(root)
+
+
+def build(dataset, tmp_path, messages, config=CONFIG):
+    return dataset_cache.build_cache(dataset, messages, config=config, cache_dir=str(tmp_path / "cache"))
+
+
+def rebuilt_shards(messages):
+    """Returns (rebuilt, total) from the last build's summary."""
+    for message in reversed(messages):
+        match = re.match(r"\[Dataset Cache\] (\d+) of (\d+) shards rebuilt", message)
+        if match:
+            return int(match.group(1)), int(match.group(2))
+
+
+def test_unchanged_dataset_reuses_every_shard(dataset, tmp_path, messages):
+    first = build(dataset, tmp_path, messages)
+    second = build(dataset, tmp_path, messages)
+    assert first == second
+    rebuilt, total = rebuilt_shards(messages)
+    assert rebuilt == 0 and total >= 2
+
+
+def test_shards_stay_within_a_class_and_under_twice_the_shard_size():
+    samples = [(f"class{i % 3}/{i:04d}.png", i % 3) for i in range(300)]
+    samples.sort()
+    ranges = dataset_cache.split_shards(samples, 8)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(samples)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    for start, stop in ranges:
+        assert 0 < stop - start <= 16
+        assert len({label for _, label in samples[start:stop]}) == 1
+
+
+def test_adding_or_removing_a_file_rebuilds_only_nearby_shards(tmp_path, messages):
+    root = tmp_path / "data"
+    for i in range(60):
+        directory = root / f"class{i % 3}"
+        directory.mkdir(parents=True, exist_ok=True)
+        write_image(directory / f"{i:03d}.bmp", i)
+    config = {**CONFIG, "shard_size": 4}
+    build(str(root), tmp_path, messages, config)
+    _, total = rebuilt_shards(messages)
+
+    write_image(root / "class0" / "000a.bmp", 255)
+    build(str(root), tmp_path, messages, config)
+    rebuilt, _ = rebuilt_shards(messages)
+    assert rebuilt <= 2 < total
+
+    os.remove(root / "class1" / "031.bmp")
+    index_path = build(str(root), tmp_path, messages, config)
+    rebuilt, _ = rebuilt_shards(messages)
+    assert rebuilt <= 1
+    assert len(dataset_cache.ShardedDataset(index_path)) == 60
+
+
+def test_file_rewritten_in_place_rebuilds_its_shard(dataset, tmp_path, messages):
+    build(dataset, tmp_path, messages)
+    path = os.path.join(dataset, "class1", "3.bmp")
+    with open(path, "rb") as f:
+        data = f.read()
+    rewrite_in_place(path, data[:-64] + b"\xc8" * 64)
+
+    index_path = build(dataset, tmp_path, messages)
+    rebuilt, total = rebuilt_shards(messages)
+    assert rebuilt == 1 and total >= 2
+    samples = dataset_cache.ShardedDataset(index_path)
+    assert (np.asarray(samples[len(samples) - 1][0]) == 200).any()
@@ -0,0 +1,120 @@
+# tests/test_dataset_store.py
+
+# The store is driven through a stub `kaggle` executable on PATH. It copies
+# the zip named by $STUB_KAGGLE_ZIP into the download directory and logs
+# every call to $STUB_KAGGLE_LOG.
+
+import hashlib
+import json
+import os
+import sys
+import zipfile
+
+import pytest
+
+from backend import dataset_store
+
+DATASET = "owner/flowers"
+
+STUB = """#!{python}
+import os, shutil, sys
+args = sys.argv[1:]
+with open(os.environ["STUB_KAGGLE_LOG"], "a") as log:
+    log.write(" ".join(args) + "\\n")
+name = args[args.index("-d") + 1].split("/")[1]
+shutil.copy(os.environ["STUB_KAGGLE_ZIP"], os.path.join(args[args.index("-p") + 1], name + ".zip"))
+"""
+
+
+def write_zip(path, files):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in files.items():
+            archive.writestr(f"flowers/{name}", data)
+    return str(path)
+
+
+@pytest.fixture
+def kaggle(tmp_path, monkeypatch):
+    """Installs the stub CLI; returns a function listing the calls made so far."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    stub = bin_dir / "kaggle"
+    stub.write_text(STUB.format(python=sys.executable), encoding="utf-8")
+    stub.chmod(0o755)
+    log = tmp_path / "kaggle.log"
+    log.touch()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("STUB_KAGGLE_LOG", str(log))
+    monkeypatch.setenv("STUB_KAGGLE_ZIP", write_zip(tmp_path / "v1.zip", {"rose/1.txt": "one", "tulip/2.txt": "two"}))
+    return lambda: log.read_text(encoding="utf-8").splitlines()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return dataset_store.DatasetStore(root=str(tmp_path / "store"))
+
+
+def read_tree(path):
+    files = {}
+    for directory, _, names in os.walk(path):
+        for name in names:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                files[os.path.relpath(os.path.join(directory, name), path)] = f.read()
+    return files
+
+
+def ref_sha256(store):
+    with open(os.path.join(store.root, "refs", "owner__flowers.json"), encoding="utf-8") as f:
+        return json.load(f)["sha256"]
+
+
+def sha256_of(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def test_cached_dataset_is_served_without_calling_kaggle(kaggle, store, messages):
+    first = store.fetch(DATASET, messages)
+    assert len(kaggle()) == 1
+    assert read_tree(first) == {os.path.join("rose", "1.txt"): "one", os.path.join("tulip", "2.txt"): "two"}
+
+    assert store.fetch(DATASET, messages) == first
+    assert len(kaggle()) == 1
+    assert ref_sha256(store) == sha256_of(os.environ["STUB_KAGGLE_ZIP"])
+
+
+def test_refresh_downloads_again_and_follows_new_content(kaggle, store, tmp_path, monkeypatch, messages):
+    first = store.fetch(DATASET, messages)
+    assert store.fetch(DATASET, messages, refresh=True) == first
+    assert len(kaggle()) == 2
+    assert any("Archive unchanged" in message for message in messages)
+
+    new_zip = write_zip(tmp_path / "v2.zip", {"rose/1.txt": "uno"})
+    monkeypatch.setenv("STUB_KAGGLE_ZIP", new_zip)
+    second = store.fetch(DATASET, messages, refresh=True)
+    assert len(kaggle()) == 3
+    assert second != first
+    assert ref_sha256(store) == sha256_of(new_zip)
+    assert read_tree(second) == {os.path.join("rose", "1.txt"): "uno"}
+    assert store.fetch(DATASET, messages) == second and len(kaggle()) == 3
+
+
+def test_interrupted_extraction_resumes_without_downloading(kaggle, store, monkeypatch, messages):
+    extract_member = dataset_store._extract_member
+
+    def interrupted(archive_path, member, root):
+        if member.filename.endswith("2.txt"):
+            raise OSError("disk unplugged")
+        return extract_member(archive_path, member, root)
+
+    monkeypatch.setattr(dataset_store, "_extract_member", interrupted)
+    with pytest.raises(OSError):
+        store.fetch(DATASET, messages)
+    assert store.lookup(DATASET) is None
+
+    monkeypatch.setattr(dataset_store, "_extract_member", extract_member)
+    path = store.fetch(DATASET, messages)
+    assert len(kaggle()) == 1
+    assert any(message.startswith("[Dataset Store] Resuming from") for message in messages)
+    assert any(message.startswith("[Dataset Store] Extracted 1 file(s)") for message in messages)
+    assert read_tree(path)[os.path.join("tulip", "2.txt")] == "two"
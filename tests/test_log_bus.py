@@ -0,0 +1,44 @@
+# tests/test_log_bus.py
+
+import pytest
+
+from frontend.log_bus import LogBus
+
+
+def test_repeated_messages_are_coalesced():
+    bus = LogBus()
+    for message in ["a", "a", "a", "b", "a"]:
+        bus.put(message)
+    assert bus.drain() == ["a (x3)", "b", "a"]
+    assert bus.empty() and bus.drain() == []
+
+
+def test_oldest_messages_are_dropped_when_full(tmp_path):
+    log_path = str(tmp_path / "logs" / "pipeline.log")
+    bus = LogBus(maxsize=3, log_path=log_path)
+    for i in range(5):
+        bus.put(f"line {i}")
+    assert bus.drain() == [
+        f"[Log] 2 older messages were dropped from the display. Full log: {log_path}",
+        "line 2", "line 3", "line 4",
+    ]
+    bus.close()
+    with open(log_path, encoding="utf-8") as f:
+        assert f.read().splitlines() == [f"line {i}" for i in range(5)]
+
+
+def test_control_events_are_never_dropped_or_coalesced():
+    bus = LogBus(maxsize=1)
+    for _ in range(3):
+        bus.put("noise")
+        bus.put_control("SUCCESS")
+        bus.put("more noise")
+    assert not bus.empty()
+    assert bus.drain_controls() == ["SUCCESS"] * 3
+    assert bus.drain_controls() == []
+    assert bus.drain()[-1] == "more noise"
+
+
+def test_maxsize_must_be_positive():
+    with pytest.raises(ValueError):
+        LogBus(maxsize=0)
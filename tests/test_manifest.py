@@ -0,0 +1,76 @@
+# tests/test_manifest.py
+
+import os
+
+from backend import manifest
+from conftest import rewrite_in_place
+
+
+def make_dataset(root, files=4):
+    for i in range(files):
+        directory = os.path.join(root, f"class{i % 2}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{i}.png"), "wb") as f:
+            f.write(bytes([i]) * 64)
+
+
+def test_update_indexes_class_folders(tmp_path, messages):
+    make_dataset(tmp_path / "data")
+    entries = manifest.update(str(tmp_path / "data"), messages)
+    assert len(entries) == 4
+    assert entries.classes == ["class0", "class1"]
+    assert sorted(entries.labels) == [0, 0, 1, 1]
+
+
+def test_update_detects_file_rewritten_in_place(tmp_path, messages):
+    data = str(tmp_path / "data")
+    make_dataset(data)
+    before = manifest.update(data, messages)
+    fingerprints = {path: before.fingerprint(i) for i, path in enumerate(before.paths)}
+
+    changed = os.path.join("class1", "1.png")
+    rewrite_in_place(os.path.join(data, changed), b"\xff" * 64)
+    after = manifest.update(data, messages)
+
+    for i, path in enumerate(after.paths):
+        assert (after.fingerprint(i) != fingerprints[path]) == (path == changed)
+
+
+def test_files_are_hashed_only_once_they_change(tmp_path, monkeypatch, messages):
+    data = str(tmp_path / "data")
+    make_dataset(data)
+    hashed = []
+    hash_file = manifest.hash_file
+    monkeypatch.setattr(manifest, "hash_file", lambda path: hashed.append(path) or hash_file(path))
+
+    first = manifest.update(data, messages)
+    assert hashed == [] and first.hashes == [None] * 4
+
+    touched = os.path.join(data, "class0", "0.png")
+    stat = os.stat(touched)
+    os.utime(touched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    second = manifest.update(data, messages)
+    assert hashed == [touched]
+    fingerprint = second.fingerprint(second.paths.index(os.path.join("class0", "0.png")))
+
+    os.utime(touched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    third = manifest.update(data, messages)
+    assert third.fingerprint(third.paths.index(os.path.join("class0", "0.png"))) == fingerprint
+    assert manifest.update(data, messages).stats["unchanged"] == 4 and len(hashed) == 2
+
+
+def test_custom_dataset_is_scanned_once_per_cache_build(tmp_path, monkeypatch, messages):
+    from backend import dataset_cache, dataset_utils
+
+    data = str(tmp_path / "data")
+    make_dataset(data)
+    monkeypatch.chdir(tmp_path)
+    scans = []
+    update = manifest.update
+    monkeypatch.setattr(manifest, "update", lambda root, *args, **kwargs: scans.append(root) or update(root, *args, **kwargs))
+    monkeypatch.setattr(dataset_cache, "_write_shard", lambda shard_path, paths, config: None)
+
+    path = dataset_utils.load_dataset("Custom", data, messages)
+    dataset_cache.build_cache(path, messages, cache_dir=str(tmp_path / "cache"))
+    assert scans == [data]
+    assert "[Dataset Cache] Classes: class0: 2, class1: 2" in messages
@@ -0,0 +1,117 @@
+# tests/test_model_loader.py
+
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from backend import model_loader
+
+
+def mlp():
+    return torch.nn.Sequential(torch.nn.Linear(4, 8), torch.nn.ReLU(), torch.nn.Linear(8, 2))
+
+
+def megabytes(model):
+    return model_loader.model_size_bytes(model) / (1024 * 1024)
+
+
+@pytest.fixture
+def hub(tmp_path, monkeypatch):
+    """Replaces the YOLO hub download with a small model and counts the calls."""
+    calls = {"download": 0, "build": 0}
+
+    def download(model_name, revision):
+        calls["download"] += 1
+        return mlp()
+
+    def build(model_name, revision):
+        calls["build"] += 1
+        return mlp()
+
+    monkeypatch.setattr(model_loader, "WEIGHTS_CACHE_DIR", str(tmp_path / "weights"))
+    monkeypatch.setitem(model_loader.LOADERS, "YOLO", download)
+    monkeypatch.setitem(model_loader.BUILDERS, "YOLO", build)
+    model_loader.model_cache.clear()
+    yield calls
+    model_loader.model_cache.clear()
+
+
+def test_cache_evicts_least_recently_used_models():
+    models = {name: mlp() for name in "abc"}
+    cache = model_loader.ModelCache(budget_mb=2.5 * megabytes(models["a"]))
+    cache.put("a", models["a"])
+    cache.put("b", models["b"])
+    assert cache.get("a") is not None
+    cache.put("c", models["c"])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_cache_hands_out_private_copies():
+    cache = model_loader.ModelCache()
+    cache.put("a", mlp())
+    first = cache.get("a")
+    with torch.no_grad():
+        first[0].weight.zero_()
+    assert cache.get("a")[0].weight.abs().sum() > 0
+
+
+def test_cache_skips_models_over_budget_and_shrinks_with_it():
+    model = mlp()
+    cache = model_loader.ModelCache(budget_mb=0.5 * megabytes(model))
+    cache.put("a", model)
+    assert cache.get("a") is None
+    cache.set_budget(3 * megabytes(model))
+    cache.put("a", model)
+    cache.put("b", model)
+    cache.set_budget(1.5 * megabytes(model))
+    assert cache.get("a") is None and cache.get("b") is not None
+
+
+def test_weight_cache_stores_a_state_dict_and_rebuilds_the_model(hub, messages):
+    first = model_loader.load_model("YOLO", messages)
+    path = model_loader.weights_path(model_loader.model_id("YOLO"))
+    state = torch.load(os.path.join(path, model_loader.STATE_FILE), weights_only=True)
+    assert state["builder"] == {"model_name": "ultralytics/yolov5s", "revision": "main"}
+
+    model_loader.model_cache.clear()
+    second = model_loader.load_model("YOLO", messages)
+    assert hub == {"download": 1, "build": 1}
+    for a, b in zip(first.state_dict().values(), second.state_dict().values()):
+        assert torch.equal(a, b)
+
+
+def test_weight_cache_saves_hugging_face_models_with_save_pretrained(hub, monkeypatch, messages):
+    transformers = pytest.importorskip("transformers")
+    config = transformers.BertConfig(vocab_size=50, hidden_size=8, num_hidden_layers=1,
+                                     num_attention_heads=2, intermediate_size=16, num_labels=3)
+    monkeypatch.setitem(model_loader.LOADERS, "BERT",
+                        lambda model_name, revision: transformers.BertForSequenceClassification(config))
+    first = model_loader.load_model("BERT", messages)
+    path = model_loader.weights_path(model_loader.model_id("BERT"))
+    assert os.path.exists(os.path.join(path, "config.json"))
+    assert not os.path.exists(os.path.join(path, model_loader.STATE_FILE))
+
+    model_loader.model_cache.clear()
+    second = model_loader.load_model("BERT", messages)
+    assert type(second) is transformers.BertForSequenceClassification
+    assert torch.equal(first.classifier.weight, second.classifier.weight)
+
+
+def test_model_builder_rebuilds_the_architecture_from_plain_arguments(hub):
+    transformers = pytest.importorskip("transformers")
+    config = transformers.BertConfig(vocab_size=50, hidden_size=8, num_hidden_layers=1,
+                                     num_attention_heads=2, intermediate_size=16, num_labels=3)
+    bert = transformers.BertForSequenceClassification(config).eval()
+    build, kwargs = model_loader.model_builder("BERT", bert)
+    rebuilt = build(**kwargs)
+    rebuilt.load_state_dict(bert.state_dict())
+    ids = torch.randint(0, 50, (2, 5))
+    assert torch.equal(rebuilt.eval()(input_ids=ids).logits, bert(input_ids=ids).logits)
+
+    build, kwargs = model_loader.model_builder("YOLO", mlp(), revision="v7.0")
+    assert kwargs == {"model_name": "ultralytics/yolov5s", "revision": "v7.0"}
+    build(**kwargs)
+    assert hub["build"] == 1
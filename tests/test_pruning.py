@@ -0,0 +1,66 @@
+# tests/test_pruning.py
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from torch import nn
+
+from backend import pruning
+
+
+def convnet():
+    torch.manual_seed(0)
+    return nn.Sequential(
+        nn.Conv2d(3, 8, 3, padding=1), nn.BatchNorm2d(8), nn.ReLU(),
+        nn.Conv2d(8, 8, 3, padding=1), nn.ReLU(), nn.MaxPool2d(2),
+        nn.Flatten(), nn.Linear(8 * 4 * 4, 16), nn.ReLU(), nn.Linear(16, 5),
+    ).eval()
+
+
+def parameter_count(model):
+    return sum(p.numel() for p in model.parameters())
+
+
+def test_pruning_keeps_the_output_shape(messages):
+    model = convnet()
+    inputs = torch.randn(4, 3, 8, 8)
+    before = parameter_count(model)
+
+    assert pruning.prune_structured(model, 0.5, messages) > 0
+    assert model(inputs).shape == (4, 5)
+    assert model[-1].out_features == 5
+    assert parameter_count(model) < before
+    assert model[0].out_channels == model[1].num_features == model[3].in_channels
+
+
+def test_removing_dead_units_does_not_change_the_output(messages):
+    torch.manual_seed(0)
+    model = nn.Sequential(nn.Linear(6, 8), nn.ReLU(), nn.Linear(8, 3)).eval()
+    with torch.no_grad():
+        model[0].weight[:4] = 0
+        model[0].bias[:4] = 0
+    inputs = torch.randn(10, 6)
+    expected = model(inputs)
+
+    assert pruning.prune_structured(model, 0.5, messages) == 4
+    assert model[0].out_features == model[2].in_features == 4
+    assert torch.allclose(model(inputs), expected, atol=1e-6)
+
+
+def test_untraceable_models_are_left_unchanged(messages):
+    class Branching(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.layer = nn.Linear(4, 4)
+            self.head = nn.Linear(4, 2)
+
+        def forward(self, x):
+            if x.sum() > 0:
+                x = self.layer(x)
+            return self.head(x)
+
+    model = Branching()
+    assert pruning.prune_structured(model, 0.5, messages) == 0
+    assert model.layer.out_features == 4
+    assert any("cannot be traced" in message for message in messages)
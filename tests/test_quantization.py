@@ -0,0 +1,38 @@
+# tests/test_quantization.py
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from torch import nn
+
+from backend import quantization
+
+
+def mlp():
+    torch.manual_seed(0)
+    return nn.Sequential(nn.Linear(8, 16), nn.ReLU(), nn.Linear(16, 3)).eval()
+
+
+def batches(count, offset=0):
+    generator = torch.Generator().manual_seed(offset)
+    return [(torch.randn(4, 8, generator=generator), torch.randint(0, 3, (4,), generator=generator))
+            for _ in range(count)]
+
+
+def test_accuracy_is_measured_on_validation_batches(messages, monkeypatch):
+    seen = []
+    accuracy = quantization._accuracy
+    monkeypatch.setattr(quantization, "_accuracy", lambda model, evaluation: seen.append(evaluation) or accuracy(model, evaluation))
+    val = batches(2, offset=1)
+
+    _, report = quantization.quantize_model(mlp(), batches(3), messages, config={"calibration_batches": 3}, val_loader=val)
+    assert report["mode"] == "static" and report["eval_split"] == "val"
+    assert seen and all(evaluation[0] is val[0] and len(evaluation) == 2 for evaluation in seen)
+
+
+def test_training_batches_are_used_without_validation_data(messages):
+    _, report = quantization.quantize_model(mlp(), batches(4), messages,
+                                            config={"calibration_batches": 2, "eval_batches": 2}, val_loader=[])
+    assert report["eval_split"] == "train"
+    assert any("Accuracy on train batches" in message for message in messages)
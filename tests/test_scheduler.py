@@ -0,0 +1,98 @@
+# tests/test_scheduler.py
+
+# Job targets run in spawned worker processes, so they are defined at module
+# level where the workers can import them.
+
+import os
+import threading
+import time
+
+from backend.scheduler import CANCELLED, FAILED, RUNNING, SUCCEEDED, JobScheduler
+
+
+def chatty_job(params, status_callback):
+    """Streams large status messages, so a cancelled worker is likely killed mid-write."""
+    for _ in range(params["messages"]):
+        status_callback("x" * 10000)
+        time.sleep(0.001)
+    return params["messages"]
+
+
+def crashing_job(params, status_callback):
+    time.sleep(0.5)
+    os._exit(3)
+
+
+def make_scheduler(max_workers=2):
+    return JobScheduler(max_workers=max_workers, target=chatty_job)
+
+
+def test_cancel_running_job_leaves_other_jobs_intact():
+    scheduler = make_scheduler()
+    try:
+        endless = scheduler.submit({"messages": 10**9})
+        other = scheduler.submit({"messages": 200})
+        deadline = time.time() + 60
+        while scheduler.job(endless).status != RUNNING and time.time() < deadline:
+            time.sleep(0.05)
+        time.sleep(1.0)
+
+        assert scheduler.cancel(endless)
+        later = scheduler.submit({"messages": 20})
+        assert scheduler.wait(timeout=120)
+        assert scheduler.job(endless).status == CANCELLED
+        assert scheduler.job(other).status == SUCCEEDED and scheduler.job(other).result == 200
+        assert scheduler.job(later).status == SUCCEEDED and scheduler.job(later).result == 20
+        assert not scheduler.cancel(endless)
+    finally:
+        scheduler.shutdown()
+
+
+def test_cancel_queued_job_never_runs_it():
+    scheduler = make_scheduler(max_workers=1)
+    try:
+        first = scheduler.submit({"messages": 50})
+        queued = scheduler.submit({"messages": 50})
+        assert scheduler.cancel(queued)
+        assert scheduler.wait(timeout=120)
+        assert scheduler.job(first).status == SUCCEEDED
+        assert scheduler.job(queued).status == CANCELLED
+        assert scheduler.job(queued).result is None
+    finally:
+        scheduler.shutdown()
+
+
+def test_crashed_worker_is_reaped_while_other_jobs_are_busy():
+    scheduler = make_scheduler()
+    try:
+        chatty = scheduler.submit({"messages": 3000})
+        crashed = scheduler.submit({}, target=crashing_job)
+        deadline = time.time() + 60
+        while not scheduler.job(crashed).done and time.time() < deadline:
+            time.sleep(0.05)
+        assert scheduler.job(crashed).status == FAILED
+        assert "exit code 3" in scheduler.job(crashed).error
+        assert not scheduler.job(chatty).done
+        assert scheduler.wait(timeout=120)
+        assert scheduler.job(chatty).status == SUCCEEDED
+    finally:
+        scheduler.shutdown()
+
+
+def test_status_callback_runs_without_the_lock():
+    free = []
+
+    def on_status(job, message):
+        # Another thread must get the scheduler's lock while the callback runs
+        other = threading.Thread(target=scheduler.jobs, daemon=True)
+        other.start()
+        other.join(timeout=5)
+        free.append(not other.is_alive())
+
+    scheduler = JobScheduler(max_workers=1, target=chatty_job, on_status=on_status)
+    try:
+        scheduler.submit({"messages": 5})
+        assert scheduler.wait(timeout=120)
+        assert free == [True] * 5
+    finally:
+        scheduler.shutdown()
@@ -0,0 +1,85 @@
+# tests/test_serving.py
+
+import http.client
+import json
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from backend import serving
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return torch.nn.Linear(4, 2).eval()
+
+
+@pytest.fixture
+def server(model):
+    server = serving.make_server(model, port=0, input_shape=[4],
+                                 config={"max_batch_size": 16, "max_wait_ms": 200, "workers": 1})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    serving.stop_server(server)
+    thread.join()
+
+
+def post(server, payload):
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=30)
+    try:
+        connection.request("POST", "/predict", body=json.dumps(payload), headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_concurrent_requests_are_batched(server, model):
+    samples = torch.randn(8, 4)
+    results = [None] * len(samples)
+
+    def client(i):
+        results[i] = post(server, {"inputs": samples[i].tolist()})
+
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(len(samples))]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+
+    expected = model(samples).detach()
+    for i, (status, payload) in enumerate(results):
+        assert status == 200
+        assert torch.allclose(torch.tensor(payload["outputs"]), expected[i], atol=1e-5)
+        assert payload["predictions"] == int(expected[i].argmax())
+    assert server.batcher.metrics.snapshot()["max_batch_size"] > 1
+
+
+@pytest.mark.parametrize("payload", [
+    {"inputs": []},
+    {"inputs": [[1.0, 2.0, 3.0]]},
+    {"inputs": [1.0, 2.0, 3.0]},
+    {"inputs": [[1.0, 2.0], [3.0]]},
+    {"samples": [[1.0, 2.0, 3.0, 4.0]]},
+])
+def test_bad_requests_get_400(server, payload):
+    status, body = post(server, payload)
+    assert status == 400 and body["error"]
+    status, body = post(server, {"inputs": [[1.0, 2.0, 3.0, 4.0]] * 2})
+    assert status == 200 and len(body["predictions"]) == 2
+
+
+def test_mismatched_shapes_in_one_batch_fail_only_their_own_requests(model):
+    batcher = serving.DynamicBatcher(model, max_batch_size=8, max_wait_ms=200, workers=1)
+    try:
+        good = batcher.submit(torch.randn(4))
+        bad = batcher.submit(torch.randn(3))
+        assert good.result(timeout=30).shape == (2,)
+        with pytest.raises(RuntimeError):
+            bad.result(timeout=30)
+    finally:
+        batcher.close()
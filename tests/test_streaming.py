@@ -0,0 +1,61 @@
+# tests/test_streaming.py
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from torch.utils.data import DataLoader
+
+from backend import streaming
+
+SHARD_COUNTS = [7, 3, 9, 5, 2, 6]
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    """A dataset cache whose samples and labels are their own global index."""
+    shard_dir = tmp_path / "shards"
+    shard_dir.mkdir()
+    shards = []
+    start = 0
+    for shard_id, count in enumerate(SHARD_COUNTS):
+        key = f"shard-{shard_id}"
+        np.save(shard_dir / f"{key}.npy", np.arange(start, start + count, dtype=np.int64)[:, None])
+        shards.append({"key": key, "count": count})
+        start += count
+    np.save(tmp_path / "data.labels.npy", np.arange(start, dtype=np.int64))
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({
+        "dataset_path": "data", "config": {}, "classes": ["a"], "num_samples": start, "sample_shape": [1],
+        "dtype": "int64", "shard_dir": str(shard_dir), "shards": shards, "labels": "data.labels.npy",
+    }), encoding="utf-8")
+    return str(path)
+
+
+def epoch_batches(dataset, epoch, num_workers, skip_batches=0):
+    dataset.set_epoch(epoch, skip_batches)
+    loader = DataLoader(dataset, batch_size=dataset.batch_size, num_workers=num_workers)
+    return [labels.tolist() for _, labels in loader]
+
+
+@pytest.mark.filterwarnings("ignore:This DataLoader will create")
+@pytest.mark.parametrize("num_workers", [0, 2, 3])
+def test_resumed_epoch_continues_after_the_trained_batches(index_path, num_workers):
+    dataset = streaming.StreamingDataset(index_path, shuffle_buffer=4, seed=1, batch_size=4)
+    full = epoch_batches(dataset, 2, num_workers)
+    assert sorted(sum(full, [])) == list(range(sum(SHARD_COUNTS)))
+    for skip in range(1, len(full) + 1):
+        assert epoch_batches(dataset, 2, num_workers, skip) == full[skip:]
+
+
+def test_order_depends_on_seed_and_epoch(index_path):
+    dataset = streaming.StreamingDataset(index_path, shuffle_buffer=4, seed=1, batch_size=4)
+    first = epoch_batches(dataset, 0, 0)
+    assert epoch_batches(dataset, 0, 0) == first
+    assert epoch_batches(dataset, 1, 0) != first
+    assert epoch_batches(streaming.StreamingDataset(index_path, shuffle=False, batch_size=4), 0, 0) == \
+        [list(range(i, min(i + 4, 32))) for i in range(0, 32, 4)]
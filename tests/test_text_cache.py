@@ -0,0 +1,78 @@
+# tests/test_text_cache.py
+
+import csv
+import os
+
+import pytest
+
+pytest.importorskip("tokenizers")
+pytest.importorskip("transformers")
+
+from backend import text_cache
+from conftest import rewrite_in_place
+
+WORDS = ["good", "bad", "movie", "plot", "great", "awful"]
+
+
+@pytest.fixture(scope="module")
+def tokenizer_dir(tmp_path_factory):
+    """A tiny local WordPiece tokenizer, so no hub download is needed."""
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+
+    directory = str(tmp_path_factory.mktemp("tokenizer"))
+    vocab = {token: i for i, token in enumerate(["[PAD]", "[UNK]"] + WORDS)}
+    tokenizer = Tokenizer(models.WordPiece(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]").save_pretrained(directory)
+    return directory
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["review", "sentiment"])
+        writer.writerows(rows)
+
+
+def build(dataset, tokenizer_dir, tmp_path, messages):
+    return text_cache.build_cache(dataset, tokenizer_dir, messages, config={"workers": 1},
+                                  cache_dir=str(tmp_path / "cache"))
+
+
+def test_csv_is_tokenized_without_padding(tmp_path, tokenizer_dir, messages):
+    write_csv(tmp_path / "reviews.csv", [["good movie", "pos"], ["bad plot awful", "neg"]])
+    dataset = text_cache.TokenizedDataset(build(str(tmp_path), tokenizer_dir, tmp_path, messages))
+    assert dataset.classes == ["neg", "pos"]
+    assert list(dataset.lengths) == [2, 3]
+    assert dataset[1][1] == 0
+
+
+def test_cache_hit_does_not_read_texts(tmp_path, tokenizer_dir, messages, monkeypatch):
+    write_csv(tmp_path / "reviews.csv", [["good movie", "pos"], ["bad plot", "neg"]])
+    first = build(str(tmp_path), tokenizer_dir, tmp_path, messages)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("texts were read on a cache hit")
+
+    monkeypatch.setattr(text_cache, "read_texts", fail)
+    assert build(str(tmp_path), tokenizer_dir, tmp_path, messages) == first
+
+
+def test_changed_csv_is_tokenized_again(tmp_path, tokenizer_dir, messages):
+    write_csv(tmp_path / "reviews.csv", [["good movie", "pos"], ["bad plot", "neg"]])
+    first = build(str(tmp_path), tokenizer_dir, tmp_path, messages)
+    write_csv(tmp_path / "reviews.csv", [["great movie", "pos"], ["bad plot", "neg"]])
+    assert build(str(tmp_path), tokenizer_dir, tmp_path, messages) != first
+
+
+def test_txt_file_rewritten_in_place_is_tokenized_again(tmp_path, tokenizer_dir, messages):
+    data = tmp_path / "data"
+    for label, text in (("pos", "good"), ("neg", "bad")):
+        (data / label).mkdir(parents=True)
+        (data / label / "1.txt").write_text(text, encoding="utf-8")
+    first = build(str(data), tokenizer_dir, tmp_path, messages)
+    rewrite_in_place(os.path.join(data, "neg", "1.txt"), b"plot")
+    second = build(str(data), tokenizer_dir, tmp_path, messages)
+    assert second != first
+    assert list(text_cache.TokenizedDataset(second)[0][0]) == [WORDS.index("plot") + 2]